@@ -1,8 +1,22 @@
 import os
+import argparse
 import importlib
+import io
 import json
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from utils import command_runner
+from utils import sysctl
+from utils import suid_index
+from utils import fs_scanner
+from utils import log_analyzer
+from utils import package_integrity
+from utils import integrity_baseline
+from utils import docker_api
+from utils import profiling
+from utils import paths
 
 
 # Verificar si el script se ejecuta con privilegios de root
@@ -19,122 +33,208 @@ def setup_directories():
     os.makedirs(REPORTS_DIR, exist_ok=True)
     REPORT_FILE = os.path.join(REPORTS_DIR, f"report_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
 
-# Ejecutar módulos en orden manualmente
-def run_selected_modules():
-    results = {}
-
-    #INFORMACION DEL SISTEMA 
-
-    # 1 Ejecutar información del sistema primero
-    print("[INFO] Ejecutando módulo: sys_info...\n")
-    results["sys_info"] = importlib.import_module("modules.sys_info").run()
-
-    # 2 Ejecutar auditoría del kernel
-    print("\n[INFO] Ejecutando módulo: kernel...\n")
-    results["kernel"] = importlib.import_module("modules.kernel").run()
-
-    # 3 Ejecutar auditoría Boot and services
-    print("\n[INFO] Ejecutando módulo: Boot and services...\n")
-    results["boot_services"] = importlib.import_module("modules.boot_services").run()
-
-    # 4 Ejecutar auditoría de actualizaciones
-    print("\n[INFO] Ejecutando módulo: Updates Auditing ...\n")
-    results["updates"] = importlib.import_module("modules.updates").run()
+# Módulos en el orden en que se escriben en el informe: (nombre, etiqueta)
+MODULES = [
+    #INFORMACION DEL SISTEMA
+    ("sys_info", "sys_info"),
+    ("kernel", "kernel"),
+    ("boot_services", "Boot and services"),
+    ("updates", "Updates Auditing "),
 
     #RED Y COMUNICACIONES
-
-    # 5 Ejecutar auditoría de Network
-    print("\n[INFO] Ejecutando módulo: Network...\n")
-    results["network"] = importlib.import_module("modules.network").run()
-
-    # 6 Ejecutar auditoría avanzada de red
-    print("\n[INFO] Ejecutando módulo: Advanced Network Auditing ...\n")
-    results["advanced_network_security"] = importlib.import_module("modules.advanced_network_security").run()
+    ("network", "Network"),
+    ("advanced_network_security", "Advanced Network Auditing "),
 
     #SEGURIDAD DEL SISTEMA Y ACCESOS
-
-    # 7 Ejecutar auditoría de usuarios grupos y autenticacion
-    print("\n[INFO] Ejecutando módulo: Usuarios Grupos y Autenticacion...\n")
-    results["users_groups_auth"] = importlib.import_module("modules.users_groups_auth").run()
-
-    # 8 Ejecutar auditoría de File Permissions
-    print("\n[INFO] Ejecutando módulo: File Permissions...\n")
-    results["file_permissions"] = importlib.import_module("modules.file_permissions").run()
-
-    # 9 Ejecutar auditoría de privilegios elevados
-    print("\n[INFO] Ejecutando módulo: Sudo Auditing ...\n")
-    results["sudo"] = importlib.import_module("modules.sudo").run()
-
-    # 10 Ejecutar auditoría de cuentas de servicio
-    print("\n[INFO] Ejecutando módulo: Account Service Auditing ...\n")
-    results["service_accounts"] = importlib.import_module("modules.service_accounts").run()
-
-    # 11 Ejecutar auditoría de politicas de seguridad
-    print("\n[INFO] Ejecutando módulo: Security Policies Auditing ...\n")
-    results["security_policies"] = importlib.import_module("modules.security_policies").run()
-
-    # 12 Ejecutar auditoría de seguridad de aplicaciones
-    print("\n[INFO] Ejecutando módulo: Auditing Security App...\n")
-    results["app_security"] = importlib.import_module("modules.app_security").run()
+    ("users_groups_auth", "Usuarios Grupos y Autenticacion"),
+    ("file_permissions", "File Permissions"),
+    ("sudo", "Sudo Auditing "),
+    ("service_accounts", "Account Service Auditing "),
+    ("security_policies", "Security Policies Auditing "),
+    ("app_security", "Auditing Security App"),
 
     #ARCHIVOS Y DIRECTORIOS
-
-    # 13 Ejecutar auditoría de home directories
-    print("\n[INFO] Ejecutando módulo: home directories...\n")
-    results["home_directories"] = importlib.import_module("modules.home_directories").run()
-
-    # 14 Ejecutar auditoría de seguridad de dispositivos de almacenamiento
-    print("\n[INFO] Ejecutando módulo: Storage Device Auditing ...\n")
-    results["storage_device"] = importlib.import_module("modules.storage_device").run()
-
+    ("home_directories", "home directories"),
+    ("storage_device", "Storage Device Auditing "),
 
     #PROCESOS MEMORIA Y ACTIVIDAD
-
-    # 15 Ejecutar auditoría del memoria y procesos
-    print("\n[INFO] Ejecutando módulo: Memoria y Procesos...\n")
-    results["mem_process"] = importlib.import_module("modules.mem_process").run()
-
-    # 16 Ejecutar auditoría de logs
-    print("\n[INFO] Ejecutando módulo: Auditing Logs...\n")
-    results["logs"] = importlib.import_module("modules.logs").run()
+    ("mem_process", "Memoria y Procesos"),
+    ("logs", "Auditing Logs"),
 
     #CONTENEDORES Y ENTORNO VIRTUAL
-
-    # 17 Ejecutar auditoría de seguridad de Contenedores
-    print("\n[INFO] Ejecutando módulo: Containers Security Auditing ...\n")
-    results["containers_security"] = importlib.import_module("modules.containers_security").run()
-
+    ("containers_security", "Containers Security Auditing "),
 
     #BACKUP Y RECUPERACION
-
-    # 18 Ejecutar auditoría de copias de seguridad
-    print("\n[INFO] Ejecutando módulo: Backup Auditing ...\n")
-    results["backup"] = importlib.import_module("modules.backup").run()
+    ("backup", "Backup Auditing "),
 
     #TESTS
-
-    # 19 Ejecutar auditoría de Debian Tests
-    print("\n[INFO] Ejecutando módulo: Debian Tests...\n")
-    results["debian_tests"] = importlib.import_module("modules.debian_tests").run()
-
+    ("debian_tests", "Debian Tests"),
 
     #PROTECCION Y DETECCION DE AMENAZAS
-
-    # 20 Ejecutar auditoría de proteccion de malware
-    print("\n[INFO] Ejecutando módulo: Malware Protection Auditing ...\n")
-    results["malware_protection"] = importlib.import_module("modules.malware_protection").run()
+    ("malware_protection", "Malware Protection Auditing "),
+]
+
+# Módulos que solo tienen sentido en un sistema en ejecución (procesos, red,
+# dispositivos, contenedores): se omiten al auditar una imagen con --root
+RUNTIME_MODULES = {"sys_info", "network", "advanced_network_security", "mem_process",
+                   "storage_device", "containers_security", "malware_protection"}
+
+# Número de módulos que se ejecutan a la vez por defecto
+DEFAULT_WORKERS = 4
+
+class ModuleOutput(io.TextIOBase):
+    """Redirige la salida de cada hilo a su propio buffer para no mezclar módulos."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def capture(self):
+        self.local.buffer = io.StringIO()
+
+    def release(self):
+        buffer = self.local.buffer
+        self.local.buffer = None
+        return buffer.getvalue()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+def run_module(name, output, profile=False):
+    """Ejecuta un módulo capturando su salida y aislando sus errores."""
+    output.capture()
+    if paths.root != "/" and name in RUNTIME_MODULES:
+        print(f"[INFO] Módulo {name} omitido: requiere el sistema en ejecución (--root {paths.root})")
+        return {"skipped": "runtime module not available with --root"}, output.release()
+    try:
+        module = importlib.import_module(f"modules.{name}")
+        profiling.instrument_module(module)
+        profile_path = REPORT_FILE.replace(".json", f"_{name}.pstats") if profile else None
+        result = profiling.measure_module(name, module.run, profile_path)
+    except Exception as e:
+        print(f"[ERROR] El módulo {name} ha fallado: {str(e)}")
+        result = {"error": f"Error al ejecutar el módulo {name}: {str(e)}"}
+    return result, output.release()
+
+def select_modules(names=None):
+    """Módulos a ejecutar (todos, o los indicados con --modules) en el orden del informe."""
+    if not names:
+        return MODULES
+    wanted = set(names)
+    unknown = wanted - {name for name, _ in MODULES}
+    if unknown:
+        raise ValueError(f"Módulos desconocidos: {', '.join(sorted(unknown))}")
+    return [(name, label) for name, label in MODULES if name in wanted]
+
+# Ejecutar módulos en paralelo manteniendo el orden del informe
+def run_selected_modules(workers=DEFAULT_WORKERS, profile=False, modules=MODULES):
+    results = {}
+    output = ModuleOutput(sys.stdout)
+    sys.stdout = output
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [(name, label, executor.submit(run_module, name, output, profile)) for name, label in modules]
+
+            # Escribir cada módulo en el orden original en cuanto termina
+            for index, (name, label, future) in enumerate(futures):
+                result, module_output = future.result()
+                separator = "" if index == 0 else "\n"
+                output.stream.write(f"{separator}[INFO] Ejecutando módulo: {label}...\n\n")
+                output.stream.write(module_output)
+                output.stream.flush()
+                results[name] = result
+    finally:
+        sys.stdout = output.stream
 
     return results
 
-# Guardar el informe en JSON
-def save_report(results):
+# Buscar el informe más reciente de una auditoría anterior
+def load_previous_report():
+    reports = sorted(f for f in os.listdir(REPORTS_DIR)
+                     if f.startswith("report_") and f.endswith(".json") and os.path.join(REPORTS_DIR, f) != REPORT_FILE)
+    if not reports:
+        return None
+    try:
+        with open(os.path.join(REPORTS_DIR, reports[-1])) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Guardar el informe en JSON (o escribirlo en stream, p. ej. stdout para el modo flota)
+def save_report(results, stream=None):
+    if stream is not None:
+        json.dump(results, stream)
+        stream.write("\n")
+        stream.flush()
+        print("\n[INFO] Auditoría finalizada. Reporte enviado a la salida estándar\n")
+        return
+
     with open(REPORT_FILE, "w") as f:
         json.dump(results, f, indent=4)
     
     print(f"\n[INFO] Auditoría finalizada. Revisa el reporte en {REPORT_FILE}\n")
 
+# Leer los argumentos de línea de comandos
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Auditoría de seguridad del sistema operativo.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Número de módulos ejecutados en paralelo (por defecto {DEFAULT_WORKERS}, 1 = secuencial)")
+    parser.add_argument("--full-scan", action="store_true",
+                        help="Ignorar los índices incrementales: recorrer todo el sistema de archivos, releer los logs enteros y volver a calcular los hashes de los paquetes")
+    parser.add_argument("--scan-workers", type=int, default=1,
+                        help="Procesos para recorrer el sistema de archivos (por defecto 1)")
+    parser.add_argument("--scan-per-mount", type=int, default=fs_scanner.per_mount_limit,
+                        help="Subárboles recorridos a la vez dentro de un mismo montaje")
+    parser.add_argument("--hash-workers", type=int, default=package_integrity.workers,
+                        help=f"Procesos para verificar los archivos de los paquetes (por defecto {package_integrity.workers})")
+    parser.add_argument("--baseline-trees", type=lambda value: [path for path in value.split(",") if path],
+                        default=integrity_baseline.DEFAULT_TREES,
+                        help="Árboles cubiertos por la línea base de integridad (separados por comas)")
+    parser.add_argument("--docker-socket", default=docker_api.socket_path,
+                        help=f"Socket Unix de la API de Docker Engine (por defecto {docker_api.socket_path})")
+    parser.add_argument("--root", default="/",
+                        help="Auditar una imagen montada o un chroot en esta ruta en lugar del sistema en ejecución")
+    parser.add_argument("--modules", type=lambda value: [name for name in value.split(",") if name],
+                        help="Ejecutar solo estos módulos (separados por comas)")
+    parser.add_argument("--output", choices=["file", "-"], default="file",
+                        help="Dónde escribir el informe: archivo en reports/ (por defecto) o '-' para la salida estándar")
+    parser.add_argument("--profile", action="store_true",
+                        help="Guardar estadísticas cProfile de cada módulo junto al informe (ejecución secuencial)")
+    return parser.parse_args()
+
 # Ejecutar el programa
 def main():
+    args = parse_arguments()
+    if not os.path.isdir(args.root):
+        print(f"[ERROR] La raíz indicada con --root no es un directorio: {args.root}")
+        sys.exit(1)
+    paths.set_root(args.root)
+    try:
+        modules = select_modules(args.modules)
+    except ValueError as e:
+        print(f"[ERROR] {str(e)}")
+        sys.exit(1)
+
+    # Con --output - la salida estándar lleva solo el JSON: los mensajes van a stderr
+    report_stream = None
+    if args.output == "-":
+        report_stream = sys.stdout
+        sys.stdout = sys.stderr
+    suid_index.incremental = not args.full_scan
+    log_analyzer.incremental = not args.full_scan
+    package_integrity.incremental = not args.full_scan
+    package_integrity.workers = max(1, args.hash_workers)
+    integrity_baseline.incremental = not args.full_scan
+    integrity_baseline.trees = args.baseline_trees
+    docker_api.socket_path = args.docker_socket
+    fs_scanner.workers = args.scan_workers
+    fs_scanner.per_mount_limit = max(1, args.scan_per_mount)
+
     print(r"""
     _   _   _ ____ ___ _____           _____ ___   ___  _       _
    / \ | | | |  _ \_ _|_   _|         |_   _/ _ \ / _ \| |     | |__  _   _
@@ -161,10 +261,28 @@ def main():
     setup_directories()
     
     # Ejecutar los módulos en el orden deseado
-    results = run_selected_modules()
+    # cProfile solo admite un perfilador activo a la vez: con --profile se ejecuta en secuencia
+    workers = 1 if args.profile else args.workers
+    results = run_selected_modules(workers, args.profile, modules)
+
+    # Tiempos, CPU, subprocesos, bytes leídos y memoria de cada módulo y comprobación
+    results["_timings"] = profiling.get_timings()
+
+    # Registrar qué comandos se ejecutaron y qué módulos reutilizaron su salida
+    results["_command_cache"] = command_runner.get_stats()
+
+    # Guardar la instantánea de sysctl y compararla con la de la auditoría anterior
+    # (una imagen fuera de línea no tiene /proc/sys propio)
+    if paths.root == "/":
+        results["_sysctl"] = sysctl.snapshot()
+        previous = load_previous_report()
+        if previous and "_sysctl" in previous:
+            results["_sysctl_diff"] = sysctl.diff(previous["_sysctl"], results["_sysctl"])
+    else:
+        results["_root"] = paths.root
     
     # Guardar el reporte final
-    save_report(results)
+    save_report(results, report_stream)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,143 @@
+import os
+import re
+import sys
+import json
+import argparse
+import threading
+import socketserver
+
+# Servidor simulado de la API de Docker Engine sobre un socket Unix, para
+# probar utils/docker_api.py y el módulo containers_security sin un daemon
+# real. Atiende peticiones HTTP/1.1 encadenadas (pipelining) en conexiones
+# persistentes y sirve N contenedores ficticios. Uso (desde audit-tool/):
+#
+#   python3 -m benchmarks.fake_docker --socket /tmp/docker.sock --containers 300
+#   python3 audit_tool.py --modules containers_security --docker-socket /tmp/docker.sock
+
+INSPECT_PATH = re.compile(r"^/containers/([^/?]+)/json$")
+
+def make_containers(count):
+    """{id: (entrada de /containers/json, respuesta de /containers/{id}/json)} de count contenedores."""
+    containers = {}
+    for index in range(count):
+        container_id = f"{index:012x}" + "ab" * 26
+        ports = [{"IP": "0.0.0.0", "PrivatePort": 80, "PublicPort": 8000 + index, "Type": "tcp"}] if index % 3 == 0 else []
+        summary = {"Id": container_id, "Names": [f"/app{index}"], "Image": f"example/app:{index % 5}",
+                   "State": "running", "Ports": ports}
+        detail = {
+            "Id": container_id,
+            "Name": f"/app{index}",
+            "Config": {"User": "" if index % 4 == 0 else "1000", "Image": summary["Image"]},
+            "HostConfig": {
+                "Memory": 0 if index % 2 == 0 else 256 * 1024 * 1024,
+                "Privileged": index % 10 == 0,
+                "ReadonlyRootfs": index % 7 == 0,
+                "NetworkMode": "host" if index % 11 == 0 else "bridge",
+                "PidMode": "host" if index % 13 == 0 else "",
+                "CapAdd": ["NET_ADMIN"] if index % 5 == 0 else None,
+            },
+        }
+        containers[container_id] = (summary, detail)
+    return containers
+
+class FakeDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, containers, chunked=False, close_every=0):
+        self.containers = containers
+        # chunked: cuerpos con Transfer-Encoding: chunked (como el daemon real)
+        self.chunked = chunked
+        # close_every: cerrar la conexión tras N respuestas, para probar los reintentos
+        self.close_every = close_every
+        self.connections = 0
+        self.requests = 0
+        self.counter_lock = threading.Lock()
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, FakeDockerHandler)
+
+    def respond(self, path):
+        """(estado, objeto JSON) de una petición GET."""
+        if path.split("?")[0] == "/containers/json":
+            return 200, [summary for summary, _ in self.containers.values()]
+        match = INSPECT_PATH.match(path)
+        if match:
+            entry = self.containers.get(match.group(1))
+            if entry is None:
+                return 404, {"message": f"No such container: {match.group(1)}"}
+            return 200, entry[1]
+        return 404, {"message": "page not found"}
+
+class FakeDockerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        with self.server.counter_lock:
+            self.server.connections += 1
+        try:
+            self.serve_requests()
+        except ConnectionError:
+            pass  # El cliente ha cerrado la conexión (p. ej. al descartar una respuesta)
+
+    def serve_requests(self):
+        answered = 0
+        while True:
+            request_line = self.rfile.readline(65537)
+            if not request_line:
+                return
+            # Cabeceras hasta la línea vacía (las peticiones GET no llevan cuerpo)
+            while self.rfile.readline(65537) not in (b"\r\n", b"\n", b""):
+                pass
+            with self.server.counter_lock:
+                self.server.requests += 1
+            method, path = request_line.decode("latin-1").split()[:2]
+            status, payload = self.server.respond(path) if method == "GET" else (405, {"message": "method not allowed"})
+            answered += 1
+            close = bool(self.server.close_every) and answered >= self.server.close_every
+            self.send(status, json.dumps(payload).encode(), close)
+            if close:
+                return
+
+    def send(self, status, body, close):
+        headers = [f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}", "Content-Type: application/json",
+                   "Api-Version: 1.43"]
+        if close:
+            headers.append("Connection: close")
+        if self.server.chunked:
+            headers.append("Transfer-Encoding: chunked")
+            middle = len(body) // 2
+            payload = b"".join(f"{len(part):x}\r\n".encode() + part + b"\r\n"
+                               for part in (body[:middle], body[middle:]) if part) + b"0\r\n\r\n"
+        else:
+            headers.append(f"Content-Length: {len(body)}")
+            payload = body
+        self.wfile.write(("\r\n".join(headers) + "\r\n\r\n").encode() + payload)
+
+def start(path, count, chunked=False, close_every=0):
+    """Arranca el servidor en un hilo y lo devuelve (server.shutdown() para pararlo)."""
+    server = FakeDockerServer(path, make_containers(count), chunked, close_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Servidor simulado de la API de Docker Engine sobre un socket Unix.")
+    parser.add_argument("--socket", default="/tmp/audit_tool_docker.sock", help="Ruta del socket Unix")
+    parser.add_argument("--containers", type=int, default=100, help="Número de contenedores ficticios")
+    parser.add_argument("--chunked", action="store_true", help="Responder con Transfer-Encoding: chunked")
+    parser.add_argument("--close-every", type=int, default=0, help="Cerrar la conexión tras N respuestas (0 = nunca)")
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    server = FakeDockerServer(args.socket, make_containers(args.containers), args.chunked, args.close_every)
+    print(f"[INFO] API de Docker simulada en {args.socket} ({args.containers} contenedores)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+        print(f"[INFO] {server.connections} conexiones, {server.requests} peticiones")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
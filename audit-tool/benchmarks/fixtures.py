@@ -0,0 +1,172 @@
+import os
+import json
+import random
+import struct
+
+# Árboles raíz sintéticos para medir cómo escalan los módulos.
+# Cada escala genera /etc/passwd, /etc/shadow y /etc/group con muchos usuarios,
+# un /home con muchos directorios, logs grandes en /var/log, lastlog y wtmp
+# binarios, un árbol de binarios (algunos con SUID/SGID) para el recorrido
+# del sistema de archivos y una base de datos de dpkg (status, *.md5sums e
+# índices de apt) con un paquete por directorio del árbol.
+
+# Se incrementa cuando cambia el contenido generado para rehacer los árboles
+FIXTURE_VERSION = 3
+
+SCALES = {
+    "small": {"users": 1000, "homes": 500, "log_mb": 8, "tree_dirs": 200, "files_per_dir": 50},
+    "medium": {"users": 10000, "homes": 5000, "log_mb": 64, "tree_dirs": 1000, "files_per_dir": 100},
+    "large": {"users": 100000, "homes": 50000, "log_mb": 512, "tree_dirs": 5000, "files_per_dir": 100},
+}
+
+# Uno de cada SUID_EVERY archivos del árbol de binarios lleva el bit setuid
+SUID_EVERY = 997
+
+# Uno de cada UPGRADABLE_EVERY paquetes tiene una versión nueva en los índices de apt
+UPGRADABLE_EVERY = 10
+
+# MD5 de un archivo vacío (todos los binarios del árbol lo son)
+EMPTY_MD5 = "d41d8cd98f00b204e9800998ecf8427e"
+
+# Comandos simulados que se anteponen en PATH durante el benchmark
+STUB_COMMANDS = {
+    "getent": 'echo "sudo:x:27:user0,user1"\n',
+    "sudo": 'echo "/etc/sudoers: parsed OK"\necho "syntax OK"\n',
+}
+
+AUTH_LOG_LINES = [
+    "{ts} bench sshd[{pid}]: Failed password for invalid user admin from 203.0.113.{n} port 22 ssh2\n",
+    "{ts} bench sshd[{pid}]: Accepted publickey for user{n} from 198.51.100.{n} port 22 ssh2\n",
+    "{ts} bench sudo:    user{n} : TTY=pts/0 ; PWD=/home/user{n} ; USER=root ; COMMAND=/usr/bin/apt update\n",
+    "{ts} bench CRON[{pid}]: pam_unix(cron:session): session opened for user root by (uid=0)\n",
+]
+
+def _write_accounts(root, users):
+    etc = os.path.join(root, "etc")
+    os.makedirs(etc, exist_ok=True)
+    with open(os.path.join(etc, "passwd"), "w") as passwd, \
+         open(os.path.join(etc, "shadow"), "w") as shadow, \
+         open(os.path.join(etc, "group"), "w") as group:
+        passwd.write("root:x:0:0:root:/root:/bin/bash\ndaemon:x:1:1:daemon:/usr/sbin:/usr/sbin/nologin\n")
+        shadow.write("root:$6$rounds=5000$salt$hash:19000:0:99999:7:::\ndaemon:*:19000:0:99999:7:::\n")
+        group.write("root:x:0:\nsudo:x:27:user0,user1\n")
+        for i in range(users):
+            uid = 1000 + i
+            passwd.write(f"user{i}:x:{uid}:{uid}:Bench User {i}:/home/user{i}:/bin/bash\n")
+            # Algunas cuentas sin hash o con SHA-256 para que los parsers tengan casos variados
+            password = "" if i % 500 == 0 else ("$5$salt$hash" if i % 7 == 0 else "$6$salt$hash")
+            shadow.write(f"user{i}:{password}:19000:0:99999:7:::\n")
+            group.write(f"user{i}:x:{uid}:\n")
+
+def _write_logins(root, users):
+    """lastlog con un registro para la mitad de los usuarios y un wtmp con una sesión por usuario."""
+    log_dir = os.path.join(root, "var", "log")
+    os.makedirs(log_dir, exist_ok=True)
+    lastlog = struct.Struct("=i32s256s")
+    utmp = struct.Struct("=h2xi32s4s32s256s2hi2i16s20s")
+    with open(os.path.join(log_dir, "lastlog"), "wb") as f:
+        for i in range(0, users, 2):
+            f.seek((1000 + i) * lastlog.size)
+            f.write(lastlog.pack(1700000000 + i, b"pts/0", b"10.0.0.1"))
+    with open(os.path.join(log_dir, "wtmp"), "wb") as f:
+        for i in range(users):
+            f.write(utmp.pack(7, 1000 + i, b"pts/1", b"ts/1", f"user{i}".encode(), b"198.51.100.1",
+                              0, 0, 0, 1600000000 + i, 0, b"", b""))
+
+def _write_homes(root, homes):
+    for i in range(homes):
+        home = os.path.join(root, "home", f"user{i}")
+        os.makedirs(home, exist_ok=True)
+        os.chmod(home, 0o700 if i % 3 else 0o755)
+        history = os.path.join(home, ".bash_history")
+        with open(history, "w") as f:
+            f.write("ls\ncd /tmp\n")
+        os.chmod(history, 0o600 if i % 5 else 0o644)
+
+def _write_logs(root, log_mb):
+    log_dir = os.path.join(root, "var", "log")
+    os.makedirs(log_dir, exist_ok=True)
+    os.makedirs(os.path.join(root, "etc", "logrotate.d"), exist_ok=True)
+    rng = random.Random(0)
+    target = log_mb * 1024 * 1024
+    for name in ("auth.log", "syslog"):
+        written = 0
+        with open(os.path.join(log_dir, name), "w") as f:
+            while written < target:
+                line = rng.choice(AUTH_LOG_LINES).format(ts="Jan  1 00:00:00", pid=rng.randint(100, 99999),
+                                                         n=rng.randint(1, 254))
+                f.write(line)
+                written += len(line)
+
+def _write_binary_tree(root, tree_dirs, files_per_dir):
+    count = 0
+    for d in range(tree_dirs):
+        directory = os.path.join(root, "usr", "lib", "bench", f"d{d // 100}", f"d{d}")
+        os.makedirs(directory, exist_ok=True)
+        for f in range(files_per_dir):
+            path = os.path.join(directory, f"bin{f}")
+            with open(path, "w"):
+                pass
+            count += 1
+            os.chmod(path, 0o4755 if count % SUID_EVERY == 0 else 0o755)
+    return count
+
+def _write_packages(root, tree_dirs, files_per_dir):
+    """Un paquete instalado por directorio del árbol de binarios, con sus *.md5sums y su versión en apt."""
+    info_dir = os.path.join(root, "var", "lib", "dpkg", "info")
+    lists_dir = os.path.join(root, "var", "lib", "apt", "lists")
+    os.makedirs(info_dir, exist_ok=True)
+    os.makedirs(lists_dir, exist_ok=True)
+    with open(os.path.join(root, "var", "lib", "dpkg", "status"), "w") as status, \
+         open(os.path.join(lists_dir, "deb.example.org_debian_dists_bench_main_binary-amd64_Packages"), "w") as index:
+        for d in range(tree_dirs):
+            name = f"bench-d{d}"
+            status.write(f"Package: {name}\nStatus: install ok installed\nArchitecture: amd64\nVersion: 1.0-1\n"
+                         f"Description: paquete de benchmark {d}\n\n")
+            candidate = "1.1-1" if d % UPGRADABLE_EVERY == 0 else "1.0-1"
+            index.write(f"Package: {name}\nArchitecture: amd64\nVersion: {candidate}\n\n")
+            with open(os.path.join(info_dir, f"{name}.md5sums"), "w") as md5sums:
+                for f in range(files_per_dir):
+                    md5sums.write(f"{EMPTY_MD5}  usr/lib/bench/d{d // 100}/d{d}/bin{f}\n")
+
+def write_stub_commands(bin_dir):
+    os.makedirs(bin_dir, exist_ok=True)
+    for name, body in STUB_COMMANDS.items():
+        path = os.path.join(bin_dir, name)
+        with open(path, "w") as f:
+            f.write("#!/bin/sh\n" + body)
+        os.chmod(path, 0o755)
+
+def build(base_dir, scale):
+    """Genera (o reutiliza) el árbol de una escala y devuelve (raíz, tamaños)."""
+    config = SCALES[scale]
+    root = os.path.join(base_dir, scale, "root")
+    marker = os.path.join(base_dir, scale, "fixture.json")
+    try:
+        with open(marker) as f:
+            saved = json.load(f)
+        if saved["config"] == config and saved.get("version") == FIXTURE_VERSION:
+            return root, saved["sizes"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    _write_accounts(root, config["users"])
+    _write_logins(root, config["users"])
+    _write_homes(root, config["homes"])
+    _write_logs(root, config["log_mb"])
+    tree_files = _write_binary_tree(root, config["tree_dirs"], config["files_per_dir"])
+    _write_packages(root, config["tree_dirs"], config["files_per_dir"])
+    write_stub_commands(os.path.join(base_dir, scale, "bin"))
+
+    sizes = {
+        "users": config["users"] + 2,
+        "homes": config["homes"],
+        "files": sum(len(dirs) + len(names) for _, dirs, names in os.walk(root)),
+        "suid_files": tree_files // SUID_EVERY,
+        "log_bytes": 2 * config["log_mb"] * 1024 * 1024,
+        "packages": config["tree_dirs"],
+        "packaged_files": tree_files,
+    }
+    with open(marker, "w") as f:
+        json.dump({"config": config, "sizes": sizes, "version": FIXTURE_VERSION}, f)
+    return root, sizes
@@ -0,0 +1,205 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import importlib
+import statistics
+import tempfile
+from contextlib import redirect_stdout
+from benchmarks import fixtures
+from utils import accounts
+from utils import apt_index
+from utils import command_runner
+from utils import fs_scanner
+from utils import home_scanner
+from utils import integrity_baseline
+from utils import package_integrity
+from utils import packages
+from utils import paths
+from utils import policy
+from utils import profiling
+from utils import state_store
+from utils import suid_index
+
+# Ejecuta run() de cada módulo contra los árboles de fixtures.py y compara la
+# latencia con una línea base guardada. Uso (desde audit-tool/):
+#
+#   python3 -m benchmarks.run_benchmarks --scales small,medium
+#   python3 -m benchmarks.run_benchmarks --update-baseline
+#
+# Sin benchmarks/baseline.json termina con error salvo con --allow-missing-baseline.
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Benchmark -> (módulo, tamaño del fixture que procesa, estado previo: índice SUID, checkpoints de logs...).
+# Sin tamaño (módulos que leen unos pocos archivos de configuración) o con estado
+# previo (la pasada incremental apenas lee nada) solo se informa la latencia.
+BENCHMARKS = {
+    "home_directories": ("home_directories", "homes", False),
+    "service_accounts": ("service_accounts", "users", False),
+    "users_groups_auth": ("users_groups_auth", "users", False),
+    "security_policies": ("security_policies", None, False),
+    "updates": ("updates", "packages", False),
+    "debian_tests": ("debian_tests", "packaged_files", False),
+    "backup": ("backup", None, False),
+    "kernel": ("kernel", None, False),
+    "logs": ("logs", "log_bytes", False),
+    "logs_incremental": ("logs", "log_bytes", True),
+    "file_permissions": ("file_permissions", "files", False),
+    "sudo": ("sudo", "files", False),
+    "sudo_incremental": ("sudo", "files", True),
+}
+
+def reset_caches(state_dir):
+    """Deja los módulos como al empezar una auditoría nueva."""
+    command_runner.clear()
+    fs_scanner.reset()
+    suid_index.reset()
+    accounts.reset()
+    home_scanner.reset()
+    policy.reset()
+    packages.reset()
+    apt_index.reset()
+    package_integrity.reset()
+    integrity_baseline.reset()
+    state_store.STATE_DIR = state_dir
+
+def run_once(module, state_dir, warm_state):
+    reset_caches(state_dir)
+    if warm_state:
+        # Estado de una auditoría anterior ya guardado: se mide solo la pasada incremental
+        with redirect_stdout(io.StringIO()):
+            module.run()
+        reset_caches(state_dir)
+    bytes_before = profiling.current_counters()["bytes_read"]
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        module.run()
+    return time.perf_counter() - start, profiling.current_counters()["bytes_read"] - bytes_before
+
+def run_benchmark(name, root, bin_dir, sizes, repeats):
+    module_name, size_key, warm_state = BENCHMARKS[name]
+    module = importlib.import_module(f"modules.{module_name}")
+    paths.set_root(root)
+    original_path = os.environ["PATH"]
+    os.environ["PATH"] = f"{bin_dir}:{original_path}"
+    try:
+        latencies, bytes_read = [], []
+        for _ in range(repeats):
+            with tempfile.TemporaryDirectory() as state_dir:
+                latency, read = run_once(module, state_dir, warm_state)
+            latencies.append(latency)
+            bytes_read.append(read)
+    finally:
+        os.environ["PATH"] = original_path
+        paths.set_root("/")
+
+    median = statistics.median(latencies)
+    # Con estado previo el tamaño del fixture no es lo que se procesa: no hay throughput
+    items = sizes[size_key] if size_key and not warm_state else None
+    return {
+        "latency_median": round(median, 4),
+        "latency_min": round(min(latencies), 4),
+        "latency_max": round(max(latencies), 4),
+        "bytes_read": int(statistics.median(bytes_read)),
+        "items": items,
+        "unit": size_key,
+        "throughput": round(items / median, 1) if items and median else None,
+    }
+
+def check_parallel_walk(root):
+    """Diferencias entre fs_scanner.walk() y parallel_walk() sobre un fixture (raíz distinta de /)."""
+    paths.set_root(root)
+    try:
+        host_root = paths.host_path("/")
+        # Se omite la poda de /proc/mounts: el fixture no tiene montajes propios
+        sequential = fs_scanner.walk(host_root, prune=set())
+        parallel = fs_scanner.parallel_walk(host_root, workers=2, prune=set())
+    finally:
+        paths.set_root("/")
+    differences = []
+    for key, value in sequential.items():
+        if isinstance(value, list):
+            expected = sorted(info["path"] for info in value)
+            found = sorted(info["path"] for info in parallel[key])
+            if expected != found:
+                example = sorted(set(expected) ^ set(found))[0]
+                differences.append(f"{key}: {len(expected)} con walk(), {len(found)} con parallel_walk() (p. ej. {example})")
+        elif parallel[key] != value:
+            differences.append(f"{key}: {value} con walk(), {parallel[key]} con parallel_walk()")
+    return differences
+
+def find_regressions(results, baseline, tolerance):
+    """Benchmarks cuya mediana supera la de la línea base en más de tolerance."""
+    regressions = []
+    for scale, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            reference = baseline.get(scale, {}).get(name)
+            if reference and result["latency_median"] > reference["latency_median"] * (1 + tolerance):
+                regressions.append(f"{scale}/{name}: {result['latency_median']}s "
+                                   f"(línea base {reference['latency_median']}s)")
+    return regressions
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmarks de los módulos de auditoría sobre árboles sintéticos.")
+    parser.add_argument("--scales", default="small", help=f"Escalas separadas por comas ({', '.join(fixtures.SCALES)})")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="Benchmarks separados por comas")
+    parser.add_argument("--repeats", type=int, default=3, help="Repeticiones por benchmark (se usa la mediana)")
+    parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "audit_tool_fixtures"),
+                        help="Directorio donde se generan y reutilizan los fixtures")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Margen de regresión permitido (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Guardar los resultados como nueva línea base")
+    parser.add_argument("--output", help="Guardar los resultados en un archivo JSON")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="No fallar si no existe la línea base (p. ej. la primera ejecución en una máquina nueva)")
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    results = {}
+    failed = False
+    for scale in args.scales.split(","):
+        print(f"[INFO] Generando fixtures ({scale})...")
+        root, sizes = fixtures.build(args.fixtures_dir, scale)
+        for difference in check_parallel_walk(root):
+            print(f"[ERROR] Recorrido paralelo distinto del secuencial ({scale}): {difference}")
+            failed = True
+        bin_dir = os.path.join(args.fixtures_dir, scale, "bin")
+        results[scale] = {}
+        for name in args.benchmarks.split(","):
+            result = run_benchmark(name, root, bin_dir, sizes, args.repeats)
+            results[scale][name] = result
+            throughput = f", {result['throughput']} {result['unit']}/s" if result["throughput"] else ""
+            print(f"  - {scale}/{name}: {result['latency_median']}s, {result['bytes_read']} bytes leídos{throughput}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if args.update_baseline:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"[INFO] Línea base actualizada en {BASELINE_FILE}")
+        return 1 if failed else 0
+
+    try:
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        # Sin línea base no se puede detectar ninguna regresión: no se da por bueno en silencio
+        if args.allow_missing_baseline:
+            print("[INFO] No hay línea base; ejecuta con --update-baseline para crearla.")
+            return 1 if failed else 0
+        print(f"[ERROR] No hay línea base en {BASELINE_FILE}; créala con --update-baseline "
+              "o usa --allow-missing-baseline.")
+        return 1
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"[ERROR] Regresión: {regression}")
+    return 1 if regressions or failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import os
+import argparse
+import json
+import sys
+from datetime import datetime
+from utils import fleet
+
+# Coordinador de auditorías de flota: lanza audit_tool.py en muchos destinos y
+# une los informes en uno solo.
+
+REPORTS_DIR = os.path.join(os.path.dirname(__file__), "reports")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Auditoría de seguridad de una flota de equipos.")
+    parser.add_argument("hosts", nargs="*", help="Destinos a auditar")
+    parser.add_argument("--hosts-file", help="Archivo con un destino por línea")
+    parser.add_argument("--transport", choices=sorted(fleet.TRANSPORTS), default="ssh",
+                        help="Cómo se llega a cada destino (por defecto ssh)")
+    parser.add_argument("--remote-command", default="sudo python3 /opt/audit-tool/audit_tool.py",
+                        help="Comando que lanza la herramienta en el destino (transporte ssh)")
+    parser.add_argument("--ssh", default="ssh", help="Cliente ssh y opciones extra (transporte ssh)")
+    parser.add_argument("--replay-dir", help="Directorio con <destino>.json (transporte replay)")
+    parser.add_argument("--modules", type=lambda value: [name for name in value.split(",") if name],
+                        help="Módulos a ejecutar en cada destino (separados por comas)")
+    parser.add_argument("--concurrency", type=int, default=fleet.DEFAULT_CONCURRENCY,
+                        help=f"Destinos auditados a la vez (por defecto {fleet.DEFAULT_CONCURRENCY})")
+    parser.add_argument("--timeout", type=int, default=fleet.DEFAULT_TIMEOUT,
+                        help=f"Segundos máximos por destino (por defecto {fleet.DEFAULT_TIMEOUT})")
+    return parser.parse_args()
+
+def build_transport(args):
+    if args.transport == "ssh":
+        return fleet.SSHTransport(args.remote_command, args.ssh)
+    if args.transport == "replay":
+        if not args.replay_dir:
+            print("[ERROR] El transporte replay necesita --replay-dir")
+            sys.exit(1)
+        return fleet.ReplayTransport(args.replay_dir)
+    return fleet.LocalTransport()
+
+def main():
+    args = parse_arguments()
+    hosts = list(args.hosts)
+    if args.hosts_file:
+        hosts += fleet.read_hosts(args.hosts_file)
+    hosts = list(dict.fromkeys(hosts))
+    if not hosts:
+        print("[ERROR] No se ha indicado ningún destino.")
+        sys.exit(1)
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    stream_file = os.path.join(REPORTS_DIR, f"fleet_{stamp}.jsonl")
+    report_file = os.path.join(REPORTS_DIR, f"fleet_{stamp}.json")
+
+    # Cada informe se añade al .jsonl en cuanto llega: si el coordinador se
+    # interrumpe, lo ya recibido no se pierde
+    with open(stream_file, "w") as stream:
+        done = 0
+
+        def on_result(host, report, wall_time):
+            nonlocal done
+            done += 1
+            status = f"ERROR: {report['error']}" if "error" in report else "OK"
+            print(f"[INFO] ({done}/{len(hosts)}) {host}: {status} ({wall_time:.1f} s)")
+            stream.write(json.dumps({"host": host, "wall_time": wall_time, "report": report}) + "\n")
+            stream.flush()
+
+        print(f"[INFO] Auditando {len(hosts)} destinos ({args.transport}, {args.concurrency} a la vez)...")
+        fleet_report = fleet.audit_fleet(hosts, build_transport(args), args.modules, args.concurrency,
+                                         args.timeout, on_result)
+
+    with open(report_file, "w") as f:
+        json.dump(fleet_report, f, indent=4)
+
+    summary = fleet_report["_fleet"]
+    print(f"\n[INFO] {summary['hosts_ok']}/{summary['hosts_total']} destinos auditados en {summary['wall_time']:.1f} s.")
+    if summary["hosts_failed"]:
+        print(f"[WARNING] Destinos con error: {', '.join(summary['hosts_failed'])}")
+    print(f"[INFO] Revisa el reporte de la flota en {report_file}\n")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
-import subprocess
 import json
+from utils import command_runner
 
 def check_iptables_rules():
     """Verifica las reglas de iptables y si permiten tráfico no deseado."""
     try:
         # Obtiene las reglas activas de iptables
-        iptables_rules = subprocess.getoutput("sudo iptables -L -n")
+        iptables_rules = command_runner.getoutput("sudo iptables -L -n")
         
         if "ACCEPT" in iptables_rules:
             return "iptables: [Rule(s) allowing traffic found, review needed]"
@@ -17,7 +17,7 @@ def check_iptables_rules():
 def check_ufw_status():
     """Verifica el estado de UFW (Uncomplicated Firewall)."""
     try:
-        ufw_status = subprocess.getoutput("sudo ufw status verbose")
+        ufw_status = command_runner.getoutput("sudo ufw status verbose")
         if "Status: active" in ufw_status:
             return "UFW: [ACTIVE] with rules applied"
         else:
@@ -29,7 +29,7 @@ def check_vpn_usage():
     """Verifica si se está utilizando una VPN o mecanismos de seguridad de red."""
     try:
         # Verifica si hay interfaces de VPN activas
-        vpn_status = subprocess.getoutput("ip a | grep tun")
+        vpn_status = command_runner.getoutput("ip a | grep tun")
         if vpn_status:
             return "VPN: [Active VPN interface found]"
         else:
@@ -42,7 +42,7 @@ def check_ipsec_usage():
     """Verifica si se está utilizando IPSec para la seguridad de red."""
     try:
         # Comprobamos si hay túneles IPSec configurados
-        ipsec_status = subprocess.getoutput("ip xfrm state")
+        ipsec_status = command_runner.getoutput("ip xfrm state")
         if ipsec_status:
             return "IPSec: [Active IPSec configurations found]"
         else:
@@ -1,18 +1,19 @@
-import subprocess
 import json
+from utils import command_runner
+from utils import system_files
 
 def check_apache_security():
     """Verifica la configuración de seguridad de Apache."""
     try:
         # Verifica si el módulo SSL está habilitado en Apache
-        ssl_module = subprocess.getoutput("apachectl -M | grep ssl")
+        ssl_module = command_runner.getoutput("apachectl -M | grep ssl")
         if ssl_module:
             ssl_status = "SSL module enabled"
         else:
             ssl_status = "SSL module not enabled"
 
         # Verifica si Apache está escuchando en el puerto 443 (HTTPS)
-        ssl_port = subprocess.getoutput("ss -tuln | grep :443")
+        ssl_port = command_runner.getoutput("ss -tuln | grep :443")
         if ssl_port:
             ssl_status += " and listening on port 443"
         else:
@@ -27,7 +28,7 @@ def check_nginx_security():
     """Verifica la configuración de seguridad de Nginx."""
     try:
         # Verifica si Nginx tiene habilitado SSL en su configuración
-        ssl_config = subprocess.getoutput("grep ssl /etc/nginx/nginx.conf")
+        ssl_config = system_files.grep("/etc/nginx/nginx.conf", "ssl")
         if ssl_config:
             return "Nginx SSL/TLS is enabled"
         else:
@@ -40,14 +41,14 @@ def check_mysql_security():
     """Verifica la configuración de seguridad de MySQL."""
     try:
         # Verifica si MySQL tiene habilitada la opción de conexiones seguras
-        secure_connections = subprocess.getoutput("mysql -e 'SHOW VARIABLES LIKE \"have_openssl\";'")
+        secure_connections = command_runner.getoutput("mysql -e 'SHOW VARIABLES LIKE \"have_openssl\";'")
         if "YES" in secure_connections:
             ssl_status = "SSL enabled"
         else:
             ssl_status = "SSL not enabled"
 
         # Verifica si MySQL tiene configurado un usuario 'root' con acceso remoto
-        root_access = subprocess.getoutput("mysql -e 'SELECT host, user FROM mysql.user WHERE user=\"root\";'")
+        root_access = command_runner.getoutput("mysql -e 'SELECT host, user FROM mysql.user WHERE user=\"root\";'")
         if "localhost" in root_access:
             root_access_status = "Root access limited to localhost"
         else:
@@ -62,14 +63,14 @@ def check_postgresql_security():
     """Verifica la configuración de seguridad de PostgreSQL."""
     try:
         # Verifica si PostgreSQL tiene habilitada la opción de conexiones seguras (SSL)
-        ssl_status = subprocess.getoutput("psql -c 'SHOW ssl;'")
+        ssl_status = command_runner.getoutput("psql -c 'SHOW ssl;'")
         if "on" in ssl_status:
             ssl_status = "SSL enabled"
         else:
             ssl_status = "SSL not enabled"
 
         # Verifica si PostgreSQL tiene configurado un usuario 'postgres' con acceso remoto
-        remote_access = subprocess.getoutput("psql -c \"SELECT usename, host FROM pg_stat_activity WHERE usename='postgres';\"")
+        remote_access = command_runner.getoutput("psql -c \"SELECT usename, host FROM pg_stat_activity WHERE usename='postgres';\"")
         if "localhost" in remote_access:
             remote_access_status = "Postgres access limited to localhost"
         else:
@@ -88,7 +89,7 @@ def check_ssl_configurations():
         nginx_ssl = check_nginx_security()
 
         # Verifica la existencia de certificados SSL
-        ssl_certificates = subprocess.getoutput("ls /etc/ssl/certs")
+        ssl_certificates = system_files.list_dir("/etc/ssl/certs")
         if ssl_certificates:
             ssl_status = "SSL certificates found"
         else:
@@ -1,13 +1,22 @@
-import subprocess
 import os
 import json
+from utils import command_runner
+from utils import system_files
+from utils import paths
 
+# Crontabs de usuario (lo que muestra `crontab -l`) dentro del sistema auditado
+CRONTABS_DIR = "/var/spool/cron/crontabs"
 
 def check_backup_schedule():
     """Verifica si las copias de seguridad se realizan regularmente."""
     try:
         # Verificar si hay trabajos programados de copias de seguridad (por ejemplo, con cron)
-        cron_jobs = subprocess.getoutput("crontab -l")
+        if paths.is_live():
+            cron_jobs = command_runner.getoutput("crontab -l")
+        else:
+            # Sin el sistema en ejecución se leen las crontabs de usuario guardadas en la imagen
+            cron_jobs = "\n".join(line for user in system_files.list_dir(CRONTABS_DIR)
+                                  for line in system_files.read_lines(f"{CRONTABS_DIR}/{user}"))
         if cron_jobs:
             backup_jobs = [job for job in cron_jobs.splitlines() if 'backup' in job]
             if backup_jobs:
@@ -24,7 +33,7 @@ def check_backup_storage():
     try:
         # Reemplaza con la ruta de tu directorio de backups
         backup_dir = "/backup"  
-        if os.path.exists(backup_dir) and os.access(backup_dir, os.R_OK):
+        if system_files.exists(backup_dir) and os.access(paths.host_path(backup_dir), os.R_OK):
             return f"Backup directory found: {backup_dir}\nEnsure the backup directory is secure and properly configured."
         else:
             return f"Backup directory not found or not accessible at {backup_dir}.\nEnsure that the backup directory exists and is properly secured."
@@ -37,8 +46,8 @@ def check_backup_encryption():
         # Cambia la ruta según la ubicación de tus copias de seguridad cifradas
         backup_dir = "/backup"  
         # Verificar si las copias de seguridad cifradas están en el directorio (con extensión .gpg)
-        if os.path.exists(backup_dir):
-            encrypted_backups = subprocess.getoutput(f"ls {backup_dir} | grep '.gpg'")
+        if system_files.exists(backup_dir):
+            encrypted_backups = "\n".join(name for name in system_files.list_dir(backup_dir) if ".gpg" in name)
             if encrypted_backups:
                 return f"Encrypted backups found: {encrypted_backups}"
             else:
@@ -53,7 +62,7 @@ def check_restore_process():
     try:
         # Comprobar si el proceso de restauración está documentado o configurado (por ejemplo, un script de restauración)
         restore_script = "/usr/local/bin/restore_backup.sh"  # Ruta de un script de restauración
-        if os.path.exists(restore_script) and os.access(restore_script, os.X_OK):
+        if os.access(paths.host_path(restore_script), os.X_OK):
             return f"Backup restore script found: {restore_script}\nEnsure that the restore process is tested and documented."
         else:
             return "No backup restore script found.\nEnsure that a restore process is documented and tested for disaster recovery."
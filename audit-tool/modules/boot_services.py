@@ -1,20 +1,27 @@
-import subprocess
 import os
 import json
+from utils import async_runner
+from utils import system_files
+from utils import paths
 
 
-def check_service_manager():
+async def check_service_manager():
     """Verifica qué gestor de servicios está en uso."""
     try:
-        service_manager = subprocess.getoutput("ps -p 1 -o comm=")
+        if not paths.is_live():
+            return paths.RUNTIME_ONLY
+        service_manager = await async_runner.getoutput("ps", "-p", "1", "-o", "comm=")
         return service_manager if service_manager else "Not Found"
     except Exception as e:
         return f"Error al verificar el gestor de servicios: {str(e)}"
 
-def check_uefi_boot():
+async def check_uefi_boot():
     """Verifica si el sistema está utilizando UEFI."""
     try:
-        uefi_boot = subprocess.getoutput("ls /sys/firmware/efi")
+        # /sys/firmware/efi describe el arranque actual, no el de la imagen
+        if not paths.is_live():
+            return paths.RUNTIME_ONLY
+        uefi_boot = await async_runner.getoutput("ls", "/sys/firmware/efi")
         return "Found" if uefi_boot else "Not Found"
     except Exception as e:
         return f"Error al verificar UEFI boot: {str(e)}"
@@ -22,31 +29,34 @@ def check_uefi_boot():
 def check_grub2_presence():
     """Verifica si GRUB2 está presente en el sistema."""
     try:
-        grub_check = subprocess.getoutput("ls /boot/grub")
-        return "Found" if grub_check else "Not Found"
+        return "Found" if system_files.list_dir("/boot/grub") else "Not Found"
     except Exception as e:
         return f"Error al verificar GRUB2: {str(e)}"
 
 def check_password_protection():
     """Verifica si el sistema tiene protección por contraseña configurada."""
     try:
-        password_protection = subprocess.getoutput("grep -i password /etc/grub.d/40_custom")
+        password_protection = system_files.grep("/etc/grub.d/40_custom", "password", ignore_case=True)
         return "Found" if password_protection else "Not Found"
     except Exception as e:
         return f"Error al verificar protección por contraseña: {str(e)}"
 
-def check_running_services():
+async def check_running_services():
     """Verifica los servicios en ejecución."""
     try:
-        running_services = subprocess.getoutput("systemctl list-units --type=service --state=running")
+        if not paths.is_live():
+            return paths.RUNTIME_ONLY
+        running_services = await async_runner.getoutput("systemctl", "list-units", "--type=service", "--state=running")
         return len(running_services.split('\n')) - 1  # Restar la línea de encabezado
     except Exception as e:
         return f"Error al verificar servicios en ejecución: {str(e)}"
 
-def check_enabled_services_at_boot():
+async def check_enabled_services_at_boot():
     """Verifica los servicios habilitados para arrancar al inicio."""
     try:
-        enabled_services = subprocess.getoutput("systemctl list-unit-files --type=service --state=enabled")
+        # systemctl --root lee los enlaces de los unit files de la imagen sin systemd en ejecución
+        root_option = [f"--root={paths.root}"] if not paths.is_live() else []
+        enabled_services = await async_runner.getoutput("systemctl", *root_option, "list-unit-files", "--type=service", "--state=enabled")
         return len(enabled_services.split('\n')) - 1  # Restar la línea de encabezado
     except Exception as e:
         return f"Error al verificar servicios habilitados: {str(e)}"
@@ -54,15 +64,16 @@ def check_enabled_services_at_boot():
 def check_startup_files_permissions():
     """Verifica los permisos de los archivos de inicio."""
     try:
-        permissions = subprocess.getoutput("ls -l /etc/init.d")
-        return "OK" if permissions else "Not Found"
+        return "OK" if system_files.list_dir("/etc/init.d") else "Not Found"
     except Exception as e:
         return f"Error al verificar permisos de archivos de inicio: {str(e)}"
 
-def run_systemd_analyze_security():
+async def run_systemd_analyze_security():
     """Ejecuta systemd-analyze security para verificar la seguridad de los servicios."""
     try:
-        security_analysis = subprocess.getoutput("systemd-analyze security")
+        if not paths.is_live():
+            return paths.RUNTIME_ONLY
+        security_analysis = await async_runner.getoutput("systemd-analyze", "security")
         return security_analysis
     except Exception as e:
         return f"Error al ejecutar systemd-analyze security: {str(e)}"
@@ -71,14 +82,22 @@ def run():
     """Ejecuta todas las auditorías de arranque y servicios y devuelve los resultados."""
     print("[Boot and Services] Iniciando auditoría de arranque y servicios...")
 
-    service_manager = check_service_manager()
-    uefi_boot = check_uefi_boot()
+    # Las comprobaciones basadas en comandos se lanzan a la vez
+    checks = async_runner.run_checks({
+        "service_manager": check_service_manager(),
+        "uefi_boot": check_uefi_boot(),
+        "running_services": check_running_services(),
+        "enabled_services": check_enabled_services_at_boot(),
+        "security_analysis": run_systemd_analyze_security(),
+    })
+    service_manager = checks["service_manager"]
+    uefi_boot = checks["uefi_boot"]
     grub2_presence = check_grub2_presence()
     password_protection = check_password_protection()
-    running_services = check_running_services()
-    enabled_services = check_enabled_services_at_boot()
+    running_services = checks["running_services"]
+    enabled_services = checks["enabled_services"]
     startup_files_permissions = check_startup_files_permissions()
-    security_analysis = run_systemd_analyze_security()
+    security_analysis = checks["security_analysis"]
 
     print("\n---------------------------------------------------")
     print(f"- Service Manager: {service_manager}")
@@ -1,29 +1,42 @@
-import subprocess
 import json
+from utils import command_runner
+from utils import docker_api
 
 
 def check_docker_container_configuration():
-    """Verifica la configuración de los contenedores Docker."""
+    """Verifica la configuración de los contenedores Docker (API de Docker Engine por su socket)."""
     try:
-        # Comprobar contenedores en ejecución
-        containers_running = subprocess.getoutput("docker ps")
-        if "CONTAINER ID" in containers_running:
-            containers = containers_running.splitlines()[1:]  # Ignorar encabezado
-            container_info = []
-            for container in containers:
-                container_id = container.split()[0]
-                container_ports = subprocess.getoutput(f"docker port {container_id}")
-                container_resources = subprocess.getoutput(f"docker inspect {container_id} --format '{{{{.HostConfig.Memory}}}}")
-                
-                container_info.append({
-                    "container_id": container_id,
-                    "ports": container_ports,
-                    "memory_limit": container_resources
-                })
-            
+        if not docker_api.available():
+            return f"Docker socket not found: {docker_api.socket_path}"
+        # Una conexión persistente: el listado y luego las inspecciones encadenadas por lotes
+        with docker_api.DockerClient() as client:
+            containers = client.containers()
+            details = client.inspect_many([container["Id"] for container in containers])
+        container_info = []
+        for container, detail in zip(containers, details):
+            if detail is None:
+                # Eliminado entre el listado y la inspección
+                continue
+            host_config = detail.get("HostConfig") or {}
+            config = detail.get("Config") or {}
+            container_info.append({
+                "container_id": container["Id"][:12],
+                "name": (container.get("Names") or [""])[0].lstrip("/"),
+                "image": container.get("Image", ""),
+                "ports": docker_api.format_ports(container.get("Ports")),
+                "memory_limit": str(host_config.get("Memory", 0)),
+                "privileged": bool(host_config.get("Privileged")),
+                "user": config.get("User") or "root",
+                "readonly_rootfs": bool(host_config.get("ReadonlyRootfs")),
+                "network_mode": host_config.get("NetworkMode", ""),
+                "pid_mode": host_config.get("PidMode") or "private",
+                "cap_add": host_config.get("CapAdd") or [],
+            })
+
+        if container_info:
             return container_info
         else:
-            return "No Docker containers running."  
+            return "No Docker containers running."
     except Exception as e:
         return f"Error al verificar configuración de contenedores Docker: {str(e)}"
 
@@ -31,13 +44,13 @@ def check_lxc_container_configuration():
     """Verifica la configuración de los contenedores LXC."""
     try:
         # Comprobar contenedores LXC en ejecución
-        containers_running = subprocess.getoutput("lxc list")
+        containers_running = command_runner.getoutput("lxc list")
         if "NAME" in containers_running:
             containers = containers_running.splitlines()[1:]  # Ignorar encabezado
             container_info = []
             for container in containers:
                 container_name = container.split()[0]
-                container_config = subprocess.getoutput(f"lxc config show {container_name}")
+                container_config = command_runner.getoutput(f"lxc config show {container_name}")
                 container_info.append({
                     "container_name": container_name,
                     "config": container_config
@@ -53,7 +66,7 @@ def check_container_images_sources():
     """Verifica que las imágenes de contenedor provengan de fuentes confiables."""
     try:
         # Comprobar imágenes de Docker
-        docker_images = subprocess.getoutput("docker images")
+        docker_images = command_runner.getoutput("docker images")
         if "REPOSITORY" in docker_images:
             images = docker_images.splitlines()[1:]  # Ignorar encabezado
             untrusted_images = []
@@ -76,8 +89,11 @@ def check_container_vulnerabilities():
     """Verifica si las imágenes de contenedores tienen vulnerabilidades conocidas."""
     try:
         # Comprobar vulnerabilidades en las imágenes de Docker usando un escáner de vulnerabilidades
-        vulnerability_scan = subprocess.getoutput("docker scan --all")
-        if "Vulnerabilities found" in vulnerability_scan:
+        # Se lee en streaming y se deja de leer (cortando el escaneo) en la primera coincidencia
+        vulnerability_scan = command_runner.stream_lines("docker scan --all")
+        vulnerable = any("Vulnerabilities found" in line for line in vulnerability_scan)
+        vulnerability_scan.close()
+        if vulnerable:
             return "Vulnerabilities found in Docker images."
         else:
             return "No vulnerabilities found in Docker images."
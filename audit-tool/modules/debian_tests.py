@@ -1,22 +1,64 @@
-import subprocess
+import os
 import json
+from utils import command_runner
+from utils import system_files
+from utils import paths
+from utils import packages
+from utils import package_integrity
 
 def check_system_binaries():
-    """Verifica si los binarios necesarios existen en los directorios especificados."""
+    """Verifica si los binarios necesarios existen en los directorios especificados y si coinciden con sus paquetes."""
     directories = ['/bin', '/sbin', '/usr/bin', '/usr/sbin', '/usr/local/bin']
+    integrity_error = None
+    try:
+        integrity = package_integrity.scan()
+        altered = integrity["modified"] + integrity["missing"]
+    except Exception as e:
+        # Sin verificación no se puede afirmar que los binarios coincidan con sus paquetes
+        altered = []
+        integrity_error = f"Error al verificar la integridad de los paquetes: {str(e)}"
     results = {}
     for directory in directories:
         try:
-            result = subprocess.getoutput(f"ls {directory}")
-            results[directory] = "FOUND" if result else "NOT FOUND"
+            with os.scandir(paths.host_path(directory)) as entries:
+                results[directory] = "FOUND" if next(entries, None) is not None else "NOT FOUND"
+            if integrity_error:
+                if results[directory] == "FOUND":
+                    results[directory] += f" ({integrity_error})"
+                continue
+            # Archivos de paquetes de este directorio cuyo contenido no coincide con el MD5 de dpkg
+            changed = sum(os.path.dirname(entry["path"]) == directory for entry in altered)
+            if changed:
+                results[directory] += f" ({changed} files differ from their package)"
+        except FileNotFoundError:
+            results[directory] = "NOT FOUND"
         except Exception as e:
             results[directory] = f"Error: {str(e)}"
     return results
 
+def check_package_integrity():
+    """Verifica los archivos de los paquetes instalados con /var/lib/dpkg/info/*.md5sums (como debsums)."""
+    try:
+        integrity = package_integrity.scan()
+        limit = package_integrity.MAX_REPORTED_FILES
+        return {
+            "packages": integrity["packages"],
+            "files": integrity["files"],
+            "hashed": integrity["hashed"],
+            "unchanged": integrity["unchanged"],
+            "modified_count": len(integrity["modified"]),
+            "missing_count": len(integrity["missing"]),
+            "modified": integrity["modified"][:limit],
+            "missing": integrity["missing"][:limit],
+            "errors": integrity["errors"][:limit],
+        }
+    except Exception as e:
+        return f"Error al verificar la integridad de los paquetes: {str(e)}"
+
 def check_pam():
     """Verifica si el módulo PAM está instalado."""
     try:
-        pam_status = subprocess.getoutput("ls /etc/pam.d")
+        pam_status = system_files.list_dir("/etc/pam.d")
         return "FOUND" if pam_status else "NOT FOUND"
     except Exception as e:
         return f"Error al verificar PAM: {str(e)}"
@@ -24,7 +66,7 @@ def check_pam():
 def check_debian_tests():
     """Verifica la ejecución de pruebas de Debian y sus resultados."""
     try:
-        test_results = subprocess.getoutput("debian-tests")
+        test_results = command_runner.getoutput("debian-tests")
         # Suponiendo que `debian-tests` es un comando que realiza la prueba.
         if "DEB-0001" in test_results:
             return "Test executed successfully"
@@ -35,12 +77,11 @@ def check_debian_tests():
 
 def check_required_packages():
     """Verifica si los paquetes esenciales están instalados."""
-    packages = ['libpam-tmpdir', 'apt-listbugs', 'apt-listchanges', 'needrestart', 'fail2ban']
+    package_names = ['libpam-tmpdir', 'apt-listbugs', 'apt-listchanges', 'needrestart', 'fail2ban']
     results = {}
-    for package in packages:
+    for package in package_names:
         try:
-            check = subprocess.getoutput(f"dpkg -l | grep {package}")
-            results[package] = "Installed" if check else "Not Installed"
+            results[package] = "Installed" if packages.is_installed(package) else "Not Installed"
         except Exception as e:
             results[package] = f"Error: {str(e)}"
     return results
@@ -48,9 +89,9 @@ def check_required_packages():
 def check_filesystem_checks():
     """Verifica la instalación de herramientas de verificación del sistema de archivos."""
     try:
-        check_dmcrypt = subprocess.getoutput("which dmcrypt")
-        check_cryptsetup = subprocess.getoutput("which cryptsetup")
-        check_cryptmount = subprocess.getoutput("which cryptmount")
+        check_dmcrypt = system_files.find_executable("dmcrypt")
+        check_cryptsetup = system_files.find_executable("cryptsetup")
+        check_cryptmount = system_files.find_executable("cryptmount")
         
         return {
             "DM-Crypt": "Found" if check_dmcrypt else "Not Found",
@@ -65,6 +106,7 @@ def run():
     print("[Debian Tests] Iniciando prueba de Debian...")
 
     system_binaries = check_system_binaries()
+    integrity = check_package_integrity()
     pam_status = check_pam()
     debian_test_results = check_debian_tests()
     required_packages = check_required_packages()
@@ -75,6 +117,17 @@ def run():
     for directory, result in system_binaries.items():
         print(f"  - Checking {directory}: {result}")
     
+    print("[Package Integrity]")
+    if isinstance(integrity, dict):
+        print(f"  - {integrity['files']} files of {integrity['packages']} packages checked "
+              f"({integrity['hashed']} hashed, {integrity['unchanged']} unchanged since last audit)")
+        for entry in integrity["modified"]:
+            print(f"  - [MODIFIED] {entry['path']} ({entry['package']})")
+        for entry in integrity["missing"]:
+            print(f"  - [MISSING] {entry['path']} ({entry['package']})")
+    else:
+        print(f"  - {integrity}")
+
     print(f"- Authentication (PAM): {pam_status}")
     print(f"- Debian Tests: {debian_test_results}")
     
@@ -90,6 +143,7 @@ def run():
 
     return {
         "system_binaries": system_binaries,
+        "package_integrity": integrity,
         "pam_status": pam_status,
         "debian_test_results": debian_test_results,
         "required_packages": required_packages,
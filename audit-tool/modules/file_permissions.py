@@ -1,12 +1,17 @@
-import os
 import stat
 import json
+from utils import fs_scanner
+from utils import suid_index
+from utils import integrity_baseline
+
+# Número máximo de rutas que se incluyen en el informe por cada hallazgo
+MAX_REPORTED_PATHS = 50
 
 def check_file_permissions(file_path):
     """Verifica los permisos de un archivo y devuelve su estado."""
     try:
-        if os.path.exists(file_path):
-            file_stat = os.stat(file_path)
+        file_stat = fs_scanner.stat_path(file_path)
+        if file_stat is not None:
             permissions = stat.filemode(file_stat.st_mode)
             # Recomendación si el archivo no tiene permisos adecuados
             if file_path in ["/boot/grub/grub.cfg", "/etc/crontab", "/etc/group", "/etc/passwd"]:
@@ -21,8 +26,8 @@ def check_file_permissions(file_path):
 def check_directory_permissions(directory_path):
     """Verifica los permisos de un directorio y devuelve su estado."""
     try:
-        if os.path.isdir(directory_path):
-            dir_stat = os.stat(directory_path)
+        dir_stat = fs_scanner.stat_path(directory_path)
+        if dir_stat is not None and stat.S_ISDIR(dir_stat.st_mode):
             permissions = stat.filemode(dir_stat.st_mode)
             # Recomendación si el directorio no tiene permisos adecuados
             if directory_path in ["/root/.ssh", "/etc/cron.d"]:
@@ -34,6 +39,41 @@ def check_directory_permissions(directory_path):
     except Exception as e:
         return f"Error al verificar permisos del directorio {directory_path}: {str(e)}"
 
+def check_world_writable_files():
+    """Busca archivos y directorios (sin sticky bit) con escritura global."""
+    try:
+        scan = suid_index.scan()
+        paths = scan["world_writable_files"] + scan["world_writable_dirs"]
+        return {"count": len(paths), "paths": paths[:MAX_REPORTED_PATHS]}
+    except Exception as e:
+        return f"Error al buscar archivos con escritura global: {str(e)}"
+
+def check_unowned_files():
+    """Busca archivos cuyo UID o GID no existe en el sistema."""
+    try:
+        paths = suid_index.scan()["unowned"]
+        return {"count": len(paths), "paths": paths[:MAX_REPORTED_PATHS]}
+    except Exception as e:
+        return f"Error al buscar archivos sin propietario: {str(e)}"
+
+def check_integrity_baseline():
+    """Compara los árboles de la línea base de integridad (/etc, /boot...) con la auditoría anterior."""
+    try:
+        scan = integrity_baseline.scan()
+        return {
+            "trees": scan["trees"],
+            "files": scan["files"],
+            "hashed": scan["hashed"],
+            "baseline_created": scan["baseline_created"],
+            "added": scan["added"][:MAX_REPORTED_PATHS],
+            "removed": scan["removed"][:MAX_REPORTED_PATHS],
+            "changed": scan["changed"][:MAX_REPORTED_PATHS],
+            "counts": {kind: len(scan[kind]) for kind in ("added", "removed", "changed")},
+            "errors": len(scan["errors"]),
+        }
+    except Exception as e:
+        return f"Error al comparar la línea base de integridad: {str(e)}"
+
 def run():
     """Ejecuta todas las comprobaciones de permisos de archivos y directorios."""
     print("[File Permissions] Iniciando comprobación de permisos de archivos y directorios...")
@@ -49,21 +89,54 @@ def run():
         "/root/.ssh", "/etc/cron.d", "/etc/cron.daily", "/etc/cron.hourly", "/etc/cron.weekly", "/etc/cron.monthly"
     ]
     
+    # Línea base de integridad: qué ha cambiado desde la auditoría anterior
+    integrity = check_integrity_baseline()
+    changed = set()
+    if isinstance(integrity, dict):
+        # Las marcas salen del resultado completo (ya calculado); el informe solo lleva MAX_REPORTED_PATHS rutas
+        scan = integrity_baseline.scan()
+        changed = {entry["path"] for entry in scan["changed"]} | set(scan["added"]) | set(scan["removed"])
+
     # Comprobación de archivos
     for file in files_to_check:
         result = check_file_permissions(file)
+        if file in changed:
+            result += " [CHANGED since last audit]"
         print(f"File: {file} - {result}")
     
     # Comprobación de directorios
     for directory in directories_to_check:
         result = check_directory_permissions(directory)
+        if any(path.startswith(f"{directory}/") for path in changed):
+            result += " [CONTENTS CHANGED since last audit]"
         print(f"Directory: {directory} - {result}")
 
+    # Archivos con escritura global y sin propietario (índice incremental compartido con sudo)
+    world_writable = check_world_writable_files()
+    unowned = check_unowned_files()
+    print(f"World writable files: {world_writable['count'] if isinstance(world_writable, dict) else world_writable}")
+    print(f"Unowned files: {unowned['count'] if isinstance(unowned, dict) else unowned}")
+
+    if isinstance(integrity, dict):
+        if integrity["baseline_created"]:
+            print(f"Integrity baseline: created ({integrity['files']} files in {', '.join(integrity['trees'])})")
+        else:
+            counts = integrity["counts"]
+            print(f"Integrity baseline: {counts['added']} added, {counts['removed']} removed, {counts['changed']} changed "
+                  f"({integrity['files']} files, {integrity['hashed']} hashed)")
+            for entry in integrity["changed"]:
+                print(f"  - [CHANGED] {entry['path']} ({', '.join(entry['fields'])})")
+    else:
+        print(integrity)
+
     print("---------------------------------------------------\n")
 
     return {
         "file_permissions": files_to_check,
-        "directory_permissions": directories_to_check
+        "directory_permissions": directories_to_check,
+        "world_writable_files": world_writable,
+        "unowned_files": unowned,
+        "integrity_baseline": integrity,
     }
 
 if __name__ == "__main__":
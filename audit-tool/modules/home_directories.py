@@ -1,21 +1,22 @@
 import os
 import stat
-import pwd
 import json
+from utils import system_files
+from utils import home_scanner
 
 def check_home_directory_permissions():
     """Verifica los permisos de los directorios de inicio de los usuarios."""
     try:
-        home_dirs = [f"/home/{user}" for user in os.listdir('/home') if os.path.isdir(f"/home/{user}")]
         permissions = {}
         
-        for home in home_dirs:
-            home_stat = os.stat(home)
-            perm = stat.filemode(home_stat.st_mode)
-            if perm == "-rwx------":  # Verifica que los permisos sean correctos (700)
-                permissions[home] = f"{perm} [OK]"
+        for home in home_scanner.scan():
+            if not home["exists"]:
+                continue
+            perm = stat.filemode(home["mode"])
+            if stat.S_IMODE(home["mode"]) & 0o077 == 0:  # Verifica que los permisos sean correctos (700)
+                permissions[home["home"]] = f"{perm} [OK]"
             else:
-                permissions[home] = f"{perm} [SUGGESTION]"
+                permissions[home["home"]] = f"{perm} [SUGGESTION]"
         
         return permissions
     except Exception as e:
@@ -24,16 +25,17 @@ def check_home_directory_permissions():
 def check_home_directory_ownership():
     """Verifica que el propietario de los directorios de inicio sea el usuario correcto."""
     try:
-        home_dirs = [f"/home/{user}" for user in os.listdir('/home') if os.path.isdir(f"/home/{user}")]
+        owners = system_files.user_names()
         ownership = {}
         
-        for home in home_dirs:
-            stat_info = os.stat(home)
-            user_name = pwd.getpwuid(stat_info.st_uid).pw_name
-            if user_name == os.path.basename(home):  # El propietario debe coincidir con el nombre del directorio
-                ownership[home] = f"Owner: {user_name} [OK]"
+        for home in home_scanner.scan():
+            if not home["exists"]:
+                continue
+            user_name = owners.get(home["owner_uid"], str(home["owner_uid"]))
+            if user_name == home["user"]:  # El propietario debe ser la cuenta a la que pertenece el home
+                ownership[home["home"]] = f"Owner: {user_name} [OK]"
             else:
-                ownership[home] = f"Owner: {user_name} [SUGGESTION]"
+                ownership[home["home"]] = f"Owner: {user_name} [SUGGESTION]"
         
         return ownership
     except Exception as e:
@@ -42,33 +44,58 @@ def check_home_directory_ownership():
 def check_shell_history_files():
     """Verifica la existencia y permisos de los archivos de historial de shell."""
     try:
-        home_dirs = [f"/home/{user}" for user in os.listdir('/home') if os.path.isdir(f"/home/{user}")]
         history_files = {}
         
-        for home in home_dirs:
-            bash_history = os.path.join(home, ".bash_history")
-            zsh_history = os.path.join(home, ".zsh_history")
-            history_permissions = "OK"
-            
-            # Comprobar si los archivos existen y sus permisos
-            if os.path.exists(bash_history):
-                bash_stat = os.stat(bash_history)
-                bash_perm = stat.filemode(bash_stat.st_mode)
-                if bash_perm != "-rw-------":  # Permisos 600 recomendados
-                    history_permissions = "SUGGESTION"
-                history_files[bash_history] = f"{bash_perm} [OK]" if history_permissions == "OK" else f"{bash_perm} [SUGGESTION]"
-            
-            if os.path.exists(zsh_history):
-                zsh_stat = os.stat(zsh_history)
-                zsh_perm = stat.filemode(zsh_stat.st_mode)
-                if zsh_perm != "-rw-------":  # Permisos 600 recomendados
-                    history_permissions = "SUGGESTION"
-                history_files[zsh_history] = f"{zsh_perm} [OK]" if history_permissions == "OK" else f"{zsh_perm} [SUGGESTION]"
+        for home in home_scanner.scan():
+            for path, entry in home["history"].items():
+                # Permisos 600 recomendados
+                status = "OK" if entry["perm"] & 0o077 == 0 else "SUGGESTION"
+                history_files[path] = f"{entry['mode']} [{status}]"
 
         return history_files
     except Exception as e:
         return f"Error al verificar archivos de historial de shell: {str(e)}"
 
+def check_ssh_key_files():
+    """Verifica los permisos y el propietario de ~/.ssh y de las claves de cada usuario."""
+    try:
+        ssh_files = {}
+
+        for home in home_scanner.scan():
+            if home["ssh_dir"] is not None:
+                ssh_dir = home["ssh_dir"]
+                status = "OK" if ssh_dir["perm"] & 0o077 == 0 else "SUGGESTION"
+                ssh_files[f"{home['home'].rstrip('/')}/.ssh"] = f"{ssh_dir['mode']} [{status}]"
+            for path, entry in home["ssh"].items():
+                name = os.path.basename(path)
+                if name.startswith("id_") and not name.endswith(".pub"):
+                    # Claves privadas: solo legibles por el usuario
+                    secure = entry["perm"] & 0o077 == 0
+                else:
+                    # authorized_keys, known_hosts, config y claves públicas: nadie más puede escribirlos
+                    secure = entry["perm"] & 0o022 == 0
+                if home["uid"] is not None and entry["uid"] not in (home["uid"], 0):
+                    secure = False
+                ssh_files[path] = f"{entry['mode']} [{'OK' if secure else 'WARNING'}]"
+
+        return ssh_files
+    except Exception as e:
+        return f"Error al verificar las claves SSH: {str(e)}"
+
+def check_dotfiles():
+    """Busca dotfiles que otros usuarios pueden modificar y archivos de confianza (.rhosts, .netrc...)."""
+    try:
+        writable = []
+        dangerous = []
+
+        for home in home_scanner.scan():
+            writable.extend(home["writable_dotfiles"])
+            dangerous.extend(home["dangerous"])
+
+        return {"writable_by_others": sorted(writable), "trust_files": sorted(dangerous)}
+    except Exception as e:
+        return f"Error al verificar los dotfiles: {str(e)}"
+
 def run():
     """Ejecuta todas las auditorías de directorios de inicio y devuelve los resultados."""
     print("[Home Directories] Iniciando auditoría de directorios de inicio...")
@@ -76,26 +103,41 @@ def run():
     home_permissions = check_home_directory_permissions()
     home_ownership = check_home_directory_ownership()
     history_files = check_shell_history_files()
+    ssh_files = check_ssh_key_files()
+    dotfiles = check_dotfiles()
 
     print("\n---------------------------------------------------")
-    print("[Permissions of Home Directories]")
-    for directory, permission in home_permissions.items():
-        print(f"  - {directory}: {permission}")
-    
-    print("[Ownership of Home Directories]")
-    for directory, owner in home_ownership.items():
-        print(f"  - {directory}: {owner}")
-    
-    print("[Checking Shell History Files]")
-    for file, permission in history_files.items():
-        print(f"  - {file}: {permission}")
+    sections = [
+        ("[Permissions of Home Directories]", home_permissions),
+        ("[Ownership of Home Directories]", home_ownership),
+        ("[Checking Shell History Files]", history_files),
+        ("[Checking SSH Directories and Keys]", ssh_files),
+    ]
+    for title, entries in sections:
+        print(title)
+        if isinstance(entries, dict):
+            for path, status in entries.items():
+                print(f"  - {path}: {status}")
+        else:
+            print(f"  {entries}")
+
+    print("[Checking Dotfiles]")
+    if isinstance(dotfiles, dict):
+        for file in dotfiles["writable_by_others"]:
+            print(f"  - {file}: writable by group/others [WARNING]")
+        for file in dotfiles["trust_files"]:
+            print(f"  - {file}: trust/credential file present [WARNING]")
+    else:
+        print(f"  {dotfiles}")
     
     print("---------------------------------------------------\n")
 
     return {
         "home_permissions": home_permissions,
         "home_ownership": home_ownership,
-        "history_files": history_files
+        "history_files": history_files,
+        "ssh_files": ssh_files,
+        "dotfiles": dotfiles
     }
 
 if __name__ == "__main__":
@@ -1,19 +1,27 @@
-import subprocess
+import os
 import json
+from utils import command_runner
+from utils import system_files
+from utils import sysctl
+from utils import apt_index
+from utils import paths
 
 def get_kernel_version():
     """Obtiene la versión del kernel del sistema."""
     try:
-        return subprocess.getoutput("uname -r")
+        if not paths.is_live():
+            # Una imagen no tiene kernel en ejecución: se informan los instalados en /boot
+            versions = [name[len("vmlinuz-"):] for name in system_files.list_dir("/boot") if name.startswith("vmlinuz-")]
+            return f"Installed: {', '.join(versions)}" if versions else "Not Found"
+        return os.uname().release
     except Exception as e:
         return f"Error al obtener la versión del kernel: {str(e)}"
 
 def check_aslr():
     """Verifica si ASLR (Address Space Layout Randomization) está habilitado."""
     try:
-        with open("/proc/sys/kernel/randomize_va_space") as f:
-            aslr_value = f.read().strip()
-        return "Habilitado" if aslr_value == "2" else "Deshabilitado"
+        aslr_value = sysctl.get("kernel.randomize_va_space")
+        return "Habilitado" if aslr_value == 2 else "Deshabilitado"
     except Exception as e:
         return f"Error al verificar ASLR: {str(e)}"
 
@@ -27,7 +35,7 @@ def check_kernel_parameters():
     results = {}
     for param, desc in params.items():
         try:
-            value = subprocess.getoutput(f"sysctl -n {param}")
+            value = sysctl.get(param, "Not Found")
             results[param] = {"value": value, "description": desc}
         except Exception as e:
             results[param] = {"error": str(e)}
@@ -36,7 +44,9 @@ def check_kernel_parameters():
 def check_kernel_modules():
     """Lista módulos del kernel cargados y revisa si hay módulos peligrosos activos."""
     try:
-        modules = subprocess.getoutput("lsmod").split('\n')[1:]
+        if not paths.is_live():
+            return {"loaded_modules": [], "flagged_modules": paths.RUNTIME_ONLY}
+        modules = command_runner.getoutput("lsmod").split('\n')[1:]
         dangerous_modules = ["usb_storage", "firewire_core", "nfs", "cramfs", "jffs2"]
         loaded_modules = []
         flagged_modules = []
@@ -64,7 +74,7 @@ def check_kernel_hardening():
     results = {}
     for param, desc in checks.items():
         try:
-            value = subprocess.getoutput(f"sysctl -n {param}")
+            value = sysctl.get(param, "Not Found")
             results[param] = {"value": value, "description": desc}
         except Exception as e:
             results[param] = {"error": str(e)}
@@ -75,7 +85,9 @@ def check_kernel_hardening():
 def check_runlevel():
     """Verifica el nivel de ejecución predeterminado."""
     try:
-        runlevel = subprocess.getoutput("runlevel")
+        if not paths.is_live():
+            return paths.RUNTIME_ONLY
+        runlevel = command_runner.getoutput("runlevel")
         return f"Runlevel: {runlevel.split()[1]}" if runlevel else "No se pudo obtener el runlevel"
     except Exception as e:
         return f"Error al obtener el runlevel: {str(e)}"
@@ -83,9 +95,11 @@ def check_runlevel():
 def check_cpu_support():
     """Verifica si la CPU soporta NX/PAE."""
     try:
-        cpu_info = subprocess.getoutput("cat /proc/cpuinfo")
-        nx_support = "NX" if "nx" in cpu_info.lower() else "No NX support"
-        pae_support = "PAE" if "pae" in cpu_info.lower() else "No PAE support"
+        if not paths.is_live():
+            return paths.RUNTIME_ONLY
+        flags = system_files.cpu_flags()
+        nx_support = "NX" if "nx" in flags else "No NX support"
+        pae_support = "PAE" if "pae" in flags else "No PAE support"
         return f"CPU Support: {nx_support}, {pae_support}"
     except Exception as e:
         return f"Error al verificar soporte de CPU: {str(e)}"
@@ -93,7 +107,9 @@ def check_cpu_support():
 def check_kernel_type():
     """Verifica el tipo de kernel."""
     try:
-        kernel_type = subprocess.getoutput("uname -s")
+        if not paths.is_live():
+            return paths.RUNTIME_ONLY
+        kernel_type = os.uname().sysname
         return f"Kernel Type: {kernel_type}"
     except Exception as e:
         return f"Error al obtener el tipo de kernel: {str(e)}"
@@ -101,23 +117,27 @@ def check_kernel_type():
 def check_io_scheduler():
     """Verifica el planificador de I/O por defecto."""
     try:
-        scheduler = subprocess.getoutput("cat /sys/block/sda/queue/scheduler")
-        return f"Default I/O Scheduler: {scheduler}"
+        if not paths.is_live():
+            return paths.RUNTIME_ONLY
+        active, available = system_files.read_io_scheduler("sda")
+        if active is None:
+            return "Default I/O Scheduler: Not Found"
+        return f"Default I/O Scheduler: {active} (available: {', '.join(available)})"
     except Exception as e:
         return f"Error al verificar el planificador de I/O: {str(e)}"
 
 def check_kernel_updates():
     """Verifica si hay actualizaciones disponibles para el kernel."""
     try:
-        updates = subprocess.getoutput("apt list --upgradable")
-        return "Kernel updates available" if "linux-image" in updates else "No kernel updates"
+        updates = apt_index.upgradable()
+        return "Kernel updates available" if any(name.startswith("linux-image") for name in updates) else "No kernel updates"
     except Exception as e:
         return f"Error al verificar actualizaciones del kernel: {str(e)}"
 
 def check_core_dumps():
     """Verifica la configuración de los volúmenes de núcleo (core dumps)."""
     try:
-        limits_conf = subprocess.getoutput("grep hard /etc/security/limits.conf")
+        limits_conf = "\n".join(system_files.grep("/etc/security/limits.conf", "hard", skip_comments=True))
         return f"Core Dumps: {limits_conf}" if limits_conf else "No se encontraron configuraciones de core dumps"
     except Exception as e:
         return f"Error al verificar core dumps: {str(e)}"
@@ -125,7 +145,7 @@ def check_core_dumps():
 def check_reboot_needed():
     """Verifica si se necesita reiniciar el sistema."""
     try:
-        reboot_needed = subprocess.getoutput("cat /var/run/reboot-required")
+        reboot_needed = system_files.exists("/var/run/reboot-required")
         return "Reboot is required" if reboot_needed else "No reboot required"
     except Exception as e:
         return f"Error al verificar si se necesita reiniciar: {str(e)}"
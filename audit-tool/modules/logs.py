@@ -1,12 +1,29 @@
 import os
-import subprocess
 import time
 import json
+from collections import Counter
+from utils import paths
+from utils import journal
+from utils import logins
+from utils import log_analyzer
+
+# Usuarios con más intentos fallidos que se muestran en el informe
+MAX_REPORTED_USERS = 10
+
+# Logs de autenticación que se analizan junto con sus rotaciones (.1, .2.gz...)
+ANALYZED_LOGS = ["/var/log/auth.log", "/var/log/secure", "/var/log/syslog", "/var/log/messages"]
+
+# Programas cuyos mensajes del journal se analizan como los de auth.log
+JOURNAL_AUTH_IDENTIFIERS = ["sshd", "sshd-session", "sudo", "su", "login"]
+
+# Ventanas del journal: errores recientes y análisis de autenticación
+JOURNAL_ERROR_HOURS = 24
+JOURNAL_AUTH_DAYS = 7
 
 def check_log_file_exists(log_file):
     """Verifica si un archivo de log existe."""
     try:
-        if os.path.exists(log_file):
+        if os.path.exists(paths.host_path(log_file)):
             return f"{log_file}: [FOUND]"
         else:
             return f"{log_file}: [NOT FOUND]"
@@ -16,8 +33,9 @@ def check_log_file_exists(log_file):
 def check_log_integrity(log_file):
     """Verifica la integridad de un archivo de log (no debe estar vacío)."""
     try:
-        if os.path.exists(log_file):
-            if os.path.getsize(log_file) > 0:
+        path = paths.host_path(log_file)
+        if os.path.exists(path):
+            if os.path.getsize(path) > 0:
                 return f"{log_file}: [OK]"
             else:
                 return f"{log_file}: [EMPTY]"
@@ -30,7 +48,7 @@ def check_log_rotation():
     """Verifica la configuración de rotación de logs en /etc/logrotate.d/."""
     try:
         logrotate_conf = "/etc/logrotate.d/"
-        files = os.listdir(logrotate_conf)
+        files = os.listdir(paths.host_path(logrotate_conf))
         if files:
             return f"Log rotation configuration: [FOUND] in {logrotate_conf}"
         else:
@@ -41,8 +59,9 @@ def check_log_rotation():
 def check_old_logs(log_file, days_threshold=30):
     """Verifica si los logs son antiguos (más de 30 días por defecto)."""
     try:
-        if os.path.exists(log_file):
-            file_mod_time = os.path.getmtime(log_file)
+        path = paths.host_path(log_file)
+        if os.path.exists(path):
+            file_mod_time = os.path.getmtime(path)
             days_old = (time.time() - file_mod_time) / (60 * 60 * 24)
             if days_old > days_threshold:
                 return f"{log_file}: [OLD] ({days_old:.2f} days)"
@@ -53,6 +72,54 @@ def check_old_logs(log_file, days_threshold=30):
     except Exception as e:
         return f"Error al verificar la antigüedad de {log_file}: {str(e)}"
 
+def check_failed_login_records():
+    """Resume los intentos de inicio de sesión fallidos registrados en /var/log/btmp."""
+    try:
+        failures = logins.failed_logins()
+        total = sum(entry["count"] for entry in failures.values())
+        top_users = sorted(failures.items(), key=lambda item: item[1]["count"], reverse=True)[:MAX_REPORTED_USERS]
+        return {
+            "total": total,
+            "users": len(failures),
+            "top_users": {user: entry for user, entry in top_users},
+        }
+    except Exception as e:
+        return f"Error al leer los inicios de sesión fallidos: {str(e)}"
+
+def check_log_analysis():
+    """Analiza auth.log/syslog (y sus rotaciones): inicios de sesión fallidos, uso de sudo y fuerza bruta."""
+    try:
+        stats, files = log_analyzer.analyze(ANALYZED_LOGS)
+        analysis = stats.to_dict()
+        # En modo incremental los contadores cubren solo lo escrito desde la auditoría anterior
+        analysis["incremental"] = log_analyzer.incremental
+        analysis["files"] = files
+        return analysis
+    except Exception as e:
+        return f"Error al analizar los logs: {str(e)}"
+
+def check_journal():
+    """Analiza el journal de systemd sin journalctl: errores recientes por unidad y autenticación."""
+    try:
+        files = journal.journal_files()
+        if not files:
+            return {"files": 0}
+        now = time.time()
+        # Prioridad <= 3 (emerg, alert, crit, err) en las últimas JOURNAL_ERROR_HOURS horas
+        errors = Counter(entry.get("_SYSTEMD_UNIT") or entry.get("SYSLOG_IDENTIFIER", "unknown")
+                         for entry in journal.read_entries(priority=3, since=now - JOURNAL_ERROR_HOURS * 3600))
+        auth_entries = journal.read_entries(matches={"SYSLOG_IDENTIFIER": JOURNAL_AUTH_IDENTIFIERS},
+                                            since=now - JOURNAL_AUTH_DAYS * 86400)
+        analysis = log_analyzer.analyze_journal(auth_entries).to_dict()
+        return {
+            "files": len(files),
+            "errors": sum(errors.values()),
+            "errors_by_unit": dict(errors.most_common(MAX_REPORTED_USERS)),
+            "auth_analysis": analysis,
+        }
+    except Exception as e:
+        return f"Error al analizar el journal: {str(e)}"
+
 def run():
     """Ejecuta todas las auditorías de los logs y devuelve los resultados."""
     print("[Logs] Iniciando auditoría de logs...")
@@ -67,12 +134,49 @@ def run():
     
     # Verificación de la configuración de rotación de logs
     print(check_log_rotation())
+
+    # Análisis del contenido de los logs de autenticación
+    log_analysis = check_log_analysis()
+    if isinstance(log_analysis, dict):
+        scope = "new since previous audit" if log_analysis["incremental"] else "full"
+        print(f"Log analysis: {len(log_analysis['files'])} files, {log_analysis['bytes_analyzed']} bytes ({scope})")
+        print(f"  - Failed SSH logins: {log_analysis['failed_logins']}")
+        print(f"  - Sudo commands: {log_analysis['sudo_commands']} ({len(log_analysis['sudo_failures'])} failures)")
+        for ip, entry in log_analysis["brute_force"].items():
+            status = "[ALERT] successful login afterwards" if entry["successful_login"] else "[WARNING]"
+            print(f"  - Possible brute force from {ip}: {entry['failures']} failures {status}")
+    else:
+        print(log_analysis)
+
+    # Intentos de inicio de sesión fallidos (btmp)
+    failed_logins = check_failed_login_records()
+    if isinstance(failed_logins, dict):
+        print(f"Failed login records: {failed_logins['total']} attempts for {failed_logins['users']} users")
+    else:
+        print(failed_logins)
+
+    # Journal de systemd (en muchos sistemas no hay auth.log ni syslog)
+    journal_status = check_journal()
+    if isinstance(journal_status, dict):
+        if journal_status["files"]:
+            print(f"Journal: {journal_status['files']} files, {journal_status['errors']} errors in the last {JOURNAL_ERROR_HOURS}h")
+            for unit, count in journal_status["errors_by_unit"].items():
+                print(f"  - {unit}: {count} errors")
+            auth_analysis = journal_status["auth_analysis"]
+            print(f"  - Failed SSH logins: {auth_analysis['failed_logins']}, sudo commands: {auth_analysis['sudo_commands']}")
+        else:
+            print("Journal: [NOT FOUND]")
+    else:
+        print(journal_status)
     
     print("---------------------------------------------------\n")
 
     return {
         "log_files": log_files,
         "log_rotation_status": check_log_rotation(),
+        "failed_logins": failed_logins,
+        "log_analysis": log_analysis,
+        "journal": journal_status,
     }
 
 if __name__ == "__main__":
@@ -1,20 +1,36 @@
-import subprocess
 import json
+from utils import command_runner
+
+# Palabras que marcan una línea relevante en la salida de los escáneres
+ROOTKIT_ALERT_MARKERS = ("INFECTED", "Warning", "suspicious", "Possible")
+
+def scan_for_alerts(command):
+    """Ejecuta un escáner leyendo su salida en streaming y guarda solo las alertas."""
+    execution = {}
+    alerts = [line.strip() for line in command_runner.stream_lines(command, execution=execution)
+              if any(marker in line for marker in ROOTKIT_ALERT_MARKERS)]
+    if execution["timed_out"]:
+        alerts.append(f"[TIMEOUT] {command} no terminó en {execution['wall_time']} s")
+    return alerts
 
 def check_rootkit_scan():
     """Realiza un escaneo de rootkits usando chkrootkit o rkhunter."""
     try:
         # Verificar si chkrootkit está instalado y realizar un escaneo
-        chkrootkit_status = subprocess.getoutput("which chkrootkit")
+        chkrootkit_status = command_runner.getoutput("which chkrootkit")
         if chkrootkit_status:
-            chkrootkit_scan = subprocess.getoutput("sudo chkrootkit")
-            return f"Chkrootkit scan results:\n{chkrootkit_scan}"
+            chkrootkit_alerts = scan_for_alerts("sudo chkrootkit")
+            if chkrootkit_alerts:
+                return "Chkrootkit scan results:\n" + "\n".join(chkrootkit_alerts)
+            return "Chkrootkit scan results: nothing found"
         else:
             # Si chkrootkit no está instalado, intentar rkhunter
-            rkhunter_status = subprocess.getoutput("which rkhunter")
+            rkhunter_status = command_runner.getoutput("which rkhunter")
             if rkhunter_status:
-                rkhunter_scan = subprocess.getoutput("sudo rkhunter --check")
-                return f"Rkhunter scan results:\n{rkhunter_scan}"
+                rkhunter_alerts = scan_for_alerts("sudo rkhunter --check --skip-keypress")
+                if rkhunter_alerts:
+                    return "Rkhunter scan results:\n" + "\n".join(rkhunter_alerts)
+                return "Rkhunter scan results: no warnings found"
             else:
                 return "No rootkit scanner found. Consider installing chkrootkit or rkhunter for rootkit detection."
     except Exception as e:
@@ -24,17 +40,17 @@ def check_antivirus_status():
     """Verifica la configuración de herramientas antivirus, si están disponibles."""
     try:
         # Verificar si ClamAV está instalado
-        clamav_status = subprocess.getoutput("which clamscan")
+        clamav_status = command_runner.getoutput("which clamscan")
         if clamav_status:
-            clamav_version = subprocess.getoutput("clamscan --version")
+            clamav_version = command_runner.getoutput("clamscan --version")
             return f"ClamAV is installed. Version:\n{clamav_version}"
         else:
             return "ClamAV not installed. Consider installing it for malware protection."
 
         # Alternativamente, verificar Sophos (si está instalado)
-        sophos_status = subprocess.getoutput("which savscan")
+        sophos_status = command_runner.getoutput("which savscan")
         if sophos_status:
-            sophos_version = subprocess.getoutput("savscan --version")
+            sophos_version = command_runner.getoutput("savscan --version")
             return f"Sophos Antivirus is installed. Version:\n{sophos_version}"
         else:
             return "Sophos Antivirus not installed. Consider installing it for malware protection."
@@ -45,7 +61,7 @@ def check_suspicious_memory_behaviors():
     """Analiza la memoria en busca de comportamientos sospechosos."""
     try:
         # Verificar procesos sospechosos en la memoria
-        suspicious_processes = subprocess.getoutput("ps aux --sort=-%cpu | head -n 10")
+        suspicious_processes = command_runner.getoutput("ps aux --sort=-%cpu | head -n 10")
         if suspicious_processes:
             return f"Suspicious processes (Top 10 CPU consuming):\n{suspicious_processes}"
         else:
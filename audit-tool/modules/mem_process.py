@@ -1,10 +1,11 @@
-import subprocess
 import json
+from utils import command_runner
+from utils import system_files
 
 def check_meminfo():
     """Verifica el archivo /proc/meminfo."""
     try:
-        meminfo = subprocess.getoutput("cat /proc/meminfo")
+        meminfo = system_files.read_meminfo()
         return "Found" if meminfo else "Not Found"
     except Exception as e:
         return f"Error al verificar /proc/meminfo: {str(e)}"
@@ -12,7 +13,7 @@ def check_meminfo():
 def check_dead_zombie_processes():
     """Busca procesos muertos/zombie."""
     try:
-        zombie_processes = subprocess.getoutput("ps aux | grep 'Z'")
+        zombie_processes = command_runner.getoutput("ps aux | grep 'Z'")
         return "Found" if zombie_processes else "Not Found"
     except Exception as e:
         return f"Error al buscar procesos zombie: {str(e)}"
@@ -20,7 +21,7 @@ def check_dead_zombie_processes():
 def check_io_waiting_processes():
     """Busca procesos en espera de I/O."""
     try:
-        io_waiting = subprocess.getoutput("ps aux | awk '$8 == \"D\"'")
+        io_waiting = command_runner.getoutput("ps aux | awk '$8 == \"D\"'")
         return "Found" if io_waiting else "Not Found"
     except Exception as e:
         return f"Error al buscar procesos en espera de I/O: {str(e)}"
@@ -28,7 +29,7 @@ def check_io_waiting_processes():
 def check_prelink_tooling():
     """Busca si la herramienta prelink está instalada."""
     try:
-        prelink = subprocess.getoutput("which prelink")
+        prelink = command_runner.getoutput("which prelink")
         return "Found" if prelink else "Not Found"
     except Exception as e:
         return f"Error al verificar la herramienta prelink: {str(e)}"
@@ -1,11 +1,13 @@
-import subprocess
 import json
+from utils import async_runner
+from utils import system_files
+from utils import sysctl
 
 def check_ipv6_configuration():
     """Verifica la configuración de IPv6."""
     try:
-        ipv6_status = subprocess.getoutput("sysctl net.ipv6.conf.all.disable_ipv6")
-        return "Enabled" if "0" in ipv6_status else "Disabled"
+        ipv6_status = sysctl.get("net.ipv6.conf.all.disable_ipv6")
+        return "Enabled" if ipv6_status == 0 else "Disabled"
     except Exception as e:
         return f"Error al verificar configuración de IPv6: {str(e)}"
 
@@ -13,74 +15,75 @@ def check_dns_servers():
     """Verifica los servidores DNS configurados."""
     try:
         # Extract only the nameservers from /etc/resolv.conf
-        dns_servers = subprocess.getoutput("grep -i 'nameserver' /etc/resolv.conf")
+        dns_servers = system_files.read_resolv_nameservers()
         if dns_servers:
-            return "OK", dns_servers.strip()
+            return "OK", ", ".join(dns_servers)
         else:
             return "Not Found", None
     except Exception as e:
         return f"Error al verificar servidores DNS: {str(e)}", None
 
-def check_dnssec_support():
+async def check_dnssec_support():
     """Verifica si DNSSEC está habilitado."""
     try:
-        dnssec_status = subprocess.getoutput("systemctl is-active systemd-resolved")
+        dnssec_status = await async_runner.getoutput("systemctl", "is-active", "systemd-resolved")
         return "Enabled" if "active" in dnssec_status else "Unknown"
     except Exception as e:
         return f"Error al verificar DNSSEC: {str(e)}"
 
-def check_default_gateway():
+async def check_default_gateway():
     """Verifica la puerta de enlace predeterminada."""
     try:
-        gateway = subprocess.getoutput("ip route | grep default")
+        gateway = async_runner.grep(await async_runner.getoutput("ip", "route"), "default")
         return "OK" if gateway else "Not Found"
     except Exception as e:
         return f"Error al verificar puerta de enlace predeterminada: {str(e)}"
 
-def get_listening_ports():
+async def get_listening_ports():
     """Obtiene los puertos de escucha (TCP/UDP)."""
     try:
-        listening_ports = subprocess.getoutput("ss -tuln")
+        listening_ports = await async_runner.getoutput("ss", "-tuln")
         return listening_ports if listening_ports else "Not Found"
     except Exception as e:
         return f"Error al obtener puertos de escucha: {str(e)}"
 
-def check_promiscuous_interfaces():
+async def check_promiscuous_interfaces():
     """Verifica si hay interfaces en modo promiscuo."""
     try:
-        interfaces = subprocess.getoutput("ip link show | grep promisc")
+        interfaces = async_runner.grep(await async_runner.getoutput("ip", "link", "show"), "promisc", ignore_case=True)
         return "OK" if interfaces else "Not Found"
     except Exception as e:
         return f"Error al verificar interfaces promiscuas: {str(e)}"
 
-def check_waiting_connections():
+async def check_waiting_connections():
     """Verifica las conexiones en estado de espera."""
     try:
-        waiting_connections = subprocess.getoutput("ss -tuln | grep 'SYN'")
+        waiting_connections = async_runner.grep(await async_runner.getoutput("ss", "-tuln"), "SYN")
         return "OK" if waiting_connections else "Not Found"
     except Exception as e:
         return f"Error al verificar conexiones en espera: {str(e)}"
 
-def check_dhcp_client_status():
+async def check_dhcp_client_status():
     """Verifica el estado del cliente DHCP."""
     try:
-        dhcp_status = subprocess.getoutput("systemctl is-active dhclient")
+        dhcp_status = await async_runner.getoutput("systemctl", "is-active", "dhclient")
         return "OK" if "active" in dhcp_status else "Not Found"
     except Exception as e:
         return f"Error al verificar estado del cliente DHCP: {str(e)}"
 
-def check_arp_monitoring_software():
+async def check_arp_monitoring_software():
     """Verifica si hay software de monitoreo ARP."""
     try:
-        arp_monitor = subprocess.getoutput("ps aux | grep arpwatch")
+        arp_monitor = async_runner.grep(await async_runner.getoutput("ps", "aux"), "arpwatch")
         return "Found" if arp_monitor else "Not Found"
     except Exception as e:
         return f"Error al verificar software de monitoreo ARP: {str(e)}"
 
-def check_uncommon_network_protocols():
+async def check_uncommon_network_protocols():
     """Verifica la presencia de protocolos de red poco comunes."""
     try:
-        uncommon_protocols = subprocess.getoutput("netstat -tuln | grep -E 'tcp6|udp6'")
+        netstat = await async_runner.getoutput("netstat", "-tuln")
+        uncommon_protocols = async_runner.grep(netstat, "tcp6") or async_runner.grep(netstat, "udp6")
         return "Found" if uncommon_protocols else "Not Found"
     except Exception as e:
         return f"Error al verificar protocolos de red poco comunes: {str(e)}"
@@ -91,14 +94,26 @@ def run():
 
     ipv6_status = check_ipv6_configuration()
     dns_status, dns_servers = check_dns_servers()
-    dnssec_status = check_dnssec_support()
-    gateway_status = check_default_gateway()
-    listening_ports = get_listening_ports()
-    promiscuous_interfaces = check_promiscuous_interfaces()
-    waiting_connections = check_waiting_connections()
-    dhcp_status = check_dhcp_client_status()
-    arp_monitor_status = check_arp_monitoring_software()
-    uncommon_protocols = check_uncommon_network_protocols()
+
+    # Las comprobaciones basadas en comandos se lanzan a la vez
+    checks = async_runner.run_checks({
+        "dnssec_status": check_dnssec_support(),
+        "gateway_status": check_default_gateway(),
+        "listening_ports": get_listening_ports(),
+        "promiscuous_interfaces": check_promiscuous_interfaces(),
+        "waiting_connections": check_waiting_connections(),
+        "dhcp_status": check_dhcp_client_status(),
+        "arp_monitor_status": check_arp_monitoring_software(),
+        "uncommon_protocols": check_uncommon_network_protocols(),
+    })
+    dnssec_status = checks["dnssec_status"]
+    gateway_status = checks["gateway_status"]
+    listening_ports = checks["listening_ports"]
+    promiscuous_interfaces = checks["promiscuous_interfaces"]
+    waiting_connections = checks["waiting_connections"]
+    dhcp_status = checks["dhcp_status"]
+    arp_monitor_status = checks["arp_monitor_status"]
+    uncommon_protocols = checks["uncommon_protocols"]
 
     print("\n---------------------------------------------------")
     print(f"- IPv6 Configuration: {ipv6_status}")
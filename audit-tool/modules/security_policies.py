@@ -1,28 +1,18 @@
-import subprocess
 import json
+from utils import system_files
+from utils import policy
 
 def check_password_policy():
     """Verifica las políticas de contraseñas configuradas en el sistema."""
     try:
-        # Verificar políticas de contraseñas en /etc/login.defs
-        login_defs = subprocess.getoutput("cat /etc/login.defs")
+        # Verificar políticas de contraseñas en /etc/login.defs (árbol ya parseado por el motor de reglas)
         password_policy = {}
 
-        # Longitud mínima de la contraseña
-        min_length = subprocess.getoutput("grep -i 'PASS_MIN_LEN' /etc/login.defs")
-        password_policy["Min Length"] = min_length.split()[-1] if min_length and not min_length.startswith("#") else "Not Set or Commented"
-
-        # Edad mínima de la contraseña
-        min_age = subprocess.getoutput("grep -i 'PASS_MIN_DAYS' /etc/login.defs")
-        password_policy["Min Age"] = min_age.split()[-1] if min_age and not min_age.startswith("#") else "Not Set or Commented"
-
-        # Edad máxima de la contraseña
-        max_age = subprocess.getoutput("grep -i 'PASS_MAX_DAYS' /etc/login.defs")
-        password_policy["Max Age"] = max_age.split()[-1] if max_age and not max_age.startswith("#") else "Not Set or Commented"
-
-        # Advertencia antes de expiración de la contraseña
-        warn_age = subprocess.getoutput("grep -i 'PASS_WARN_AGE' /etc/login.defs")
-        password_policy["Warn Age"] = warn_age.split()[-1] if warn_age and not warn_age.startswith("#") else "Not Set or Commented"
+        # Longitud mínima, edad mínima, edad máxima y advertencia antes de expiración
+        for name, key in [("Min Length", "PASS_MIN_LEN"), ("Min Age", "PASS_MIN_DAYS"),
+                          ("Max Age", "PASS_MAX_DAYS"), ("Warn Age", "PASS_WARN_AGE")]:
+            value = policy.value("login.defs", key)
+            password_policy[name] = value if value is not None else "Not Set or Commented"
 
         return password_policy
     except Exception as e:
@@ -32,37 +22,59 @@ def check_audit_logs():
     """Verifica que los logs de auditoría estén habilitados para acciones de usuario y sistema."""
     try:
         # Verificar configuración de auditoría en /etc/audit/auditd.conf
-        audit_config = subprocess.getoutput("cat /etc/audit/auditd.conf")
+        audit_config = system_files.read_text("/etc/audit/auditd.conf")
 
         # Verificar que la auditoría esté activada
         audit_status = "Auditd configured correctly" if "active = yes" in audit_config else "Auditd not properly configured"
 
         # Verificar que la auditoría se registre en un archivo
-        log_file_check = subprocess.getoutput("grep -i 'log_file' /etc/audit/auditd.conf")
+        log_file_check = system_files.read_key_values("/etc/audit/auditd.conf", "=")
         audit_status += ", Log file configured correctly" if "log_file" in log_file_check else ", Log file not configured properly"
 
         return audit_status
     except Exception as e:
         return f"Error al verificar configuración de logs de auditoría: {str(e)}"
 
+def check_policy_rules(rules=policy.COMPILED_DEFAULT_RULES):
+    """Evalúa las reglas declarativas sobre login.defs, sshd_config y sudoers (cada archivo se lee una vez)."""
+    try:
+        return policy.evaluate(rules)
+    except Exception as e:
+        return f"Error al evaluar las reglas de políticas: {str(e)}"
+
 def run():
     """Ejecuta todas las auditorías de políticas de seguridad y devuelve los resultados."""
     print("[Security Policies] Iniciando auditoría de políticas de seguridad...")
 
     password_policy = check_password_policy()
     audit_logs = check_audit_logs()
+    policy_rules = check_policy_rules()
 
     print("\n---------------------------------------------------")
     print("[Password Policies]")
-    for policy, value in password_policy.items():
-        print(f"  - {policy}: {value}")
+    if isinstance(password_policy, dict):
+        for setting, value in password_policy.items():
+            print(f"  - {setting}: {value}")
+    else:
+        print(f"  - {password_policy}")
 
     print(f"- Audit Logs: {audit_logs}")
+
+    print("[Policy Rules]")
+    if isinstance(policy_rules, dict):
+        passed = sum(result["status"] == "PASS" for result in policy_rules.values())
+        print(f"  - {passed}/{len(policy_rules)} rules passed")
+        for rule_id, result in policy_rules.items():
+            if result["status"] == "FAIL":
+                print(f"  - [FAIL] {rule_id}: {result['description']} (value: {result['value']}, expected: {result['expected']})")
+    else:
+        print(f"  - {policy_rules}")
     print("---------------------------------------------------\n")
 
     return {
         "password_policy": password_policy,
-        "audit_logs": audit_logs
+        "audit_logs": audit_logs,
+        "policy_rules": policy_rules,
     }
 
 if __name__ == "__main__":
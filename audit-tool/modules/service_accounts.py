@@ -1,14 +1,19 @@
-import subprocess
 import pwd
 import crypt
 import time
 import json
+from utils import accounts
+from utils import logins
+
+# Días sin iniciar sesión a partir de los cuales una cuenta se considera inactiva
+INACTIVE_DAYS = 30
 
 def check_service_accounts_with_elevated_privileges():
     """Verifica si hay cuentas de servicio con privilegios elevados (sudo/root)."""
     try:
         # Buscar cuentas con privilegios de sudo
-        sudo_accounts = subprocess.getoutput("grep -E 'sudo|root' /etc/group")
+        table = accounts.load()
+        sudo_accounts = table.group_members("sudo") is not None or table.group_members("root") is not None
         if sudo_accounts:
             return "Service accounts with elevated privileges found."
         else:
@@ -20,15 +25,9 @@ def check_encrypted_passwords_for_service_accounts():
     """Verifica que las contraseñas de las cuentas de servicio estén cifradas correctamente."""
     try:
         # Verifica que las contraseñas en /etc/shadow estén cifradas (no en texto claro)
-        shadow_file = subprocess.getoutput("cat /etc/shadow")
-        if shadow_file:
-            accounts = shadow_file.splitlines()
-            unencrypted_accounts = []
-            for account in accounts:
-                username = account.split(":")[0]
-                password = account.split(":")[1]
-                if password == "":  # Contraseña vacía (sin cifrar)
-                    unencrypted_accounts.append(username)
+        table = accounts.load()
+        if table.shadow["name"]:
+            unencrypted_accounts = table.empty_hashes()  # Contraseña vacía (sin cifrar)
 
             if unencrypted_accounts:
                 return f"Unencrypted passwords found for accounts: {', '.join(unencrypted_accounts)}"
@@ -43,28 +42,18 @@ def check_inactive_service_accounts():
     """Verifica si hay cuentas de servicio inactivas o no utilizadas."""
     try:
         inactive_accounts = []
-        accounts = subprocess.getoutput("cat /etc/passwd").splitlines()
-        for account in accounts:
-            username = account.split(":")[0]
-            lastlog_output = subprocess.getoutput(f"lastlog -u {username}")
-            lastlog_lines = lastlog_output.splitlines()
-
-            # Si lastlog no tiene un registro para el usuario (como 'Never logged in')
-            if len(lastlog_lines) < 2:
-                continue  # Si no hay información, continuamos con la siguiente cuenta
-
-            last_log_time = lastlog_lines[-1].split()[3]
-
-            # Verificar si la fecha está en el formato esperado (y evitar el error)
-            try:
-                last_log_timestamp = time.mktime(time.strptime(last_log_time, "%b %d"))
-            except ValueError:
-                continue  # Si no se puede convertir, continuamos con la siguiente cuenta
+        # Último inicio de sesión de todas las cuentas leyendo lastlog y wtmp una sola vez
+        last_logins = logins.last_logins()
+        current_time = time.time()
+        for username in accounts.load().passwd["name"]:
+            login = last_logins.get(username)
 
-            current_time = time.time()
+            # Si no hay registro para el usuario (como 'Never logged in'), continuamos
+            if login is None:
+                continue
 
             # Si la cuenta no ha iniciado sesión en los últimos 30 días, se considera inactiva
-            if (current_time - last_log_timestamp) > (30 * 24 * 60 * 60):
+            if (current_time - login["time"]) > (INACTIVE_DAYS * 24 * 60 * 60):
                 inactive_accounts.append(username)
 
         if inactive_accounts:
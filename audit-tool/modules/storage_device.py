@@ -1,11 +1,11 @@
-import subprocess
 import json
+from utils import command_runner
 
 def check_disk_encryption():
     """Verifica si el cifrado de discos (LUKS) está habilitado en los discos críticos."""
     try:
         # Verificar si los discos están cifrados con LUKS
-        encrypted_disks = subprocess.getoutput("lsblk -f | grep luks")
+        encrypted_disks = command_runner.getoutput("lsblk -f | grep luks")
         if encrypted_disks:
             return f"Disk encryption enabled: {encrypted_disks}"
         else:
@@ -17,7 +17,7 @@ def check_mount_options():
     """Verifica que los dispositivos no estén montados con opciones inseguras."""
     try:
         # Verificar los dispositivos montados y sus opciones
-        mounted_devices = subprocess.getoutput("mount | grep -v 'type'")  # Ignorar encabezados de tipo
+        mounted_devices = command_runner.getoutput("mount | grep -v 'type'")  # Ignorar encabezados de tipo
         insecure_mounts = []
         for line in mounted_devices.splitlines():
             # Verificar si hay opciones inseguras, como 'noexec', 'nosuid', 'nodev'
@@ -35,7 +35,7 @@ def check_disk_health():
     """Verifica el estado de los discos y la integridad del sistema de archivos."""
     try:
         # Verificar el estado de los discos usando el comando 'smartctl' (requiere 'smartmontools' instalado)
-        disk_health = subprocess.getoutput("smartctl --all /dev/sda")  # Puedes cambiar '/dev/sda' a otros dispositivos
+        disk_health = command_runner.getoutput("smartctl --all /dev/sda")  # Puedes cambiar '/dev/sda' a otros dispositivos
         if "SMART Health Status" in disk_health and "PASSED" in disk_health:
             return "Disk health is good."
         else:
@@ -47,7 +47,7 @@ def check_filesystem_integrity():
     """Verifica la integridad del sistema de archivos (usando fsck)."""
     try:
         # Verificar la integridad del sistema de archivos en /dev/sda1 (puedes cambiar a otros dispositivos)
-        fs_check = subprocess.getoutput("sudo fsck -n /dev/sda1")
+        fs_check = command_runner.getoutput("sudo fsck -n /dev/sda1")
         if "clean" in fs_check:
             return "Filesystem integrity is OK."
         else:
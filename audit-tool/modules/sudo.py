@@ -1,13 +1,19 @@
-import subprocess
+import stat
 import json
+import shlex
+from utils import command_runner
+from utils import suid_index
+from utils import system_files
+from utils import fs_scanner
+from utils import paths
+from utils import policy
 
 def check_sudo_access():
     """Checks sudo usage to ensure users have only necessary access."""
     try:
         # List users with sudo privileges
-        sudo_users = subprocess.getoutput("getent group sudo")
-        if sudo_users:
-            users = sudo_users.split(":")[-1].split(",")
+        users = system_files.group_members("sudo")
+        if users is not None:
             return f"Users with sudo access: {', '.join(users)}.\nEnsure that only authorized users have sudo access."
         else:
             return "No users with sudo access found.\nThis indicates no users have sudo access configured."
@@ -18,9 +24,10 @@ def check_sudoers_file():
     """Audits the /etc/sudoers file for unsafe configurations or excessive permissions."""
     try:
         # Check permissions of the sudoers file
-        sudoers_permissions = subprocess.getoutput("ls -l /etc/sudoers")
+        sudoers_permissions = fs_scanner.stat_path("/etc/sudoers")
         if sudoers_permissions:
-            if "root root" in sudoers_permissions and "440" in sudoers_permissions:
+            owned_by_root = sudoers_permissions.st_uid == 0 and sudoers_permissions.st_gid == 0
+            if owned_by_root and stat.S_IMODE(sudoers_permissions.st_mode) == 0o440:
                 sudoers_status = "Sudoers file permissions are correct (root:root, 440)."
             else:
                 sudoers_status = "Sudoers file permissions are incorrect.\nThe file should have 440 permissions and be owned by root."
@@ -28,7 +35,7 @@ def check_sudoers_file():
             sudoers_status = "Sudoers file not found.\nThis is a critical issue, as the sudoers file is essential for sudo configuration."
         
         # Check if the sudoers file has syntax errors
-        sudoers_config = subprocess.getoutput("sudo visudo -c")
+        sudoers_config = command_runner.getoutput(f"sudo visudo -c -f {shlex.quote(paths.host_path('/etc/sudoers'))}")
         if "syntax OK" in sudoers_config:
             sudoers_config_status = "Sudoers file is syntactically correct."
         else:
@@ -41,19 +48,35 @@ def check_sudoers_file():
 def check_sudoers_inclusions():
     """Checks if dangerous inclusions exist in the sudoers file."""
     try:
-        sudoers_inclusions = subprocess.getoutput("grep -i 'include' /etc/sudoers")
-        if "includedir" in sudoers_inclusions:
+        # Inclusiones de todo el árbol de sudoers (también las de los archivos incluidos)
+        sudoers_inclusions = policy.load("sudoers").find("includedir")
+        if sudoers_inclusions:
             return "Included directories found in sudoers file.\nBe cautious with included directories as they may introduce untrusted configurations."
         else:
             return "No included directories found in sudoers file.\nThis is a good practice to avoid untrusted configurations."
     except Exception as e:
         return f"Error checking inclusions in sudoers: {str(e)}"
 
+def sudoers_files():
+    """(ruta, stat) de /etc/sudoers* y de los archivos de /etc/sudoers.d."""
+    files = []
+    for name in system_files.list_dir("/etc"):
+        if not name.startswith("sudoers"):
+            continue
+        path = f"/etc/{name}"
+        names = [f"{path}/{child}" for child in system_files.list_dir(path)] or [path]
+        for candidate in names:
+            st = fs_scanner.stat_path(candidate)
+            if st and stat.S_ISREG(st.st_mode):
+                files.append((candidate, st))
+    return files
+
 def check_sudoers_with_guid_bit():
     """Checks for files with the setgid bit in the sudoers directory or related files."""
     try:
         # Find files with setgid bit in the /etc/sudoers directory or related sudo files
-        sudoers_with_guid = subprocess.getoutput("find /etc/sudoers* -type f -exec ls -l {} + 2>/dev/null | grep 's' ")
+        sudoers_with_guid = "\n".join(f"{stat.filemode(st.st_mode)} {path}" for path, st in sudoers_files()
+                                       if st.st_mode & stat.S_ISGID)
         if sudoers_with_guid:
             return f"Files with setgid bit (GUID) found in sudoers: \n{sudoers_with_guid}"
         else:
@@ -66,9 +89,8 @@ def check_files_with_suid_or_guid():
     Busca archivos con bits setuid (SUID) o setgid (GUID) en todo el sistema.
     """
     try:
-        result = subprocess.getoutput(
-            "find / -perm /6000 -type f -exec ls -l {} + 2>/dev/null"
-        )
+        privileged_files = suid_index.scan()["privileged"]
+        result = "\n".join(f"{f['mode']} {f['path']}" for f in privileged_files)
         if result:
             return f"[ALERTA] Archivos con setuid o setgid encontrados en el sistema:\n{result}"
         else:
@@ -76,6 +98,25 @@ def check_files_with_suid_or_guid():
     except Exception as e:
         return f"[ERROR] Error al buscar setuid/setgid: {str(e)}"
 
+def check_suid_or_guid_changes():
+    """
+    Compara los binarios setuid/setgid con los de la auditoría anterior.
+    """
+    try:
+        scan = suid_index.scan()
+        if scan["baseline_created"]:
+            return "[INFO] Primera auditoría: se ha creado el índice de binarios setuid/setgid."
+        changes = {"new": scan["new"], "removed": scan["removed"], "changed": scan["changed"]}
+        if any(changes.values()):
+            return {kind: [f"{f['mode']} {f['path']}" for f in files] for kind, files in changes.items()}
+        result = f"[OK] Sin cambios en binarios setuid/setgid ({scan['mode']}, {scan['dirs_rescanned']} directorios revisados)."
+        if scan["mode"] == "incremental":
+            # El índice incremental no ve un chmod/chown sobre archivos que no cambian su directorio
+            result += " Los cambios solo de permisos o propietario (p. ej. chmod u+s sobre un binario existente) requieren --full-scan."
+        return result
+    except Exception as e:
+        return f"[ERROR] Error al comparar setuid/setgid: {str(e)}"
+
 
 def run():
     """Runs all elevated privilege audits and returns the results."""
@@ -86,6 +127,7 @@ def run():
     sudoers_inclusions = check_sudoers_inclusions()
     sudoers_with_guid = check_sudoers_with_guid_bit()
     system_files_with_suid_guid = check_files_with_suid_or_guid()
+    suid_guid_changes = check_suid_or_guid_changes()
 
     print("\n---------------------------------------------------")
     print(f"- Sudo access: {sudo_access}")
@@ -93,13 +135,15 @@ def run():
     print(f"- Sudoers inclusions: {sudoers_inclusions}")
     print(f"- Sudoers files with GUID bit: {sudoers_with_guid}")
     print(f"- System files with setuid/setgid bits: {system_files_with_suid_guid}")
+    print(f"- Changes in setuid/setgid files since last audit: {suid_guid_changes}")
     print("---------------------------------------------------\n")
 
     return {
         "sudo_access": sudo_access,
         "sudoers_file": sudoers_file,
         "sudoers_inclusions": sudoers_inclusions,
-        "sudoers_with_guid": sudoers_with_guid
+        "sudoers_with_guid": sudoers_with_guid,
+        "suid_guid_changes": suid_guid_changes
     }
 
 if __name__ == "__main__":
@@ -1,9 +1,9 @@
 import os
 import platform
-import subprocess
 import psutil
 import json
 import locale
+from utils import command_runner
 
 def get_system_info():
     """Obtiene información detallada del sistema."""
@@ -17,7 +17,7 @@ def get_system_info():
             "kernel_version": platform.release(),
             "hardware_platform": platform.machine(),
             "hostname": platform.node(),
-            "uptime": subprocess.getoutput("uptime -p"),
+            "uptime": command_runner.getoutput("uptime -p"),
             "cpu_count": psutil.cpu_count(logical=True),
             "total_memory": f"{psutil.virtual_memory().total / (1024**3):.2f} GB",
             "available_memory": f"{psutil.virtual_memory().available / (1024**3):.2f} GB",
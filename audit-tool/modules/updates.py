@@ -1,14 +1,20 @@
-import subprocess
-import os
 import json
+from utils import system_files
+from utils import paths
+from utils import packages
+from utils import apt_index
 
 def check_pending_updates():
     """Verifica si hay actualizaciones críticas pendientes."""
     try:
-        # Ejecutar el comando de actualización de la lista de paquetes
-        updates = subprocess.getoutput("apt list --upgradable")
-        if "upgradable from" in updates:
-            return f"Pending updates found: {updates}"
+        # Versiones instaladas frente a los índices de /var/lib/apt/lists (sin lanzar apt)
+        if not apt_index.list_files():
+            return "No package lists found in /var/lib/apt/lists (apt update has not been run)."
+        updates = apt_index.upgradable()
+        if updates:
+            listing = ", ".join(f"{name} ({entry['installed']} -> {entry['candidate']})"
+                                for name, entry in sorted(updates.items()))
+            return f"Pending updates found: {listing}"
         else:
             return "No pending updates found."
     except Exception as e:
@@ -18,12 +24,12 @@ def check_repository_configuration():
     """Verifica si los repositorios están configurados de manera segura."""
     try:
         # Verificar los repositorios en /etc/apt/sources.list y /etc/apt/sources.list.d/
-        sources_files = ["/etc/apt/sources.list"] + [f"/etc/apt/sources.list.d/{file}" for file in os.listdir("/etc/apt/sources.list.d")]
+        sources_files = ["/etc/apt/sources.list"] + [f"/etc/apt/sources.list.d/{file}" for file in system_files.list_dir("/etc/apt/sources.list.d")]
 
         insecure_repos = []
         for file in sources_files:
-            if os.path.exists(file):
-                with open(file, 'r') as f:
+            if system_files.exists(file):
+                with open(paths.host_path(file), 'r') as f:
                     lines = f.readlines()
                     for line in lines:
                         if 'http://' in line:  # Repositorios no cifrados
@@ -40,10 +46,9 @@ def check_automatic_updates():
     """Verifica si las actualizaciones automáticas están configuradas adecuadamente."""
     try:
         # Verificar si los paquetes de actualizaciones automáticas están instalados
-        package_check = subprocess.getoutput("dpkg -l | grep unattended-upgrades")
-        if package_check:
+        if packages.is_installed("unattended-upgrades"):
             # Verificar que la configuración de actualizaciones automáticas esté habilitada
-            config_check = subprocess.getoutput("cat /etc/apt/apt.conf.d/20auto-upgrades")
+            config_check = system_files.read_text("/etc/apt/apt.conf.d/20auto-upgrades")
             if "APT::Periodic::Update-Package-Lists" in config_check and "1" in config_check:
                 return "Automatic updates are configured correctly."
             else:
@@ -1,29 +1,48 @@
-import subprocess
 import os
 import json
+import shlex
+from utils import command_runner
+from utils import system_files
+from utils import accounts
+from utils import fs_scanner
+from utils import paths
+
+def root_option():
+    """Opción --root de shadow-utils cuando se audita una imagen montada."""
+    return "" if paths.root == "/" else f" --root {shlex.quote(paths.root)}"
 
 def check_admin_accounts():
     """Verifica las cuentas de administrador."""
     try:
-        admins = subprocess.getoutput("getent group sudo")
-        return "Found" if admins else "Not Found"
+        admins = accounts.load().group_members("sudo")
+        return "Found" if admins is not None else "Not Found"
     except Exception as e:
         return f"Error al verificar cuentas de administrador: {str(e)}"
 
 def check_unique_uids():
     """Verifica que los UIDs sean únicos."""
     try:
-        uids = subprocess.getoutput("awk -F: '{print $3}' /etc/passwd")
-        uid_list = uids.split('\n')
-        unique_uids = len(uid_list) == len(set(uid_list))
-        return "OK" if unique_uids else "Not Unique"
+        duplicates = accounts.load().duplicate_uids()
+        if duplicates:
+            return {"status": "Not Unique", "duplicates": {str(uid): names for uid, names in duplicates.items()}}
+        return "OK"
     except Exception as e:
         return f"Error al verificar UIDs únicos: {str(e)}"
 
+def check_unique_gids():
+    """Verifica que los GIDs sean únicos."""
+    try:
+        duplicates = accounts.load().duplicate_gids()
+        if duplicates:
+            return {"status": "Not Unique", "duplicates": {str(gid): names for gid, names in duplicates.items()}}
+        return "OK"
+    except Exception as e:
+        return f"Error al verificar GIDs únicos: {str(e)}"
+
 def check_group_file_consistency():
     """Verifica la consistencia de los archivos de grupos."""
     try:
-        group_check = subprocess.getoutput("grppck -r")
+        group_check = command_runner.getoutput(f"grppck -r{root_option()}")
         return "OK" if "group file is consistent" in group_check else "Not Consistent"
     except Exception as e:
         return f"Error al verificar consistencia de archivos de grupos: {str(e)}"
@@ -31,7 +50,7 @@ def check_group_file_consistency():
 def check_password_file_consistency():
     """Verifica la consistencia del archivo de contraseñas."""
     try:
-        passwd_check = subprocess.getoutput("pwck -r")
+        passwd_check = command_runner.getoutput(f"pwck -r{root_option()}")
         return "OK" if "passwd file is consistent" in passwd_check else "Not Consistent"
     except Exception as e:
         return f"Error al verificar consistencia del archivo de contraseñas: {str(e)}"
@@ -39,21 +58,32 @@ def check_password_file_consistency():
 def check_password_hashing_methods():
     """Verifica los métodos de hashing de contraseñas."""
     try:
-        shadow_file = subprocess.getoutput("cat /etc/shadow")
-        if "$6$" in shadow_file:
+        counts = accounts.load().algorithm_counts()
+        if "SHA-512" in counts:
             return "SHA-512"
-        elif "$5$" in shadow_file:
+        elif "SHA-256" in counts:
             return "SHA-256"
         else:
             return "Other"
     except Exception as e:
         return f"Error al verificar el método de hashing de contraseñas: {str(e)}"
 
+def check_weak_password_hashes():
+    """Cuentas cuya contraseña está vacía o usa un hash débil (DES, MD5)."""
+    try:
+        table = accounts.load()
+        return {
+            "algorithms": table.algorithm_counts(),
+            "weak": table.weak_hashes(),
+            "empty_group_passwords": table.empty_group_hashes(),
+        }
+    except Exception as e:
+        return f"Error al verificar hashes de contraseñas débiles: {str(e)}"
+
 def check_password_hashing_rounds():
     """Verifica las rondas de hashing de contraseñas."""
     try:
-        shadow_file = subprocess.getoutput("cat /etc/shadow")
-        if "$6$" in shadow_file:
+        if accounts.load().hash_rounds():
             return "Found"
         else:
             return "Not Found"
@@ -63,7 +93,7 @@ def check_password_hashing_rounds():
 def check_system_users():
     """Consulta los usuarios del sistema (no demonios)."""
     try:
-        system_users = subprocess.getoutput("awk -F: '$3 >= 1000 {print $1}' /etc/passwd")
+        system_users = accounts.load().users_from_uid(accounts.uid_min())
         return "Found" if system_users else "Not Found"
     except Exception as e:
         return f"Error al consultar usuarios del sistema: {str(e)}"
@@ -71,7 +101,7 @@ def check_system_users():
 def check_nis_authentication_support():
     """Verifica el soporte para autenticación NIS."""
     try:
-        nis_support = subprocess.getoutput("cat /etc/nsswitch.conf | grep nis")
+        nis_support = any("nis" in source for sources in system_files.read_nsswitch().values() for source in sources)
         return "Enabled" if nis_support else "Not Enabled"
     except Exception as e:
         return f"Error al verificar soporte NIS: {str(e)}"
@@ -79,13 +109,14 @@ def check_nis_authentication_support():
 def check_sudoers_permissions():
     """Verifica los permisos del archivo sudoers y relacionados."""
     try:
-        sudoers_permissions = subprocess.getoutput("ls -l /etc/sudoers")
-        sudoers_d_permissions = subprocess.getoutput("ls -l /etc/sudoers.d")
-        readme_permissions = subprocess.getoutput("ls -l /etc/sudoers.d/README")
-        
-        sudoers_result = "OK" if "root" in sudoers_permissions else "Warning"
-        sudoers_d_result = "OK" if "root" in sudoers_d_permissions else "Warning"
-        readme_result = "OK" if "root" in readme_permissions else "Warning"
+        sudoers_permissions = fs_scanner.stat_path("/etc/sudoers")
+        sudoers_d_permissions = fs_scanner.stat_path("/etc/sudoers.d")
+        readme_permissions = fs_scanner.stat_path("/etc/sudoers.d/README")
+
+        # Deben pertenecer a root
+        sudoers_result = "OK" if sudoers_permissions and sudoers_permissions.st_uid == 0 else "Warning"
+        sudoers_d_result = "OK" if sudoers_d_permissions and sudoers_d_permissions.st_uid == 0 else "Warning"
+        readme_result = "OK" if readme_permissions and readme_permissions.st_uid == 0 else "Warning"
         
         return {
             "sudoers_permissions": sudoers_result,
@@ -98,7 +129,7 @@ def check_sudoers_permissions():
 def check_pam_configuration_files():
     """Verifica los archivos de configuración de PAM."""
     try:
-        pam_conf = subprocess.getoutput("ls /etc/pam.d")
+        pam_conf = system_files.list_dir("/etc/pam.d")
         return "Found" if pam_conf else "Not Found"
     except Exception as e:
         return f"Error al verificar archivos de configuración PAM: {str(e)}"
@@ -106,7 +137,7 @@ def check_pam_configuration_files():
 def check_locked_accounts():
     """Verifica las cuentas bloqueadas."""
     try:
-        locked_accounts = subprocess.getoutput("passwd -S | grep 'L'")
+        locked_accounts = accounts.load().locked_accounts()
         return "Found" if locked_accounts else "Not Found"
     except Exception as e:
         return f"Error al verificar cuentas bloqueadas: {str(e)}"
@@ -114,7 +145,7 @@ def check_locked_accounts():
 def check_expired_passwords():
     """Verifica contraseñas expiradas."""
     try:
-        expired_passwords = subprocess.getoutput("chage -l $(whoami) | grep 'password expired'")
+        expired_passwords = accounts.load().expired_passwords()
         return "Found" if expired_passwords else "Not Found"
     except Exception as e:
         return f"Error al verificar contraseñas expiradas: {str(e)}"
@@ -122,15 +153,15 @@ def check_expired_passwords():
 def check_user_password_aging():
     """Verifica el envejecimiento de las contraseñas de los usuarios."""
     try:
-        password_aging = subprocess.getoutput("chage -l $(whoami)")
-        return "OK" if "Last password change" in password_aging else "Not Found"
+        last_changes = accounts.load().shadow["last_change"]
+        return "OK" if any(day is not None for day in last_changes) else "Not Found"
     except Exception as e:
         return f"Error al verificar envejecimiento de contraseñas: {str(e)}"
 
 def check_single_user_mode_authentication():
     """Verifica la autenticación en el modo de usuario único de Linux."""
     try:
-        single_user_mode = subprocess.getoutput("cat /etc/inittab | grep single")
+        single_user_mode = system_files.grep("/etc/inittab", "single")
         return "Found" if single_user_mode else "Not Found"
     except Exception as e:
         return f"Error al verificar autenticación en modo usuario único: {str(e)}"
@@ -141,10 +172,12 @@ def run():
 
     admin_accounts = check_admin_accounts()
     unique_uids = check_unique_uids()
+    unique_gids = check_unique_gids()
     group_file_consistency = check_group_file_consistency()
     password_file_consistency = check_password_file_consistency()
     password_hashing_methods = check_password_hashing_methods()
     password_hashing_rounds = check_password_hashing_rounds()
+    weak_password_hashes = check_weak_password_hashes()
     system_users = check_system_users()
     nis_auth_support = check_nis_authentication_support()
     sudoers_permissions = check_sudoers_permissions()
@@ -157,10 +190,12 @@ def run():
     print("\n---------------------------------------------------")
     print(f"- Administrator accounts: {admin_accounts}")
     print(f"- Unique UIDs: {unique_uids}")
+    print(f"- Unique GIDs: {unique_gids}")
     print(f"- Consistency of group files (grppck): {group_file_consistency}")
     print(f"- Password file consistency: {password_file_consistency}")
     print(f"- Password hashing methods: {password_hashing_methods}")
     print(f"- Checking password hashing rounds: {password_hashing_rounds}")
+    print(f"- Weak password hashes: {weak_password_hashes}")
     print(f"- Query system users (non daemons): {system_users}")
     print(f"- NIS+ authentication support: {nis_auth_support}")
     print(f"- Sudoers file(s): Found")
@@ -177,10 +212,12 @@ def run():
     return {
         "admin_accounts": admin_accounts,
         "unique_uids": unique_uids,
+        "unique_gids": unique_gids,
         "group_file_consistency": group_file_consistency,
         "password_file_consistency": password_file_consistency,
         "password_hashing_methods": password_hashing_methods,
         "password_hashing_rounds": password_hashing_rounds,
+        "weak_password_hashes": weak_password_hashes,
         "system_users": system_users,
         "nis_auth_support": nis_auth_support,
         "sudoers_permissions": sudoers_permissions,
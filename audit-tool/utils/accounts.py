@@ -0,0 +1,238 @@
+import os
+import time
+import threading
+from collections import Counter
+from utils import paths
+from utils import system_files
+
+# Tabla de cuentas: passwd, shadow, group y gshadow se leen una sola vez por
+# auditoría y se guardan por columnas (una lista por campo). Cada comprobación
+# recorre solo las columnas que necesita, de modo que siguen siendo rápidas con
+# cientos de miles de entradas locales (p. ej. cachés de LDAP/SSSD).
+
+ACCOUNT_FILES = ["/etc/passwd", "/etc/shadow", "/etc/group", "/etc/gshadow"]
+
+PASSWD_FIELDS = ["name", "password", "uid", "gid", "gecos", "home", "shell"]
+SHADOW_FIELDS = ["name", "hash", "last_change", "min_days", "max_days", "warn_days", "inactive_days", "expire",
+                 "reserved"]
+GROUP_FIELDS = ["name", "password", "gid", "members"]
+GSHADOW_FIELDS = ["name", "hash", "admins", "members"]
+
+# Algoritmo de hash según el prefijo de crypt(3) (tres primeros caracteres)
+HASH_ALGORITHMS = {
+    "$1$": "MD5",
+    "$2a": "bcrypt",
+    "$2b": "bcrypt",
+    "$2y": "bcrypt",
+    "$5$": "SHA-256",
+    "$6$": "SHA-512",
+    "$7$": "scrypt",
+    "$y$": "yescrypt",
+    "$gy": "gost-yescrypt",
+}
+WEAK_ALGORITHMS = {"DES", "MD5", "empty"}
+
+# Rondas de SHA-crypt cuando el hash no indica rounds=
+SHA_DEFAULT_ROUNDS = 5000
+
+DEFAULT_UID_MIN = 1000
+
+_cache = {}
+_lock = threading.Lock()
+
+def _columns(path, fields):
+    """Lee un archivo tipo passwd y devuelve {campo: lista} con una lista por columna."""
+    count = len(fields)
+    lines = [line for line in system_files.read_text(path).splitlines() if line and line[0] not in "#+-"]
+    # Las líneas con otro número de campos se completan o recortan para no desalinear las columnas
+    lines = [line if line.count(":") == count - 1 else ":".join((line.split(":") + [""] * count)[:count])
+             for line in lines]
+    # Un único split de todo el archivo: la columna i son los elementos i, i+count, i+2*count...
+    values = ":".join(lines).split(":") if lines else []
+    return {field: values[index::count] for index, field in enumerate(fields)}
+
+def _number(value):
+    """int(value), o None si el campo está vacío o no es numérico."""
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+def _numbers(column):
+    """Columna de texto a enteros; los campos vacíos o no numéricos quedan en None."""
+    try:
+        return list(map(int, column))
+    except ValueError:
+        pass
+    # Hay campos vacíos (habitual en shadow): cada valor distinto se convierte una sola vez,
+    # con la misma conversión que el camino rápido
+    numbers = {value: _number(value) for value in set(column)}
+    return list(map(numbers.__getitem__, column))
+
+def hash_algorithm(password_hash):
+    """Algoritmo de un campo de contraseña de shadow."""
+    if not password_hash:
+        return "empty"
+    if password_hash[0] in "!*":
+        return "locked"
+    algorithm = HASH_ALGORITHMS.get(password_hash[:3])
+    if algorithm:
+        return algorithm
+    return "DES" if len(password_hash) == 13 else "unknown"
+
+def hash_rounds(password_hash):
+    """Coste del hash: rondas de SHA-crypt, log2 de bcrypt o parámetros de yescrypt; None si no aplica."""
+    parts = password_hash.split("$")
+    algorithm = HASH_ALGORITHMS.get(password_hash[:3])
+    if algorithm in ("SHA-256", "SHA-512"):
+        if len(parts) > 2 and parts[2].startswith("rounds="):
+            return int(parts[2][len("rounds="):]) if parts[2][len("rounds="):].isdigit() else None
+        return SHA_DEFAULT_ROUNDS
+    if algorithm == "bcrypt" and len(parts) > 2 and parts[2].isdigit():
+        return int(parts[2])
+    if algorithm in ("yescrypt", "gost-yescrypt") and len(parts) > 2:
+        return parts[2]
+    return None
+
+def _duplicates(keys, names):
+    """{clave: [nombres]} de las claves que aparecen más de una vez."""
+    repeated = {key for key, count in Counter(keys).items() if count > 1 and key is not None}
+    duplicates = {}
+    if repeated:
+        for key, name in zip(keys, names):
+            if key in repeated:
+                duplicates.setdefault(key, []).append(name)
+    return duplicates
+
+class AccountTable:
+    """passwd, shadow, group y gshadow del sistema auditado guardados por columnas."""
+
+    def __init__(self):
+        self.passwd = _columns("/etc/passwd", PASSWD_FIELDS)
+        self.passwd["uid"] = _numbers(self.passwd["uid"])
+        self.passwd["gid"] = _numbers(self.passwd["gid"])
+
+        self.shadow = _columns("/etc/shadow", SHADOW_FIELDS)
+        for field in SHADOW_FIELDS[2:-1]:
+            self.shadow[field] = _numbers(self.shadow[field])
+
+        self.group = _columns("/etc/group", GROUP_FIELDS)
+        self.group["gid"] = _numbers(self.group["gid"])
+        self.gshadow = _columns("/etc/gshadow", GSHADOW_FIELDS)
+
+    # --- passwd y group ---
+
+    def duplicate_uids(self):
+        return _duplicates(self.passwd["uid"], self.passwd["name"])
+
+    def duplicate_gids(self):
+        return _duplicates(self.group["gid"], self.group["name"])
+
+    def duplicate_user_names(self):
+        return sorted(_duplicates(self.passwd["name"], self.passwd["name"]))
+
+    def uid_zero_accounts(self):
+        return [name for name, uid in zip(self.passwd["name"], self.passwd["uid"]) if uid == 0]
+
+    def users_from_uid(self, uid_min=DEFAULT_UID_MIN):
+        """Cuentas de usuario (UID >= uid_min), es decir, las que no son de sistema o demonio."""
+        return [name for name, uid in zip(self.passwd["name"], self.passwd["uid"]) if uid is not None and uid >= uid_min]
+
+    def group_members(self, name):
+        """Miembros de un grupo, o None si el grupo no existe."""
+        for group_name, members in zip(self.group["name"], self.group["members"]):
+            if group_name == name:
+                return [member for member in members.split(",") if member]
+        return None
+
+    # --- shadow y gshadow ---
+
+    def hash_algorithms(self):
+        """{cuenta: algoritmo} de cada entrada de shadow."""
+        return dict(zip(self.shadow["name"], map(hash_algorithm, self.shadow["hash"])))
+
+    def algorithm_counts(self):
+        return dict(Counter(map(hash_algorithm, self.shadow["hash"])))
+
+    def weak_hashes(self):
+        """{cuenta: algoritmo} de las cuentas con contraseña vacía, DES o MD5."""
+        return {name: algorithm for name, algorithm in self.hash_algorithms().items() if algorithm in WEAK_ALGORITHMS}
+
+    def empty_hashes(self):
+        return [name for name, password_hash in zip(self.shadow["name"], self.shadow["hash"]) if not password_hash]
+
+    def empty_group_hashes(self):
+        return [name for name, password_hash in zip(self.gshadow["name"], self.gshadow["hash"]) if not password_hash]
+
+    def locked_accounts(self):
+        return [name for name, password_hash in zip(self.shadow["name"], self.shadow["hash"])
+                if password_hash[:1] in ("!", "*")]
+
+    def hash_rounds(self):
+        """{cuenta: coste} de las cuentas cuyo hash tiene un coste configurable."""
+        rounds = {}
+        for name, password_hash in zip(self.shadow["name"], self.shadow["hash"]):
+            if password_hash[:1] == "$":
+                cost = hash_rounds(password_hash)
+                if cost is not None:
+                    rounds[name] = cost
+        return rounds
+
+    def aging(self):
+        """{cuenta: campos de envejecimiento de shadow} (días desde 1970, None si no se definen)."""
+        fields = SHADOW_FIELDS[2:-1]
+        return {name: dict(zip(fields, values))
+                for name, *values in zip(*(self.shadow[field] for field in ["name"] + fields))}
+
+    def expired_passwords(self, today=None):
+        """Cuentas con contraseña caducada o cuyo cambio se ha forzado (último cambio = 0)."""
+        today = int(time.time() // 86400) if today is None else today
+        expired = []
+        for name, password_hash, last_change, max_days in zip(self.shadow["name"], self.shadow["hash"],
+                                                               self.shadow["last_change"], self.shadow["max_days"]):
+            if password_hash[:1] in ("!", "*") or last_change is None:
+                continue
+            if last_change == 0 or (max_days is not None and last_change + max_days < today):
+                expired.append(name)
+        return expired
+
+    def expired_accounts(self, today=None):
+        """Cuentas cuya fecha de caducidad (campo expire) ya ha pasado."""
+        today = int(time.time() // 86400) if today is None else today
+        return [name for name, expire in zip(self.shadow["name"], self.shadow["expire"])
+                if expire is not None and expire < today]
+
+    def accounts_without_max_age(self):
+        """Cuentas con contraseña que nunca caduca (sin máximo o 99999 días)."""
+        return [name for name, password_hash, max_days in zip(self.shadow["name"], self.shadow["hash"], self.shadow["max_days"])
+                if password_hash[:1] not in ("!", "*", "") and (max_days is None or max_days >= 99999)]
+
+def _signature():
+    signature = [paths.root]
+    for path in ACCOUNT_FILES:
+        try:
+            st = os.stat(paths.host_path(path))
+            signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+def load():
+    """Tabla de cuentas del sistema auditado; se vuelve a leer solo si cambia algún archivo."""
+    signature = _signature()
+    with _lock:
+        table = _cache.get(signature)
+        if table is None:
+            table = AccountTable()
+            _cache.clear()
+            _cache[signature] = table
+        return table
+
+def uid_min():
+    """UID_MIN de /etc/login.defs (1000 por defecto)."""
+    value = system_files.read_login_defs().get("UID_MIN", "")
+    return int(value) if value.isdigit() else DEFAULT_UID_MIN
+
+def reset():
+    with _lock:
+        _cache.clear()
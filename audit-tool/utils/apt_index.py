@@ -0,0 +1,203 @@
+import os
+import gzip
+import lzma
+import threading
+from utils import paths
+from utils import packages
+from utils import profiling
+from utils import state_store
+
+# Paquetes actualizables calculados sin apt: se comparan las versiones
+# instaladas (utils.packages, /var/lib/dpkg/status) con las de los índices
+# Packages descargados por `apt update` en /var/lib/apt/lists. Los índices se
+# leen línea a línea quedándose solo con la versión más alta de cada
+# paquete y arquitectura, y ese resumen se guarda en state_store por archivo
+# (tamaño y mtime): en la siguiente auditoría solo se vuelven a leer los
+# índices que han cambiado.
+#
+# No se aplican las preferencias de /etc/apt/preferences (pinning); sí se
+# excluyen los repositorios marcados NotAutomatic (experimental, backports).
+
+LISTS_DIR = "/var/lib/apt/lists"
+STATE_NAME = "apt_lists"
+STATE_VERSION = 1
+
+# Índices comprimidos que se pueden leer (Acquire::GzipIndexes); los .lz4 se ignoran
+OPENERS = {".gz": gzip.open, ".xz": lzma.open}
+
+_cache = {}
+_lock = threading.Lock()
+
+# --- Comparación de versiones de Debian (la misma que dpkg --compare-versions) ---
+
+def _order(char):
+    if char.isdigit():
+        return 0
+    if char.isalpha():
+        return ord(char)
+    if char == "~":
+        return -1
+    return ord(char) + 256
+
+def _compare_part(a, b):
+    """Compara una parte upstream o revisión alternando tramos no numéricos y numéricos."""
+    i = j = 0
+    while i < len(a) or j < len(b):
+        while (i < len(a) and not a[i].isdigit()) or (j < len(b) and not b[j].isdigit()):
+            a_order = _order(a[i]) if i < len(a) and not a[i].isdigit() else 0
+            b_order = _order(b[j]) if j < len(b) and not b[j].isdigit() else 0
+            if a_order != b_order:
+                return -1 if a_order < b_order else 1
+            if i < len(a) and not a[i].isdigit():
+                i += 1
+            if j < len(b) and not b[j].isdigit():
+                j += 1
+        a_start = i
+        while i < len(a) and a[i].isdigit():
+            i += 1
+        b_start = j
+        while j < len(b) and b[j].isdigit():
+            j += 1
+        a_number = int(a[a_start:i] or 0)
+        b_number = int(b[b_start:j] or 0)
+        if a_number != b_number:
+            return -1 if a_number < b_number else 1
+    return 0
+
+def _split_version(version):
+    # La época termina en el primer ":"; la versión upstream puede contener más
+    epoch, _, rest = version.partition(":") if ":" in version else ("0", "", version)
+    upstream, _, revision = rest.rpartition("-") if "-" in rest else (rest, "", "")
+    return int(epoch) if epoch.isdigit() else 0, upstream, revision
+
+def compare_versions(a, b):
+    """-1, 0 o 1 según a sea menor, igual o mayor que b (época, versión upstream y revisión)."""
+    a_epoch, a_upstream, a_revision = _split_version(a)
+    b_epoch, b_upstream, b_revision = _split_version(b)
+    if a_epoch != b_epoch:
+        return -1 if a_epoch < b_epoch else 1
+    return _compare_part(a_upstream, b_upstream) or _compare_part(a_revision, b_revision)
+
+# --- Índices Packages ---
+
+def list_files():
+    """Índices Packages de /var/lib/apt/lists (rutas del host)."""
+    directory = paths.host_path(LISTS_DIR)
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in names
+            if name.endswith("_Packages") or any(name.endswith(f"_Packages{suffix}") for suffix in OPENERS)]
+
+def _release_file(path):
+    """InRelease/Release del repositorio al que pertenece un índice (el prefijo común más largo)."""
+    directory, name = os.path.split(path)
+    best = None
+    for candidate in os.listdir(directory):
+        if candidate.endswith(("_InRelease", "_Release")):
+            prefix = candidate.rsplit("_", 1)[0] + "_"
+            if name.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+                best = (prefix, candidate)
+    return os.path.join(directory, best[1]) if best else None
+
+def _not_automatic(path):
+    """True si el repositorio está marcado NotAutomatic (apt no instala sus versiones por sí solo)."""
+    release = _release_file(path)
+    if release is None:
+        return False
+    with open(release, "rb") as f:
+        header = f.read(4096)
+    return b"\nNotAutomatic: yes" in header or header.startswith(b"NotAutomatic: yes")
+
+def parse_packages_index(path):
+    """{"paquete:arquitectura": versión más alta} de un índice Packages, leído línea a línea."""
+    suffix = os.path.splitext(path)[1]
+    opener = OPENERS.get(suffix, open)
+    versions = {}
+    name = version = architecture = None
+    bytes_read = 0
+    with opener(path, "rb") as f:
+        for line in f:
+            bytes_read += len(line)
+            if line.startswith(b"Package:"):
+                name = line[8:].strip().decode(errors="replace")
+            elif line.startswith(b"Version:"):
+                version = line[8:].strip().decode(errors="replace")
+            elif line.startswith(b"Architecture:"):
+                architecture = line[13:].strip().decode(errors="replace")
+            elif line in (b"\n", b"\r\n"):
+                _add_version(versions, name, architecture, version)
+                name = version = architecture = None
+        _add_version(versions, name, architecture, version)
+    profiling.count_io(bytes_read=bytes_read)
+    return versions
+
+def _add_version(versions, name, architecture, version):
+    if not (name and version and architecture):
+        return
+    key = f"{name}:{architecture}"
+    previous = versions.get(key)
+    if previous is None or compare_versions(version, previous) > 0:
+        versions[key] = version
+
+def _file_signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+def load():
+    """{"paquete:arquitectura": versión candidata} de todos los índices; solo se releen los que cambian."""
+    files = list_files()
+    signature = (paths.root, tuple((path, *_file_signature(path)) for path in files))
+    with _lock:
+        candidates = _cache.get(signature)
+        if candidates is not None:
+            return candidates
+
+        state_name = state_store.scoped_name(STATE_NAME)
+        saved = state_store.load(state_name, {})
+        saved_files = saved.get("files", {}) if saved.get("version") == STATE_VERSION else {}
+        parsed = {}
+        for path in files:
+            file_signature = _file_signature(path)
+            guest = paths.guest_path(path)
+            previous = saved_files.get(guest)
+            if previous is not None and previous["signature"] == file_signature:
+                parsed[guest] = previous
+                continue
+            try:
+                parsed[guest] = {"signature": file_signature, "not_automatic": _not_automatic(path),
+                                 "versions": parse_packages_index(path)}
+            except (OSError, EOFError, lzma.LZMAError):
+                continue
+        state_store.save(state_name, {"version": STATE_VERSION, "files": parsed})
+
+        candidates = {}
+        for index in parsed.values():
+            if index["not_automatic"]:
+                continue
+            for key, version in index["versions"].items():
+                previous = candidates.get(key)
+                if previous is None or compare_versions(version, previous) > 0:
+                    candidates[key] = version
+        _cache.clear()
+        _cache[signature] = candidates
+        return candidates
+
+def upgradable():
+    """{paquete: {"installed", "candidate", "architecture"}} de los paquetes instalados con versión nueva."""
+    candidates = load()
+    result = {}
+    for key, entry in packages.load().items():
+        # Cada paquete se mira una vez, por su entrada "nombre:arquitectura"
+        if ":" not in key or not entry["installed"]:
+            continue
+        candidate = candidates.get(key)
+        if candidate is not None and compare_versions(candidate, entry["version"]) > 0:
+            result[entry["name"]] = {"installed": entry["version"], "candidate": candidate,
+                                     "architecture": entry["architecture"]}
+    return result
+
+def reset():
+    with _lock:
+        _cache.clear()
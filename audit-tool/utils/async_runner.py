@@ -0,0 +1,94 @@
+import asyncio
+import shlex
+import subprocess
+import time
+from utils import command_runner
+
+# Motor asyncio para módulos con muchos comandos cortos e independientes.
+# Los módulos declaran sus comprobaciones como corrutinas y las ejecutan juntas
+# con run_checks(), de modo que el módulo tarda lo que su comando más lento.
+# Usa create_subprocess_exec (sin /bin/sh): los filtros tipo "| grep" se hacen
+# en Python con las funciones de abajo. Comparte caché y estadísticas con
+# command_runner.
+
+_inflight = {}
+
+async def _execute(argv, command, timeout, max_output):
+    execution = {"exit_code": None, "wall_time": 0.0, "timed_out": False, "truncated": False, "bytes": 0}
+    start = time.monotonic()
+    chunks = []
+    try:
+        process = await asyncio.create_subprocess_exec(*argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                                       stderr=subprocess.STDOUT, start_new_session=True)
+    except (FileNotFoundError, PermissionError):
+        execution["exit_code"] = 127  # Igual que la shell cuando el comando no existe
+        command_runner.record_execution(command, execution)
+        return ""
+
+    deadline = start + timeout
+    finished = False
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            chunk = await asyncio.wait_for(process.stdout.read(command_runner.READ_SIZE), remaining)
+            if not chunk:
+                finished = True
+                break
+            execution["bytes"] += len(chunk)
+            chunks.append(chunk)
+            if execution["bytes"] > max_output:
+                execution["truncated"] = True
+                break
+    except asyncio.TimeoutError:
+        execution["timed_out"] = True
+    finally:
+        # Cualquier salida antes del fin de la salida (timeout, truncado, cancelación, excepción)
+        # mata todo el grupo: un nieto con la tubería abierta bloquearía process.wait()
+        if not finished:
+            command_runner.kill_process_group(process)
+        execution["exit_code"] = await process.wait()
+        execution["wall_time"] = round(time.monotonic() - start, 3)
+        command_runner.record_execution(command, execution)
+
+    output = b"".join(chunks)[:max_output].decode(errors="replace")
+    return output[:-1] if output.endswith("\n") else output
+
+async def getoutput(*argv, ttl=None, timeout=None, max_output=command_runner.MAX_OUTPUT_BYTES):
+    """Versión asíncrona y memoizada de command_runner.getoutput: getoutput("ss", "-tuln")."""
+    command = shlex.join(argv)
+    module = command_runner.caller_module()
+    output = command_runner.cached_output(command, module, ttl)
+    if output is not None:
+        return output
+
+    # Si otra corrutina ya está ejecutando el mismo comando, se espera su resultado
+    task = _inflight.get(command)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        timeout = command_runner.get_timeout(command) if timeout is None else timeout
+        task = asyncio.ensure_future(_execute(argv, command, timeout, max_output))
+        _inflight[command] = task
+    try:
+        output = await task
+    finally:
+        if _inflight.get(command) is task:
+            del _inflight[command]
+    command_runner.store_output(command, output)
+    return output
+
+def grep(output, pattern, ignore_case=False):
+    """Filtra la salida de un comando como lo haría `| grep pattern`."""
+    if ignore_case:
+        pattern = pattern.lower()
+        return "\n".join(line for line in output.splitlines() if pattern in line.lower())
+    return "\n".join(line for line in output.splitlines() if pattern in line)
+
+async def _gather(checks):
+    names = list(checks)
+    values = await asyncio.gather(*checks.values())
+    return dict(zip(names, values))
+
+def run_checks(checks):
+    """Ejecuta a la vez un diccionario {nombre: corrutina} y devuelve {nombre: resultado}."""
+    return asyncio.run(_gather(checks))
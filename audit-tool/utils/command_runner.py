@@ -0,0 +1,186 @@
+import os
+import signal
+import selectors
+import subprocess
+import sys
+import threading
+import time
+from utils import profiling
+
+# Tiempo de validez (segundos) de la salida cacheada según el prefijo del comando.
+# Los comandos que no aparecen aquí se ejecutan una sola vez por auditoría.
+COMMAND_TTLS = {
+    "ps ": 5,
+    "ss ": 10,
+    "netstat ": 10,
+    "systemctl is-active": 30,
+    "ip ": 30,
+}
+DEFAULT_TTL = None
+
+# Tiempo máximo de ejecución (segundos) según el prefijo del comando
+COMMAND_TIMEOUTS = {
+    "sudo chkrootkit": 1800,
+    "sudo rkhunter": 1800,
+    "docker scan": 900,
+    "sudo fsck": 600,
+    "smartctl": 120,
+}
+DEFAULT_TIMEOUT = 60
+
+# Máximo de bytes de salida que se leen de un comando antes de cortarlo
+MAX_OUTPUT_BYTES = 8 * 1024 * 1024
+
+READ_SIZE = 65536
+
+_cache = {}
+_command_locks = {}
+_stats = {}
+_lock = threading.Lock()
+
+def _by_prefix(table, command, default):
+    for prefix, value in table.items():
+        if command.startswith(prefix):
+            return value
+    return default
+
+def get_ttl(command):
+    """Devuelve el TTL configurado para un comando (None = toda la auditoría)."""
+    return _by_prefix(COMMAND_TTLS, command, DEFAULT_TTL)
+
+def get_timeout(command):
+    """Devuelve el tiempo máximo de ejecución configurado para un comando."""
+    return _by_prefix(COMMAND_TIMEOUTS, command, DEFAULT_TIMEOUT)
+
+def caller_module(depth=2):
+    """Obtiene el nombre del módulo de auditoría que ha pedido el comando."""
+    name = sys._getframe(depth).f_globals.get("__name__", "unknown")
+    return name.rsplit(".", 1)[-1]
+
+def _command_lock(command):
+    with _lock:
+        return _command_locks.setdefault(command, threading.Lock())
+
+def _new_entry():
+    return {"executions": 0, "cache_hits": {}, "exit_code": None, "wall_time": 0.0,
+            "timeouts": 0, "truncated": 0}
+
+def _record_hit(command, module):
+    with _lock:
+        entry = _stats.setdefault(command, _new_entry())
+        entry["cache_hits"][module] = entry["cache_hits"].get(module, 0) + 1
+
+def _record_execution(command, execution):
+    profiling.count_io(subprocesses=1, bytes_read=execution["bytes"])
+    with _lock:
+        entry = _stats.setdefault(command, _new_entry())
+        entry["executions"] += 1
+        entry["exit_code"] = execution["exit_code"]
+        entry["wall_time"] = round(entry["wall_time"] + execution["wall_time"], 3)
+        entry["timeouts"] += execution["timed_out"]
+        entry["truncated"] += execution["truncated"]
+
+def kill_process_group(process):
+    """Mata el comando y todos sus hijos (se lanzan en su propia sesión)."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def stream_lines(command, timeout=None, max_output=MAX_OUTPUT_BYTES, execution=None):
+    """Ejecuta un comando y va devolviendo su salida línea a línea.
+
+    El comando se corta si supera timeout segundos o max_output bytes; stdin
+    se conecta a /dev/null para que nunca se quede esperando una respuesta.
+    Si se pasa un diccionario en execution, se rellena con exit_code,
+    wall_time, timed_out, truncated y bytes al terminar.
+    """
+    timeout = get_timeout(command) if timeout is None else timeout
+    execution = {} if execution is None else execution
+    execution.update({"exit_code": None, "wall_time": 0.0, "timed_out": False, "truncated": False, "bytes": 0})
+
+    start = time.monotonic()
+    deadline = start + timeout
+    process = subprocess.Popen(command, shell=True, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT, start_new_session=True)
+    selector = selectors.DefaultSelector()
+    selector.register(process.stdout, selectors.EVENT_READ)
+    pending = b""
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                execution["timed_out"] = True
+                break
+            if not selector.select(remaining):
+                continue
+            chunk = os.read(process.stdout.fileno(), READ_SIZE)
+            if not chunk:
+                break
+            execution["bytes"] += len(chunk)
+            if execution["bytes"] > max_output:
+                execution["truncated"] = True
+                chunk = chunk[:max(0, len(chunk) - (execution["bytes"] - max_output))]
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield line.decode(errors="replace")
+            if execution["truncated"]:
+                break
+        if pending:
+            yield pending.decode(errors="replace")
+    finally:
+        # También se ejecuta si quien consume el generador deja de leer antes de tiempo
+        selector.close()
+        if process.poll() is None:
+            kill_process_group(process)
+        process.stdout.close()
+        execution["exit_code"] = process.wait()
+        execution["wall_time"] = round(time.monotonic() - start, 3)
+        _record_execution(command, execution)
+
+def run(command, timeout=None, max_output=MAX_OUTPUT_BYTES):
+    """Ejecuta un comando sin caché y devuelve su salida junto con los datos de la ejecución."""
+    execution = {}
+    output = "\n".join(stream_lines(command, timeout, max_output, execution))
+    execution["output"] = output
+    return execution
+
+def cached_output(command, module, ttl=None):
+    """Devuelve la salida cacheada de un comando si sigue vigente (y anota el acierto), o None."""
+    ttl = get_ttl(command) if ttl is None else ttl
+    cached = _cache.get(command)
+    if cached is not None and (ttl is None or time.monotonic() - cached[0] < ttl):
+        _record_hit(command, module)
+        return cached[1]
+    return None
+
+def store_output(command, output):
+    _cache[command] = (time.monotonic(), output)
+
+def record_execution(command, execution):
+    """Anota en las estadísticas una ejecución hecha fuera de stream_lines (p. ej. asyncio)."""
+    _record_execution(command, execution)
+
+def getoutput(command, ttl=None, timeout=None):
+    """Equivalente memoizado de subprocess.getoutput compartido por todos los módulos."""
+    module = caller_module()
+
+    # Un lock por comando: si dos módulos lo piden a la vez, solo uno lo ejecuta
+    with _command_lock(command):
+        output = cached_output(command, module, ttl)
+        if output is None:
+            output = run(command, timeout)["output"]
+            store_output(command, output)
+        return output
+
+def get_stats():
+    """Devuelve, por comando, sus ejecuciones, código de salida, tiempo y uso de la caché."""
+    with _lock:
+        return {command: dict(entry, cache_hits=dict(entry["cache_hits"])) for command, entry in _stats.items()}
+
+def clear():
+    """Vacía la caché y las estadísticas (p. ej. entre dos auditorías)."""
+    with _lock:
+        _cache.clear()
+        _stats.clear()
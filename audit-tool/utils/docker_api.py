@@ -0,0 +1,198 @@
+import os
+import json
+import socket
+import threading
+from urllib.parse import quote
+
+# Cliente mínimo de la API de Docker Engine por el socket Unix
+# (/var/run/docker.sock), sin lanzar el CLI de docker. Usa una sola conexión
+# HTTP/1.1 persistente y envía las peticiones de inspección en lotes
+# encadenados (pipelining): se escriben PIPELINE_DEPTH peticiones seguidas y
+# luego se leen sus respuestas en orden, así que inspeccionar cientos de
+# contenedores son unas pocas idas y vueltas en lugar de un proceso por
+# contenedor.
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+
+# Se puede cambiar (--docker-socket) para probar contra un servidor simulado;
+# también se respeta DOCKER_HOST=unix:///ruta
+socket_path = os.environ["DOCKER_HOST"][len("unix://"):] \
+    if os.environ.get("DOCKER_HOST", "").startswith("unix://") else DEFAULT_SOCKET
+
+TIMEOUT = 30
+PIPELINE_DEPTH = 32
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+class DockerError(Exception):
+    pass
+
+class DockerConnectionError(DockerError):
+    """La conexión se ha cerrado o la respuesta no es HTTP válido."""
+
+class DockerClient:
+    """Conexión persistente a la API de Docker por un socket Unix."""
+
+    def __init__(self, path=None, timeout=TIMEOUT):
+        self.path = path or socket_path
+        self.timeout = timeout
+        self.sock = None
+        self.file = None
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        if self.sock is not None:
+            self.sock.close()
+        self.sock = self.file = None
+
+    def _connect(self):
+        if self.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self.sock, self.file = sock, sock.makefile("rb")
+            self.connections += 1
+
+    # --- HTTP ---
+
+    def _request_bytes(self, method, path):
+        return (f"{method} {path} HTTP/1.1\r\nHost: docker\r\nUser-Agent: audit-tool\r\n"
+                f"Accept: application/json\r\n\r\n").encode()
+
+    def _read_line(self):
+        line = self.file.readline(65537)
+        if not line:
+            raise DockerConnectionError("la conexión se ha cerrado")
+        return line
+
+    def _abort(self, message):
+        # El resto de la respuesta queda sin leer: la conexión ya no sirve para la siguiente
+        self.close()
+        raise DockerError(message)
+
+    def _read_response(self):
+        """(estado, cabeceras, cuerpo) de la siguiente respuesta de la conexión."""
+        parts = self._read_line().split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise DockerConnectionError(f"respuesta HTTP no válida: {parts!r}")
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = self._read_line()
+            if line in (b"\r\n", b"\n"):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks, size = [], 0
+            while True:
+                chunk_size = int(self._read_line().split(b";")[0], 16)
+                if chunk_size == 0:
+                    # Trailers hasta la línea vacía
+                    while self._read_line() not in (b"\r\n", b"\n"):
+                        pass
+                    break
+                size += chunk_size
+                if size > MAX_BODY_BYTES:
+                    self._abort("respuesta demasiado grande")
+                chunks.append(self.file.read(chunk_size))
+                self._read_line()
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            length = int(headers["content-length"])
+            if length > MAX_BODY_BYTES:
+                self._abort("respuesta demasiado grande")
+            body = self.file.read(length)
+            if len(body) != length:
+                raise DockerConnectionError("respuesta incompleta")
+        else:
+            # Sin longitud: el cuerpo termina al cerrarse la conexión
+            body = self.file.read(MAX_BODY_BYTES)
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, headers, body
+
+    def _decode(self, method, path, status, body):
+        # 404: el objeto ya no existe (p. ej. un contenedor borrado entre el listado y la inspección)
+        if status == 404:
+            return None
+        if status >= 400:
+            try:
+                message = json.loads(body).get("message", "")
+            except (ValueError, AttributeError):
+                message = body[:200].decode(errors="replace")
+            raise DockerError(f"{method} {path}: HTTP {status} {message}")
+        return json.loads(body) if body else None
+
+    def get_many(self, paths):
+        """Respuestas JSON de varias peticiones GET, en el mismo orden, con pipelining por lotes.
+
+        Si el daemon cierra la conexión a mitad de un lote, las peticiones sin
+        respuesta se repiten en una conexión nueva (una vez; GET no tiene efectos).
+        """
+        results = []
+        with self._lock:
+            pending = list(paths)
+            retried = False
+            while pending:
+                batch = pending[:PIPELINE_DEPTH]
+                responses = []
+                try:
+                    self._connect()
+                    self.sock.sendall(b"".join(self._request_bytes("GET", path) for path in batch))
+                    self.requests += len(batch)
+                    # Tras un "Connection: close" el resto del lote va en otra conexión
+                    while len(responses) < len(batch) and self.sock is not None:
+                        responses.append(self._read_response())
+                except (DockerConnectionError, OSError):
+                    self.close()
+                    if retried and not responses:
+                        raise
+                    retried = not responses
+                else:
+                    retried = False
+                for path, (status, _, body) in zip(batch, responses):
+                    results.append(self._decode("GET", path, status, body))
+                pending = pending[len(responses):]
+        return results
+
+    def get(self, path):
+        return self.get_many([path])[0]
+
+    # --- API ---
+
+    def containers(self, all_containers=False):
+        """Lista de contenedores (GET /containers/json), como `docker ps`."""
+        return self.get(f"/containers/json?all={'1' if all_containers else '0'}")
+
+    def inspect_many(self, container_ids):
+        """Detalle de varios contenedores (GET /containers/{id}/json) en lotes encadenados."""
+        return self.get_many([f"/containers/{quote(container_id, safe='')}/json" for container_id in container_ids])
+
+def available(path=None):
+    return os.path.exists(path or socket_path)
+
+def format_ports(ports):
+    """Puertos publicados de /containers/json con el formato de `docker port` ("80/tcp -> 0.0.0.0:8080")."""
+    lines = []
+    for port in ports or []:
+        if port.get("PublicPort"):
+            lines.append(f"{port['PrivatePort']}/{port.get('Type', 'tcp')} -> {port.get('IP', '')}:{port['PublicPort']}")
+    return "\n".join(sorted(set(lines)))
@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import shlex
+import asyncio
+import subprocess
+import time
+
+# Auditoría de una flota: el coordinador lanza audit_tool.py en cada destino a
+# través de un transporte, con un máximo de destinos a la vez, y va recogiendo
+# los informes según llegan para unirlos en un único informe de flota.
+#
+# Un transporte solo decide cómo se ejecuta el comando en un destino:
+#   - LocalTransport: en esta máquina ("localhost" o la ruta de una imagen, que
+#     se audita con --root).
+#   - SSHTransport: por ssh en modo batch.
+#   - ReplayTransport: devuelve informes guardados de un directorio, sin lanzar
+#     procesos (pruebas y demostraciones).
+
+AUDIT_TOOL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "audit_tool.py")
+
+DEFAULT_CONCURRENCY = 32
+DEFAULT_TIMEOUT = 3600
+
+# Líneas finales de stderr que se guardan cuando un destino falla
+STDERR_TAIL_LINES = 20
+
+class Transport:
+    """Ejecuta audit_tool.py en un destino y devuelve (código de salida, stdout, stderr)."""
+
+    name = "transport"
+
+    def command(self, host, args):
+        raise NotImplementedError
+
+    async def run(self, host, args, timeout):
+        process = await asyncio.create_subprocess_exec(*self.command(host, args), stdin=subprocess.DEVNULL,
+                                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                                       start_new_session=True)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        return process.returncode, stdout, stderr
+
+class LocalTransport(Transport):
+    """Ejecuta la herramienta en esta máquina; un destino distinto de localhost es la raíz de una imagen."""
+
+    name = "local"
+
+    def __init__(self, python=sys.executable, audit_tool=AUDIT_TOOL):
+        self.python = python
+        self.audit_tool = audit_tool
+
+    def command(self, host, args):
+        root = [] if host == "localhost" else ["--root", host]
+        return [self.python, self.audit_tool, *root, *args]
+
+class SSHTransport(Transport):
+    """Ejecuta la herramienta instalada en el destino a través de ssh."""
+
+    name = "ssh"
+
+    def __init__(self, remote_command="sudo python3 /opt/audit-tool/audit_tool.py", ssh="ssh", options=None):
+        self.remote_command = remote_command
+        self.ssh = shlex.split(ssh)
+        # BatchMode: nunca preguntar contraseñas, un destino sin acceso falla en lugar de bloquear
+        self.options = ["-o", "BatchMode=yes", "-o", "ConnectTimeout=10"] if options is None else options
+
+    def command(self, host, args):
+        return [*self.ssh, *self.options, host, f"{self.remote_command} {shlex.join(args)}"]
+
+class ReplayTransport(Transport):
+    """Sustituto para pruebas: devuelve reports_dir/<destino>.json como si lo hubiera generado el destino."""
+
+    name = "replay"
+
+    def __init__(self, reports_dir, delay=0.0):
+        self.reports_dir = reports_dir
+        self.delay = delay
+
+    async def run(self, host, args, timeout):
+        await asyncio.sleep(self.delay)
+        try:
+            with open(os.path.join(self.reports_dir, f"{host}.json"), "rb") as f:
+                return 0, f.read(), b""
+        except FileNotFoundError:
+            return 255, b"", f"No hay informe guardado para {host}".encode()
+
+TRANSPORTS = {
+    "local": LocalTransport,
+    "ssh": SSHTransport,
+    "replay": ReplayTransport,
+}
+
+def audit_arguments(modules=None):
+    """Argumentos con los que se lanza audit_tool.py en cada destino."""
+    args = ["--output", "-"]
+    if modules:
+        args += ["--modules", ",".join(modules)]
+    return args
+
+def parse_report(exit_code, stdout, stderr):
+    """Convierte la salida de un destino en su informe o en un diccionario de error."""
+    stderr_tail = "\n".join(stderr.decode(errors="replace").splitlines()[-STDERR_TAIL_LINES:])
+    if exit_code != 0:
+        return {"error": f"Código de salida {exit_code}", "stderr": stderr_tail}
+    output = stdout.decode(errors="replace").strip()
+    try:
+        return json.loads(output)
+    except ValueError:
+        pass
+    try:
+        # El informe es la última línea: cualquier otra cosa que el destino imprima va antes
+        return json.loads(output.splitlines()[-1])
+    except (ValueError, IndexError):
+        return {"error": "La salida no es un informe JSON válido", "stderr": stderr_tail}
+
+async def audit_host(host, transport, args, timeout, semaphore):
+    async with semaphore:
+        start = time.monotonic()
+        try:
+            report = parse_report(*await transport.run(host, args, timeout))
+        except asyncio.TimeoutError:
+            report = {"error": f"Tiempo de espera agotado ({timeout} s)"}
+        except OSError as e:
+            report = {"error": f"No se pudo lanzar el transporte {transport.name}: {str(e)}"}
+        return host, report, round(time.monotonic() - start, 3)
+
+async def _audit_fleet(hosts, transport, args, concurrency, timeout, on_result):
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks = [asyncio.ensure_future(audit_host(host, transport, args, timeout, semaphore)) for host in hosts]
+    results = {}
+    # Cada informe se entrega en cuanto llega, sin esperar a los destinos lentos
+    for task in asyncio.as_completed(tasks):
+        host, report, wall_time = await task
+        results[host] = (report, wall_time)
+        if on_result is not None:
+            on_result(host, report, wall_time)
+    return results
+
+def summarize(results):
+    """Estado de cada destino y, por módulo, en qué destinos ha fallado."""
+    hosts = {}
+    module_errors = {}
+    for host, (report, wall_time) in results.items():
+        failed = "error" in report
+        hosts[host] = {"status": "failed" if failed else "ok", "wall_time": wall_time}
+        if failed:
+            hosts[host]["error"] = report["error"]
+            continue
+        for module, result in report.items():
+            if isinstance(result, dict) and "error" in result:
+                module_errors.setdefault(module, []).append(host)
+    return {
+        "hosts_total": len(results),
+        "hosts_ok": sum(1 for entry in hosts.values() if entry["status"] == "ok"),
+        "hosts_failed": sorted(host for host, entry in hosts.items() if entry["status"] == "failed"),
+        "module_errors": {module: sorted(names) for module, names in module_errors.items()},
+        "hosts": hosts,
+    }
+
+def audit_fleet(hosts, transport, modules=None, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT,
+                on_result=None):
+    """Audita todos los destinos y devuelve el informe de flota {"_fleet": resumen, destino: informe}.
+
+    on_result(destino, informe, segundos) se llama según va terminando cada destino.
+    """
+    start = time.monotonic()
+    results = asyncio.run(_audit_fleet(list(dict.fromkeys(hosts)), transport, audit_arguments(modules),
+                                       concurrency, timeout, on_result))
+    fleet_report = {"_fleet": summarize(results)}
+    fleet_report["_fleet"]["wall_time"] = round(time.monotonic() - start, 3)
+    fleet_report["_fleet"]["transport"] = transport.name
+    # Los destinos en el orden en que se pidieron
+    for host in dict.fromkeys(hosts):
+        fleet_report[host] = results[host][0]
+    return fleet_report
+
+def read_hosts(path):
+    """Lista de destinos de un archivo (uno por línea, se ignoran comentarios y líneas vacías)."""
+    with open(path) as f:
+        return [line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()]
@@ -0,0 +1,282 @@
+import os
+import stat
+import time
+import threading
+import multiprocessing
+from utils import paths
+from utils import profiling
+from utils import system_files
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Recorrido único del sistema de archivos compartido por los módulos.
+# Cada inodo se examina una sola vez y en esa misma pasada se calculan todos
+# los predicados (SUID/SGID, escritura global, sin propietario, historiales).
+
+# Sistemas de archivos virtuales que no contienen archivos reales
+PSEUDO_FILESYSTEMS = {
+    "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs", "debugfs",
+    "devpts", "efivarfs", "fusectl", "hugetlbfs", "mqueue", "nsfs", "proc",
+    "pstore", "rpc_pipefs", "securityfs", "selinuxfs", "sysfs", "tracefs",
+}
+
+# Sistemas de archivos de red: recorrerlos es lento y no pertenecen al host
+NETWORK_FILESYSTEMS = {
+    "afs", "ceph", "cifs", "fuse.glusterfs", "fuse.sshfs", "glusterfs",
+    "ncpfs", "nfs", "nfs4", "smb3", "smbfs",
+}
+
+HISTORY_FILES = {
+    ".bash_history", ".zsh_history", ".sh_history", ".history",
+    ".mysql_history", ".psql_history", ".python_history",
+}
+
+# Procesos usados por scan() (1 = recorrido en el proceso actual) y máximo de
+# subárboles recorridos a la vez dentro de un mismo montaje (st_dev)
+workers = 1
+per_mount_limit = 2
+
+_scan_result = None
+_scan_lock = threading.Lock()
+_stat_cache = {}
+_stat_lock = threading.Lock()
+
+def _unescape_mount(path):
+    """Decodifica los escapes octales de /proc/mounts (\\040 = espacio)."""
+    return path.encode().decode("unicode_escape") if "\\" in path else path
+
+def read_mounts():
+    """Devuelve {punto de montaje: tipo de sistema de archivos} según /proc/mounts."""
+    mounts = {}
+    try:
+        with open("/proc/mounts") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3:
+                    mounts[_unescape_mount(fields[1])] = fields[2]
+    except OSError:
+        pass
+    return mounts
+
+def pruned_mountpoints(prune_types=None):
+    """Puntos de montaje que no se deben recorrer (pseudo y de red por defecto)."""
+    if prune_types is None:
+        prune_types = PSEUDO_FILESYSTEMS | NETWORK_FILESYSTEMS
+    return {mountpoint for mountpoint, fstype in read_mounts().items() if fstype in prune_types}
+
+def file_info(path, st):
+    """Resumen serializable de un inodo (con la ruta dentro del sistema auditado)."""
+    return {
+        "path": paths.guest_path(path),
+        "inode": st.st_ino,
+        "mode": stat.filemode(st.st_mode),
+        "uid": st.st_uid,
+        "gid": st.st_gid,
+        "size": st.st_size,
+        "mtime": int(st.st_mtime),
+        "ctime": int(st.st_ctime),
+    }
+
+def new_result():
+    return {
+        "suid_sgid": [],
+        "world_writable_files": [],
+        "world_writable_dirs": [],
+        "unowned": [],
+        "history_files": [],
+        "errors": 0,
+        "scanned": 0,
+    }
+
+def categories(name, st, known_uids, known_gids):
+    """Listas de new_result() a las que pertenece un inodo (SUID/SGID, escritura global, sin propietario, historial)."""
+    mode = st.st_mode
+    found = []
+    if stat.S_ISREG(mode):
+        if mode & (stat.S_ISUID | stat.S_ISGID):
+            found.append("suid_sgid")
+        if mode & stat.S_IWOTH:
+            found.append("world_writable_files")
+        if name in HISTORY_FILES:
+            found.append("history_files")
+    elif stat.S_ISDIR(mode):
+        # Directorios con escritura global sin sticky bit (como /tmp sin +t)
+        if mode & stat.S_IWOTH and not mode & stat.S_ISVTX:
+            found.append("world_writable_dirs")
+    if st.st_uid not in known_uids or st.st_gid not in known_gids:
+        found.append("unowned")
+    return found
+
+def classify(path, name, st, known_uids, known_gids, result):
+    """Aplica todos los predicados a un inodo ya examinado con lstat."""
+    result["scanned"] += 1
+    for category in categories(name, st, known_uids, known_gids):
+        result[category].append(file_info(path, st))
+
+def known_ids():
+    """UIDs y GIDs definidos en el sistema auditado."""
+    return set(system_files.user_names()), set(system_files.group_names())
+
+def walk(root="/", prune=None, one_filesystem=False, result=None, ids=None, dirs=None):
+    """Recorre un árbol con os.scandir aplicando los predicados a cada entrada.
+
+    prune: puntos de montaje a omitir (por defecto pseudo y de red).
+    one_filesystem: no cruzar a otro st_dev distinto del de root (como find -xdev).
+    dirs: si se indica, se rellena con {directorio: [mtime_ns, ctime_ns, [subdirectorios]]}.
+    """
+    prune = pruned_mountpoints() if prune is None else prune
+    result = new_result() if result is None else result
+    known_uids, known_gids = known_ids() if ids is None else ids
+
+    try:
+        root_stat = os.lstat(root)
+    except OSError:
+        result["errors"] += 1
+        return result
+    root_dev = root_stat.st_dev
+
+    stack = [(root, root_stat)]
+    while stack:
+        directory, directory_stat = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        result["errors"] += 1
+                        continue
+                    classify(entry.path, entry.name, st, known_uids, known_gids, result)
+                    if stat.S_ISDIR(st.st_mode):
+                        subdirs.append(entry.name)
+                        if not should_descend(entry.path, st, prune, one_filesystem, root_dev):
+                            continue
+                        stack.append((entry.path, st))
+        except OSError:
+            result["errors"] += 1
+            continue
+        if dirs is not None:
+            dirs[directory] = [directory_stat.st_mtime_ns, directory_stat.st_ctime_ns, subdirs]
+    return result
+
+def should_descend(path, st, prune, one_filesystem, root_dev):
+    """Decide si se entra en un subdirectorio (poda de montajes y límites de st_dev)."""
+    if path in prune:
+        return False
+    return not one_filesystem or st.st_dev == root_dev
+
+def merge_result(total, partial):
+    """Acumula el resultado de un subárbol en el resultado global."""
+    for key, value in partial.items():
+        if isinstance(value, list):
+            total.setdefault(key, []).extend(value)
+        else:
+            total[key] = total.get(key, 0) + value
+
+def _walk_subtree(path, prune, one_filesystem, ids, root):
+    """Trabajo de un proceso: recorre un subárbol y devuelve (resultado, directorios, segundos de CPU).
+
+    root es la raíz del sistema auditado (paths.root): con "spawn" el proceso
+    hijo empieza con "/" y file_info devolvería rutas del host.
+    """
+    start = time.process_time()
+    paths.set_root(root)
+    dirs = {}
+    result = walk(path, prune=prune, one_filesystem=one_filesystem, ids=ids, dirs=dirs)
+    return result, dirs, time.process_time() - start
+
+def parallel_walk(root="/", workers=None, per_mount_limit=2, prune=None, one_filesystem=False, dirs=None):
+    """Reparte los subdirectorios de primer nivel de root entre un pool de procesos.
+
+    Los resultados se van fusionando a medida que terminan los subárboles, y
+    per_mount_limit limita cuántos subárboles de un mismo st_dev se recorren a
+    la vez, para que un montaje NFS lento no acapare el pool.
+    """
+    prune = pruned_mountpoints() if prune is None else prune
+    ids = known_ids()
+    result = new_result()
+
+    root_stat = os.lstat(root)
+    pending = {}
+    subdirs = []
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    result["errors"] += 1
+                    continue
+                classify(entry.path, entry.name, st, ids[0], ids[1], result)
+                if stat.S_ISDIR(st.st_mode):
+                    subdirs.append(entry.name)
+                    if should_descend(entry.path, st, prune, one_filesystem, root_stat.st_dev):
+                        pending.setdefault(st.st_dev, []).append(entry.path)
+    except OSError:
+        result["errors"] += 1
+        return result
+    if dirs is not None:
+        dirs[root] = [root_stat.st_mtime_ns, root_stat.st_ctime_ns, subdirs]
+
+    # "spawn": el proceso principal ya tiene hilos (un fork podría heredar locks tomados)
+    context = multiprocessing.get_context("spawn")
+    running = {}
+    in_flight = {dev: 0 for dev in pending}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        while pending or running:
+            for dev in list(pending):
+                while pending[dev] and in_flight[dev] < per_mount_limit:
+                    path = pending[dev].pop()
+                    running[executor.submit(_walk_subtree, path, prune, one_filesystem, ids, paths.root)] = dev
+                    in_flight[dev] += 1
+                if not pending[dev]:
+                    del pending[dev]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                in_flight[running.pop(future)] -= 1
+                try:
+                    partial, partial_dirs, cpu_time = future.result()
+                except Exception:
+                    result["errors"] += 1
+                    continue
+                profiling.count_cpu(cpu_time)
+                merge_result(result, partial)
+                if dirs is not None:
+                    dirs.update(partial_dirs)
+    return result
+
+def scan():
+    """Resultado del recorrido de / compartido por toda la auditoría (se hace una vez)."""
+    global _scan_result
+    with _scan_lock:
+        if _scan_result is None:
+            dirs = {}
+            root = paths.host_path("/")
+            if workers > 1:
+                _scan_result = parallel_walk(root, workers=workers, per_mount_limit=per_mount_limit, dirs=dirs)
+            else:
+                _scan_result = walk(root, dirs=dirs)
+            _scan_result["dirs"] = dirs
+        return _scan_result
+
+def stat_path(path):
+    """os.stat cacheado de una ruta del sistema auditado: varios módulos consultan los mismos archivos."""
+    with _stat_lock:
+        if path in _stat_cache:
+            return _stat_cache[path]
+    try:
+        st = os.stat(paths.host_path(path))
+    except FileNotFoundError:
+        st = None
+    with _stat_lock:
+        _stat_cache[path] = st
+    return st
+
+def reset():
+    """Descarta el recorrido y los stat cacheados (p. ej. entre dos ejecuciones)."""
+    global _scan_result
+    with _scan_lock:
+        _scan_result = None
+    with _stat_lock:
+        _stat_cache.clear()
@@ -0,0 +1,114 @@
+import os
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils import paths
+from utils import accounts
+from utils import fs_scanner
+from utils import profiling
+
+# Auditoría de los directorios de inicio en una sola visita por directorio.
+# La lista sale de la tabla de cuentas (incluye los homes fuera de /home) más
+# los directorios de /home que no pertenecen a ninguna cuenta. Cada home se
+# lista una vez con os.scandir (el stat de cada entrada lo guarda el propio
+# DirEntry) y en esa pasada se calculan permisos, propietario, historiales,
+# claves de .ssh y dotfiles. Los homes se reparten entre hilos porque en homes
+# montados por NFS casi todo el tiempo es espera de red.
+
+HOME_WORKERS = 8
+
+# Shells que no permiten iniciar sesión: sus cuentas no tienen un home real
+NOLOGIN_SHELLS = {"/usr/sbin/nologin", "/sbin/nologin", "/bin/false", "/usr/bin/false", ""}
+
+# Homes que nunca se recorren aunque aparezcan en passwd
+IGNORED_HOMES = {"/", "/nonexistent", "/dev/null", "/bin", "/sbin", "/usr/bin", "/usr/sbin"}
+
+# Archivos de confianza entre equipos o reenvío de credenciales que no deberían existir
+DANGEROUS_DOTFILES = {".rhosts", ".shosts", ".netrc", ".forward"}
+
+workers = HOME_WORKERS
+
+_scan_result = None
+_scan_lock = threading.Lock()
+
+def home_directories():
+    """[(home, usuario, uid)] de las cuentas que pueden iniciar sesión y de los directorios de /home."""
+    table = accounts.load()
+    uid_min = accounts.uid_min()
+    homes = {}
+    for name, uid, home, shell in zip(table.passwd["name"], table.passwd["uid"], table.passwd["home"],
+                                      table.passwd["shell"]):
+        home = os.path.normpath(home) if home else ""
+        if not home or home in IGNORED_HOMES or home in homes:
+            continue
+        if uid == 0 or (uid is not None and uid >= uid_min) or shell not in NOLOGIN_SHELLS:
+            homes[home] = (name, uid)
+
+    # Directorios de /home sin cuenta: se atribuyen al nombre del directorio
+    try:
+        with os.scandir(paths.host_path("/home")) as entries:
+            for entry in entries:
+                home = f"/home/{entry.name}"
+                if home not in homes and entry.is_dir(follow_symlinks=False):
+                    homes[home] = (entry.name, None)
+    except FileNotFoundError:
+        pass
+    return [(home, name, uid) for home, (name, uid) in homes.items()]
+
+def _file_entry(st):
+    return {"mode": stat.filemode(st.st_mode), "perm": stat.S_IMODE(st.st_mode), "uid": st.st_uid}
+
+def _scan_ssh(path, result):
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                st = entry.stat(follow_symlinks=False)
+                result["ssh"][paths.guest_path(entry.path)] = _file_entry(st)
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        pass
+
+def scan_home(home, user, uid):
+    """Visita un directorio de inicio y devuelve todo lo que necesitan las comprobaciones."""
+    result = {"home": home, "user": user, "uid": uid, "exists": False, "mode": None, "owner_uid": None,
+              "history": {}, "ssh_dir": None, "ssh": {}, "writable_dotfiles": [], "dangerous": [], "error": None}
+    host_home = paths.host_path(home)
+    try:
+        st = fs_scanner.stat_path(home)
+        if st is None or not stat.S_ISDIR(st.st_mode):
+            return result
+        result.update(exists=True, mode=st.st_mode, owner_uid=st.st_uid)
+
+        with os.scandir(host_home) as entries:
+            for entry in entries:
+                if not entry.name.startswith("."):
+                    continue
+                # DirEntry guarda el stat: cada entrada se consulta una sola vez
+                entry_stat = entry.stat(follow_symlinks=False)
+                path = f"{home.rstrip('/')}/{entry.name}"
+                if entry.name in fs_scanner.HISTORY_FILES and stat.S_ISREG(entry_stat.st_mode):
+                    result["history"][path] = _file_entry(entry_stat)
+                if entry.name in DANGEROUS_DOTFILES:
+                    result["dangerous"].append(path)
+                if entry.name == ".ssh" and stat.S_ISDIR(entry_stat.st_mode):
+                    result["ssh_dir"] = _file_entry(entry_stat)
+                    _scan_ssh(entry.path, result)
+                elif not stat.S_ISLNK(entry_stat.st_mode) and entry_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+                    result["writable_dotfiles"].append(path)
+    except OSError as e:
+        result["error"] = str(e)
+    return result
+
+def scan():
+    """Resultado de visitar todos los homes (se hace una vez por auditoría)."""
+    global _scan_result
+    with _scan_lock:
+        if _scan_result is None:
+            homes = home_directories()
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                _scan_result = list(executor.map(profiling.bind(lambda home: scan_home(*home)), homes))
+        return _scan_result
+
+def reset():
+    global _scan_result
+    with _scan_lock:
+        _scan_result = None
@@ -0,0 +1,228 @@
+import os
+import stat
+import array
+import base64
+import hashlib
+import threading
+from utils import paths
+from utils import profiling
+from utils import state_store
+
+# Línea base de integridad de archivos: para cada archivo de los árboles
+# configurados se guardan ruta, modo, propietario, tamaño, mtime, ctime, inodo
+# y SHA-256 del contenido. El índice está ordenado por ruta y guardado por
+# columnas en arrays (array.array y un único bytearray con los hashes), así
+# que ocupa poco en memoria y en state_store, y la comparación con la
+# auditoría anterior es un merge-join de dos listas ordenadas. El contenido
+# solo se vuelve a leer si cambia el tamaño, el mtime, el ctime o el inodo: el
+# mtime se puede restaurar (touch -d, tar, rsync -t), pero el ctime no.
+
+BASELINE_NAME = "integrity_baseline"
+BASELINE_VERSION = 2
+
+# Árboles cubiertos por la línea base (--baseline-trees)
+DEFAULT_TREES = ["/etc", "/boot", "/root/.ssh", "/usr/local/bin", "/usr/local/sbin", "/var/spool/cron"]
+trees = list(DEFAULT_TREES)
+
+# Se desactiva con --full-scan para volver a calcular todos los hashes
+incremental = True
+
+HASH_SIZE = 32
+NO_HASH = bytes(HASH_SIZE)
+READ_SIZE = 1024 * 1024
+
+# Columnas numéricas del índice y su tipo de array
+COLUMNS = [("modes", "I"), ("uids", "I"), ("gids", "I"), ("sizes", "Q"), ("mtimes", "q"), ("ctimes", "q"),
+           ("inodes", "Q")]
+
+_result = None
+_lock = threading.Lock()
+
+class Baseline:
+    """Índice ordenado por ruta con una columna (array) por atributo."""
+
+    def __init__(self):
+        self.paths = []
+        for column, typecode in COLUMNS:
+            setattr(self, column, array.array(typecode))
+        self.hashes = bytearray()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def append(self, path, st, digest):
+        self.paths.append(path)
+        self.modes.append(st.st_mode)
+        self.uids.append(st.st_uid)
+        self.gids.append(st.st_gid)
+        self.sizes.append(st.st_size)
+        self.mtimes.append(st.st_mtime_ns)
+        self.ctimes.append(st.st_ctime_ns)
+        self.inodes.append(st.st_ino)
+        self.hashes += digest
+
+    def digest(self, index):
+        return bytes(self.hashes[index * HASH_SIZE:(index + 1) * HASH_SIZE])
+
+    def to_state(self):
+        """Representación para state_store: rutas separadas por \\0 y columnas en base64."""
+        state = {"version": BASELINE_VERSION, "count": len(self.paths),
+                 "paths": "\0".join(self.paths), "hashes": base64.b64encode(self.hashes).decode()}
+        for column, _ in COLUMNS:
+            state[column] = base64.b64encode(getattr(self, column).tobytes()).decode()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """Baseline guardada, o None si no existe o no es de esta versión."""
+        if not state or state.get("version") != BASELINE_VERSION:
+            return None
+        baseline = cls()
+        baseline.paths = state["paths"].split("\0") if state["count"] else []
+        for column, typecode in COLUMNS:
+            values = array.array(typecode)
+            values.frombytes(base64.b64decode(state[column]))
+            setattr(baseline, column, values)
+        baseline.hashes = bytearray(base64.b64decode(state["hashes"]))
+        if any(len(getattr(baseline, column)) != state["count"] for column, _ in COLUMNS) or \
+                len(baseline.hashes) != state["count"] * HASH_SIZE:
+            return None
+        return baseline
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    buffer = bytearray(READ_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.digest()
+
+def _content_hash(host_path, st):
+    """SHA-256 del contenido (de un enlace simbólico, su destino); los directorios no tienen hash."""
+    if stat.S_ISREG(st.st_mode):
+        profiling.count_io(bytes_read=st.st_size)
+        return hash_file(host_path)
+    if stat.S_ISLNK(st.st_mode):
+        return hashlib.sha256(os.fsencode(os.readlink(host_path))).digest()
+    return NO_HASH
+
+def _walk(tree, errors):
+    """(ruta del sistema auditado, stat) de un árbol, sin seguir enlaces simbólicos."""
+    host_tree = paths.host_path(tree)
+    try:
+        st = os.lstat(host_tree)
+    except FileNotFoundError:
+        return
+    except OSError:
+        errors.append(tree)
+        return
+    yield tree, st
+    if not stat.S_ISDIR(st.st_mode):
+        return
+    pending = [host_tree]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        entry_stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        errors.append(paths.guest_path(entry.path))
+                        continue
+                    yield paths.guest_path(entry.path), entry_stat
+                    if stat.S_ISDIR(entry_stat.st_mode):
+                        pending.append(entry.path)
+        except OSError:
+            errors.append(paths.guest_path(directory))
+
+def build(tree_list, previous=None):
+    """Nueva línea base de tree_list; reutiliza los hashes de previous si el stat no ha cambiado.
+
+    Devuelve (Baseline, archivos cuyo contenido se ha leído, rutas con error).
+    """
+    errors = []
+    found = {}
+    for tree in tree_list:
+        for path, st in _walk(tree, errors):
+            found[path] = st
+    baseline = Baseline()
+    hashed = 0
+    # Merge-join con la línea base anterior (ambas ordenadas) para reutilizar hashes
+    old_index, old_paths = 0, previous.paths if previous is not None else []
+    for path in sorted(found):
+        st = found[path]
+        while old_index < len(old_paths) and old_paths[old_index] < path:
+            old_index += 1
+        digest = None
+        if old_index < len(old_paths) and old_paths[old_index] == path and \
+                (previous.sizes[old_index], previous.mtimes[old_index], previous.inodes[old_index],
+                 previous.ctimes[old_index]) == (st.st_size, st.st_mtime_ns, st.st_ino, st.st_ctime_ns) and stat.S_IFMT(previous.modes[old_index]) == stat.S_IFMT(st.st_mode):
+            digest = previous.digest(old_index)
+        if digest is None:
+            try:
+                digest = _content_hash(paths.host_path(path), st)
+            except OSError:
+                errors.append(path)
+                digest = NO_HASH
+            hashed += stat.S_ISREG(st.st_mode)
+        baseline.append(path, st, digest)
+    return baseline, hashed, errors
+
+def diff(old, new):
+    """Merge-join de dos líneas base: {"added", "removed", "changed": [{"path", "fields"}]}."""
+    changes = {"added": [], "removed": [], "changed": []}
+    i = j = 0
+    while i < len(old) or j < len(new):
+        if j >= len(new) or (i < len(old) and old.paths[i] < new.paths[j]):
+            changes["removed"].append(old.paths[i])
+            i += 1
+        elif i >= len(old) or new.paths[j] < old.paths[i]:
+            changes["added"].append(new.paths[j])
+            j += 1
+        else:
+            fields = []
+            if old.modes[i] != new.modes[j]:
+                fields.append("mode")
+            if (old.uids[i], old.gids[i]) != (new.uids[j], new.gids[j]):
+                fields.append("owner")
+            if old.sizes[i] != new.sizes[j]:
+                fields.append("size")
+            # El mtime de un directorio cambia con cada alta o baja, que ya se informan aparte
+            if old.mtimes[i] != new.mtimes[j] and not stat.S_ISDIR(new.modes[j]):
+                fields.append("mtime")
+            if old.digest(i) != new.digest(j):
+                fields.append("content")
+            if fields:
+                changes["changed"].append({"path": new.paths[j], "fields": fields})
+            i += 1
+            j += 1
+    return changes
+
+def scan():
+    """Compara los árboles configurados con la línea base anterior y guarda la nueva (una vez por auditoría)."""
+    global _result
+    with _lock:
+        if _result is None:
+            name = state_store.scoped_name(BASELINE_NAME)
+            state = state_store.load(name)
+            # Cambiar los árboles cubiertos invalida la comparación: se crea una línea base nueva
+            previous = Baseline.from_state(state) if state and state.get("trees") == trees else None
+            baseline, hashed, errors = build(trees, previous if incremental else None)
+            _result = {"trees": list(trees), "files": len(baseline), "hashed": hashed, "errors": errors,
+                       "baseline_created": previous is None}
+            _result.update(diff(previous, baseline) if previous is not None
+                           else {"added": [], "removed": [], "changed": []})
+            state = baseline.to_state()
+            state["trees"] = list(trees)
+            state_store.save(name, state)
+        return _result
+
+def reset():
+    global _result
+    with _lock:
+        _result = None
@@ -0,0 +1,293 @@
+import os
+import glob
+import heapq
+import lzma
+import mmap
+import struct
+from utils import paths
+from utils import profiling
+
+# Lector nativo de los archivos del journal de systemd (/var/log/journal/*/*.journal),
+# sin lanzar journalctl. Los archivos se mapean en memoria y los filtros usan
+# los índices del propio journal:
+#   - la tabla hash de campos lleva a los objetos FIELD (_SYSTEMD_UNIT, PRIORITY...);
+#   - cada FIELD encadena los objetos DATA con sus valores (_SYSTEMD_UNIT=ssh.service);
+#   - cada DATA tiene la lista de entradas que lo contienen (entry arrays).
+# Así, filtrar por unidad o prioridad solo toca las entradas que coinciden, y la
+# ventana de tiempo descarta arrays enteros mirando la fecha de su última entrada.
+# Se admiten el modo compacto y los datos comprimidos con XZ (y ZSTD si está
+# disponible el módulo zstandard).
+
+SIGNATURE = b"LPKSHHRH"
+
+# Flags incompatibles de la cabecera
+INCOMPATIBLE_COMPRESSED_XZ = 1
+INCOMPATIBLE_COMPRESSED_LZ4 = 2
+INCOMPATIBLE_KEYED_HASH = 4
+INCOMPATIBLE_COMPRESSED_ZSTD = 8
+INCOMPATIBLE_COMPACT = 16
+
+# Flags de compresión de un objeto DATA
+OBJECT_COMPRESSED_XZ = 1
+OBJECT_COMPRESSED_LZ4 = 2
+OBJECT_COMPRESSED_ZSTD = 4
+
+# Tipos de objeto
+OBJECT_DATA = 1
+OBJECT_FIELD = 2
+OBJECT_ENTRY = 3
+OBJECT_ENTRY_ARRAY = 6
+
+OBJECT_HEADER = struct.Struct("<BB6xQ")
+HASH_ITEM = struct.Struct("<QQ")
+U32 = struct.Struct("<I")
+U64 = struct.Struct("<Q")
+
+# Desplazamientos dentro de la cabecera del archivo y de los objetos
+HEADER_INCOMPATIBLE_FLAGS = 12
+HEADER_SIZE = 88
+HEADER_FIELD_HASH_TABLE = 120
+HEADER_N_ENTRIES = 152
+HEADER_ENTRY_ARRAY = 176
+DATA_NEXT_FIELD = 32
+DATA_ENTRY = 40
+DATA_ENTRY_ARRAY = 48
+DATA_N_ENTRIES = 56
+DATA_PAYLOAD = 64
+DATA_PAYLOAD_COMPACT = 72
+FIELD_NEXT_HASH = 24
+FIELD_HEAD_DATA = 32
+FIELD_PAYLOAD = 40
+ENTRY_REALTIME = 24
+ENTRY_MONOTONIC = 32
+ENTRY_BOOT_ID = 40
+ENTRY_XOR_HASH = 56
+ENTRY_ITEMS = 64
+ENTRY_ARRAY_NEXT = 16
+ENTRY_ARRAY_ITEMS = 24
+
+JOURNAL_DIRS = ["/var/log/journal", "/run/log/journal"]
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class JournalError(Exception):
+    pass
+
+class JournalFile:
+    """Un archivo .journal mapeado en memoria."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.size = os.fstat(self.file.fileno()).st_size
+            if self.size < HEADER_SIZE + 8:
+                raise JournalError(f"{path}: archivo demasiado pequeño")
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+        if self.map[:8] != SIGNATURE:
+            self.close()
+            raise JournalError(f"{path}: no es un archivo del journal")
+        self.flags = U32.unpack_from(self.map, HEADER_INCOMPATIBLE_FLAGS)[0]
+        self.compact = bool(self.flags & INCOMPATIBLE_COMPACT)
+        # En modo compacto los offsets de las listas de entradas ocupan 32 bits
+        self.item = U32 if self.compact else U64
+        self.header_size = U64.unpack_from(self.map, HEADER_SIZE)[0]
+        self.n_entries = U64.unpack_from(self.map, HEADER_N_ENTRIES)[0]
+        self.bytes_touched = 0
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        profiling.count_io(bytes_read=self.bytes_touched)
+        self.close()
+
+    def _u64(self, offset):
+        return U64.unpack_from(self.map, offset)[0]
+
+    def _object(self, offset, expected_type):
+        """(tamaño) de un objeto tras comprobar que está dentro del archivo y es del tipo esperado."""
+        if not offset or offset + OBJECT_HEADER.size > self.size:
+            raise JournalError(f"{self.path}: offset {offset} fuera del archivo")
+        object_type, _, size = OBJECT_HEADER.unpack_from(self.map, offset)
+        if object_type != expected_type or offset + size > self.size:
+            raise JournalError(f"{self.path}: objeto inválido en {offset}")
+        self.bytes_touched += size
+        return size
+
+    # --- Campos y valores ---
+
+    def fields(self):
+        """{nombre de campo: offset del objeto FIELD} recorriendo la tabla hash de campos."""
+        table_offset, table_size = struct.unpack_from("<QQ", self.map, HEADER_FIELD_HASH_TABLE)
+        fields = {}
+        for bucket in range(table_size // HASH_ITEM.size):
+            offset = HASH_ITEM.unpack_from(self.map, table_offset + bucket * HASH_ITEM.size)[0]
+            while offset:
+                size = self._object(offset, OBJECT_FIELD)
+                fields[bytes(self.map[offset + FIELD_PAYLOAD:offset + size]).decode(errors="replace")] = offset
+                offset = self._u64(offset + FIELD_NEXT_HASH)
+        return fields
+
+    def data_payload(self, offset):
+        """Contenido "CAMPO=valor" de un objeto DATA (descomprimido), o None si no se puede leer."""
+        size = self._object(offset, OBJECT_DATA)
+        flags = self.map[offset + 1]
+        start = offset + (DATA_PAYLOAD_COMPACT if self.compact else DATA_PAYLOAD)
+        payload = self.map[start:offset + size]
+        if flags & OBJECT_COMPRESSED_XZ:
+            return lzma.decompress(payload)
+        if flags & OBJECT_COMPRESSED_ZSTD:
+            return zstandard.ZstdDecompressor().decompress(payload, max_output_size=1 << 24) if zstandard else None
+        if flags & OBJECT_COMPRESSED_LZ4:
+            return None
+        return payload
+
+    def field_values(self, field):
+        """[(valor, offset del DATA)] de un campo, siguiendo la cadena de objetos DATA del FIELD."""
+        field_offset = self.fields().get(field)
+        values = []
+        if field_offset is None:
+            return values
+        offset = self._u64(field_offset + FIELD_HEAD_DATA)
+        prefix = field.encode() + b"="
+        while offset:
+            payload = self.data_payload(offset)
+            if payload is not None and payload.startswith(prefix):
+                values.append((payload[len(prefix):].decode(errors="replace"), offset))
+            offset = self._u64(offset + DATA_NEXT_FIELD)
+        return values
+
+    # --- Listas de entradas ---
+
+    def _entry_array(self, offset, remaining=None, since=None):
+        """Offsets de entradas de una cadena de entry arrays (se saltan los arrays anteriores a since)."""
+        width = self.item.size
+        while offset and (remaining is None or remaining > 0):
+            size = self._object(offset, OBJECT_ENTRY_ARRAY)
+            count = (size - ENTRY_ARRAY_ITEMS) // width
+            items = [value for value in (self.item.unpack_from(self.map, offset + ENTRY_ARRAY_ITEMS + i * width)[0]
+                                         for i in range(count)) if value]
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+            # Las entradas están en orden: si la última es anterior a since, el array entero sobra
+            if items and (since is None or self.realtime(items[-1]) >= since):
+                yield from items
+            offset = self._u64(offset + ENTRY_ARRAY_NEXT)
+
+    def entries_for_data(self, data_offset, since=None):
+        """Offsets de las entradas que contienen un objeto DATA."""
+        n_entries = self._u64(data_offset + DATA_N_ENTRIES)
+        if not n_entries:
+            return
+        yield self._u64(data_offset + DATA_ENTRY)
+        yield from self._entry_array(self._u64(data_offset + DATA_ENTRY_ARRAY), n_entries - 1, since)
+
+    def all_entries(self, since=None):
+        return self._entry_array(self._u64(HEADER_ENTRY_ARRAY), self.n_entries, since)
+
+    def realtime(self, entry_offset):
+        """Fecha de una entrada en microsegundos desde 1970."""
+        return self._u64(entry_offset + ENTRY_REALTIME)
+
+    def entry_offsets(self, matches=None, since=None):
+        """Offsets (ordenados) de las entradas que cumplen matches = {campo: {valores}}.
+
+        Dentro de un campo basta con uno de los valores; entre campos deben
+        cumplirse todos (igual que journalctl CAMPO=a CAMPO=b OTRO=c).
+        """
+        if not matches:
+            return list(self.all_entries(since))
+        selected = None
+        for field, values in matches.items():
+            offsets = set()
+            for value, data_offset in self.field_values(field):
+                if value in values:
+                    offsets.update(self.entries_for_data(data_offset, since))
+            selected = offsets if selected is None else selected & offsets
+            if not selected:
+                return []
+        return sorted(selected)
+
+    def read_entry(self, entry_offset):
+        """Todos los campos de una entrada como diccionario."""
+        size = self._object(entry_offset, OBJECT_ENTRY)
+        width = U32.size if self.compact else HASH_ITEM.size
+        entry = {"__REALTIME_TIMESTAMP": self.realtime(entry_offset),
+                 "__MONOTONIC_TIMESTAMP": self._u64(entry_offset + ENTRY_MONOTONIC),
+                 "_BOOT_ID": self.map[entry_offset + ENTRY_BOOT_ID:entry_offset + ENTRY_XOR_HASH].hex(),
+                 "__XOR_HASH": self._u64(entry_offset + ENTRY_XOR_HASH)}
+        for position in range(entry_offset + ENTRY_ITEMS, entry_offset + size - width + 1, width):
+            data_offset = self.item.unpack_from(self.map, position)[0]
+            payload = self.data_payload(data_offset) if data_offset else None
+            if payload is None:
+                continue
+            field, _, value = bytes(payload).partition(b"=")
+            entry[field.decode(errors="replace")] = value.decode(errors="replace")
+        return entry
+
+def journal_files():
+    """Archivos .journal del sistema auditado (los *.journal~ son copias dañadas y se ignoran)."""
+    directories = [paths.host_path(JOURNAL_DIRS[0])]
+    # El journal volátil de /run solo existe en el sistema en ejecución
+    if paths.root == "/":
+        directories.append(JOURNAL_DIRS[1])
+    files = []
+    for directory in directories:
+        files.extend(sorted(glob.glob(os.path.join(directory, "*", "*.journal"))))
+    return files
+
+def _file_entries(path, matches, since, until):
+    # Un archivo dañado o a medio escribir no impide leer los demás: se deja de leer ese archivo
+    try:
+        with JournalFile(path) as journal:
+            for offset in journal.entry_offsets(matches, since):
+                timestamp = journal.realtime(offset)
+                if since is not None and timestamp < since:
+                    continue
+                if until is not None and timestamp > until:
+                    break
+                yield journal.read_entry(offset)
+    except (OSError, ValueError, struct.error, lzma.LZMAError, JournalError):
+        return
+
+def read_entries(unit=None, priority=None, since=None, until=None, matches=None, files=None):
+    """Entradas del journal en orden cronológico que cumplen los filtros.
+
+    unit: una unidad o lista de unidades (_SYSTEMD_UNIT); priority: prioridad
+    máxima (0 = emerg ... 7 = debug); since/until: segundos desde 1970;
+    matches: {campo: [valores]} adicionales.
+    """
+    matches = {field: set(values) for field, values in (matches or {}).items()}
+    if unit is not None:
+        matches["_SYSTEMD_UNIT"] = {unit} if isinstance(unit, str) else set(unit)
+    if priority is not None:
+        matches["PRIORITY"] = {str(level) for level in range(priority + 1)}
+    since = int(since * 1000000) if since is not None else None
+    until = int(until * 1000000) if until is not None else None
+
+    streams = [_file_entries(path, matches, since, until) for path in (journal_files() if files is None else files)]
+    # Cada archivo está en orden; se mezclan por fecha
+    return _unique(heapq.merge(*streams, key=lambda entry: entry["__REALTIME_TIMESTAMP"]))
+
+def _unique(entries):
+    """Descarta las entradas repetidas en varios archivos (p. ej. /run copiado a /var con journalctl --flush)."""
+    timestamp, seen = None, set()
+    for entry in entries:
+        if entry["__REALTIME_TIMESTAMP"] != timestamp:
+            timestamp, seen = entry["__REALTIME_TIMESTAMP"], set()
+        identity = (entry["_BOOT_ID"], entry["__MONOTONIC_TIMESTAMP"], entry["__XOR_HASH"])
+        if identity not in seen:
+            seen.add(identity)
+            yield entry
@@ -0,0 +1,297 @@
+import os
+import re
+import gzip
+import mmap
+import struct
+import hashlib
+from collections import Counter
+from utils import paths
+from utils import profiling
+from utils import state_store
+
+# Análisis de auth.log/syslog en streaming. Los archivos se recorren por
+# ventanas de CHUNK_SIZE bytes que terminan en un salto de línea: los planos a
+# través de mmap (las expresiones regulares trabajan directamente sobre el
+# mapa, sin copiarlo a memoria de Python) y los rotados .gz descomprimiéndolos
+# por bloques. Los contadores por IP y por usuario tienen un tamaño máximo, así
+# que la memoria no depende del tamaño de los logs.
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Checkpoints por archivo entre auditorías (inodo, offset y hashes del
+# comienzo y del final de lo ya leído) para leer solo los bytes nuevos.
+# Con incremental = False (--full-scan) se vuelven a leer los logs enteros.
+CHECKPOINT_NAME = "log_checkpoints"
+HEAD_SIZE = 4096
+TAIL_SIZE = 4096
+incremental = True
+
+# Intentos fallidos desde una misma IP a partir de los cuales se considera fuerza bruta
+BRUTE_FORCE_THRESHOLD = 10
+
+# Máximo de claves que guarda cada contador y de ejemplos que se conservan
+MAX_TRACKED_KEYS = 10000
+MAX_SAMPLES = 20
+TOP_ENTRIES = 10
+
+FAILED_LOGIN = re.compile(rb"sshd\[\d+\]: Failed \S+ for (?:invalid user )?(?P<user>\S+) from (?P<ip>[0-9A-Fa-f:.]+)")
+ACCEPTED_LOGIN = re.compile(rb"sshd\[\d+\]: Accepted \S+ for (?P<user>\S+) from (?P<ip>[0-9A-Fa-f:.]+)")
+PAM_FAILURE = re.compile(rb"pam_unix\((?P<service>[\w-]+):auth\): authentication failure;[^\n]*?rhost=(?P<ip>\S*)"
+                         rb"(?:[ \t]+user=(?P<user>\S+))?")
+SUDO = re.compile(rb"sudo(?:\[\d+\])?:[ \t]+(?P<user>\S+) : (?:(?P<failure>[^;\n]+?) ; )?TTY=\S+ ; PWD=\S* ; "
+                  rb"USER=(?P<target>\S+) ; COMMAND=(?P<command>[^\n]*)")
+
+def _text(value):
+    return value.decode(errors="replace") if value else ""
+
+class BoundedCounter(Counter):
+    """Counter que, al superar max_keys, descarta la mitad de claves con menos cuentas."""
+
+    def __init__(self, max_keys=MAX_TRACKED_KEYS):
+        super().__init__()
+        self.max_keys = max_keys
+
+    def add(self, key, count=1):
+        self[key] += count
+        if len(self) > self.max_keys:
+            for key, _ in self.most_common()[self.max_keys // 2:]:
+                del self[key]
+
+class LogStats:
+    """Contadores acumulados al analizar uno o varios logs."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.failed_logins = 0
+        self.failed_by_ip = BoundedCounter()
+        self.failed_by_user = BoundedCounter()
+        self.accepted_by_ip = BoundedCounter()
+        self.pam_failures = BoundedCounter()
+        self.sudo_commands = 0
+        self.sudo_by_user = BoundedCounter()
+        self.sudo_failures = []
+
+    def scan(self, buffer, start, end):
+        """Aplica las expresiones a buffer[start:end] (bytes o mmap)."""
+        for match in FAILED_LOGIN.finditer(buffer, start, end):
+            self.failed_logins += 1
+            self.failed_by_ip.add(_text(match["ip"]))
+            self.failed_by_user.add(_text(match["user"]))
+        for match in ACCEPTED_LOGIN.finditer(buffer, start, end):
+            self.accepted_by_ip.add(_text(match["ip"]))
+        for match in PAM_FAILURE.finditer(buffer, start, end):
+            self.pam_failures.add(_text(match["service"]))
+        for match in SUDO.finditer(buffer, start, end):
+            if match["failure"]:
+                if len(self.sudo_failures) < MAX_SAMPLES:
+                    self.sudo_failures.append(f"{_text(match['user'])}: {_text(match['failure'])}")
+            else:
+                self.sudo_commands += 1
+                self.sudo_by_user.add(_text(match["user"]))
+        self.bytes += end - start
+
+    def brute_force(self):
+        """IPs con al menos BRUTE_FORCE_THRESHOLD fallos; se marca si además lograron entrar."""
+        return {ip: {"failures": count, "successful_login": ip in self.accepted_by_ip}
+                for ip, count in self.failed_by_ip.most_common() if count >= BRUTE_FORCE_THRESHOLD}
+
+    def to_dict(self):
+        return {
+            "bytes_analyzed": self.bytes,
+            "failed_logins": self.failed_logins,
+            "top_failed_ips": dict(self.failed_by_ip.most_common(TOP_ENTRIES)),
+            "top_failed_users": dict(self.failed_by_user.most_common(TOP_ENTRIES)),
+            "pam_auth_failures": dict(self.pam_failures),
+            "brute_force": self.brute_force(),
+            "sudo_commands": self.sudo_commands,
+            "sudo_by_user": dict(self.sudo_by_user.most_common(TOP_ENTRIES)),
+            "sudo_failures": self.sudo_failures,
+        }
+
+def _windows(buffer, start, end):
+    """Divide buffer[start:end] en ventanas de CHUNK_SIZE que terminan en salto de línea."""
+    while start < end:
+        stop = min(start + CHUNK_SIZE, end)
+        if stop < end:
+            newline = buffer.rfind(b"\n", start, stop)
+            # Una línea más larga que la ventana se corta en lugar de crecer sin límite
+            stop = newline + 1 if newline >= start else stop
+        yield start, stop
+        start = stop
+
+def analyze_file(path, stats, offset=0):
+    """Analiza un log desde offset (ruta del host) y devuelve el offset hasta el que se ha leído.
+
+    Solo se consumen líneas completas: una línea a medio escribir se deja para
+    la siguiente lectura.
+    """
+    if path.endswith(".gz"):
+        return _analyze_gzip(path, stats, offset)
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= offset:
+            return offset
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            end = mm.rfind(b"\n", offset, size) + 1
+            for start, stop in _windows(mm, offset, end):
+                stats.scan(mm, start, stop)
+            profiling.count_io(bytes_read=max(0, end - offset))
+            return max(offset, end)
+
+def _analyze_gzip(path, stats, offset=0):
+    """Igual que analyze_file para un log rotado y comprimido (offset sobre los datos descomprimidos)."""
+    read = 0
+    pending = b""
+    with gzip.open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            profiling.count_io(bytes_read=len(chunk))
+            chunk_start = read
+            read += len(chunk)
+            if read <= offset:
+                continue
+            if chunk_start < offset:
+                chunk = chunk[offset - chunk_start:]
+            buffer = pending + chunk
+            end = buffer.rfind(b"\n") + 1
+            if end == 0 and len(buffer) >= CHUNK_SIZE:
+                end = len(buffer)
+            stats.scan(buffer, 0, end)
+            pending = buffer[end:]
+    return max(offset, read - len(pending))
+
+def rotated_files(log_file):
+    """Rutas del host de un log y sus rotaciones (auth.log.2.gz, auth.log.1, auth.log), de la más antigua a la actual."""
+    directory, base = os.path.split(paths.host_path(log_file))
+    rotation = re.compile(re.escape(base) + r"(?:\.(\d+)(?:\.gz)?)?")
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    rotations = []
+    for name in names:
+        match = rotation.fullmatch(name)
+        if match:
+            rotations.append((int(match[1] or 0), name))
+    return [os.path.join(directory, name) for _, name in sorted(rotations, reverse=True)]
+
+def _head_hash(path, length):
+    """sha1 de los primeros length bytes (descomprimidos si es .gz)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+def _tail_hash(path, offset):
+    """sha1 de los TAIL_SIZE bytes anteriores a offset en un log sin comprimir."""
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - TAIL_SIZE))
+        return hashlib.sha1(f.read(min(offset, TAIL_SIZE))).hexdigest()
+
+def _gzip_length(path):
+    """Tamaño descomprimido (módulo 2^32) que gzip guarda en sus 4 últimos bytes."""
+    with open(path, "rb") as f:
+        f.seek(-4, os.SEEK_END)
+        return struct.unpack("<I", f.read(4))[0]
+
+def _checkpoint(path, st, offset):
+    head_length = min(offset, HEAD_SIZE)
+    return {
+        "path": path, "inode": st.st_ino, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "offset": offset,
+        "head_length": head_length, "head": _head_hash(path, head_length) if head_length else None,
+        "tail": None if path.endswith(".gz") else _tail_hash(path, offset),
+    }
+
+def resume_point(path, st, checkpoints):
+    """Decide desde dónde leer un log: (estado, offset, checkpoint previo o None).
+
+    Los estados son "unchanged" (mismo archivo, tamaño y mtime: no se lee),
+    "resumed" (solo se lee lo añadido), "rotated" (el contenido que ya se leyó
+    está ahora en otro archivo: auth.log -> auth.log.1 -> auth.log.2.gz),
+    "truncated" (el archivo se ha vaciado o reescrito) y "new".
+    """
+    for checkpoint in checkpoints:
+        if (checkpoint["inode"], checkpoint["size"], checkpoint["mtime_ns"]) == (st.st_ino, st.st_size, st.st_mtime_ns):
+            return "unchanged" if checkpoint["path"] == path else "rotated", checkpoint["offset"], checkpoint
+
+    # El mismo comienzo identifica el mismo log aunque haya cambiado de nombre o se haya comprimido
+    heads = {}
+    # Primero los checkpoints del mismo inodo (el mismo archivo, quizá renombrado)
+    for checkpoint in sorted(checkpoints, key=lambda checkpoint: checkpoint["inode"] != st.st_ino):
+        if not checkpoint["head_length"]:
+            continue
+        length = checkpoint["head_length"]
+        if length not in heads:
+            heads[length] = _head_hash(path, length)
+        if heads[length] != checkpoint["head"]:
+            continue
+
+        status = "resumed" if checkpoint["path"] == path else "rotated"
+        if path.endswith(".gz"):
+            return status, checkpoint["offset"], checkpoint
+        if st.st_size < checkpoint["offset"] or _tail_hash(path, checkpoint["offset"]) != checkpoint["tail"]:
+            return "truncated", 0, checkpoint
+        return status, checkpoint["offset"], checkpoint
+
+    if any(checkpoint["inode"] == st.st_ino and checkpoint["path"] == path for checkpoint in checkpoints):
+        return "truncated", 0, None
+    return "new", 0, None
+
+def analyze(log_files):
+    """Analiza varios logs (con sus rotaciones) y devuelve (LogStats, {archivo: {estado, bytes}}).
+
+    Con incremental activado solo se leen los bytes añadidos desde la
+    auditoría anterior, según los checkpoints guardados en state_store.
+    """
+    checkpoint_name = state_store.scoped_name(CHECKPOINT_NAME)
+    checkpoints = state_store.load(checkpoint_name, {}).get("files", []) if incremental else []
+    stats = LogStats()
+    files = {}
+    saved = []
+    for log_file in log_files:
+        for path in rotated_files(log_file):
+            guest = paths.guest_path(path)
+            before = stats.bytes
+            try:
+                st = os.stat(path)
+                status, offset, previous = resume_point(path, st, checkpoints)
+                if previous is not None and offset == previous["offset"] and \
+                        (previous["inode"], previous["size"], previous["mtime_ns"]) == (st.st_ino, st.st_size, st.st_mtime_ns):
+                    saved.append(dict(previous, path=path))
+                    files[guest] = {"status": status, "bytes": 0}
+                    continue
+                if path.endswith(".gz") and previous is not None and _gzip_length(path) == offset % 2 ** 32:
+                    end = offset  # Rotación comprimida de un log ya leído entero: no hay nada nuevo
+                else:
+                    end = analyze_file(path, stats, offset)
+                saved.append(_checkpoint(path, st, end))
+            except (OSError, EOFError) as e:
+                files[guest] = {"status": "error", "error": str(e)}
+                continue
+            files[guest] = {"status": status, "bytes": stats.bytes - before}
+
+    state_store.save(checkpoint_name, {"files": saved})
+    return stats, files
+
+def analyze_journal(entries, stats=None):
+    """Analiza entradas del journal (utils.journal) con las mismas expresiones que auth.log.
+
+    Cada entrada se convierte en una línea "IDENTIFICADOR[PID]: MENSAJE" como
+    la que escribiría rsyslog, y se analizan por lotes de CHUNK_SIZE bytes.
+    """
+    stats = LogStats() if stats is None else stats
+    batch, size = [], 0
+    for entry in entries:
+        line = f"{entry.get('SYSLOG_IDENTIFIER', '')}[{entry.get('_PID', '0')}]: {entry.get('MESSAGE', '')}\n".encode()
+        batch.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            stats.scan(b"".join(batch), 0, size)
+            batch, size = [], 0
+    if batch:
+        stats.scan(b"".join(batch), 0, size)
+    return stats
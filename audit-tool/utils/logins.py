@@ -0,0 +1,147 @@
+import os
+import struct
+import sqlite3
+from utils import paths
+from utils import profiling
+from utils import accounts
+
+# Lector nativo de los registros binarios de inicios de sesión: lastlog (un
+# registro por UID en la posición uid * 292), wtmp/btmp (registros utmp de 384
+# bytes) y la base de datos de lastlog2 de las distribuciones recientes.
+# Sustituye a lanzar `lastlog -u` una vez por cuenta y devuelve fechas completas
+# (timestamps Unix) en lugar de texto sin año.
+
+LASTLOG_FILE = "/var/log/lastlog"
+LASTLOG2_DB = "/var/lib/lastlog/lastlog2.db"
+WTMP_FILE = "/var/log/wtmp"
+BTMP_FILE = "/var/log/btmp"
+
+# struct lastlog { int32_t ll_time; char ll_line[32]; char ll_host[256]; }
+LASTLOG_RECORD = struct.Struct("=i32s256s")
+
+# struct utmp (glibc, 64 bits): tipo, pid, línea, id, usuario, host, exit,
+# sesión, tv_sec, tv_usec, dirección y relleno
+UTMP_RECORD = struct.Struct("=h2xi32s4s32s256s2hi2i16s20s")
+
+USER_PROCESS = 7
+LOGIN_PROCESS = 6
+
+READ_SIZE = 1024 * UTMP_RECORD.size
+
+def _text(raw):
+    return raw.split(b"\0", 1)[0].decode(errors="replace")
+
+def read_lastlog(uids, path=LASTLOG_FILE):
+    """{uid: {"time", "line", "host"}} de los UIDs con algún inicio de sesión registrado.
+
+    El archivo es disperso (la posición depende del UID), así que se lee solo
+    el registro de cada UID pedido, en orden de posición.
+    """
+    logins = {}
+    try:
+        f = open(paths.host_path(path), "rb")
+    except FileNotFoundError:
+        return logins
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        bytes_read = 0
+        for uid in sorted(uid for uid in set(uids) if uid is not None and uid >= 0):
+            offset = uid * LASTLOG_RECORD.size
+            if offset + LASTLOG_RECORD.size > size:
+                break
+            f.seek(offset)
+            record = f.read(LASTLOG_RECORD.size)
+            bytes_read += len(record)
+            timestamp, line, host = LASTLOG_RECORD.unpack(record)
+            if timestamp:
+                logins[uid] = {"time": timestamp, "line": _text(line), "host": _text(host)}
+        profiling.count_io(bytes_read=bytes_read)
+    return logins
+
+def read_lastlog2(path=LASTLOG2_DB):
+    """{usuario: {"time", "line", "host"}} de la base de datos de lastlog2 (si existe)."""
+    database = paths.host_path(path)
+    if not os.path.exists(database):
+        return {}
+    try:
+        connection = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+        try:
+            rows = connection.execute("SELECT Name, Time, TTY, RemoteHost FROM Lastlog2").fetchall()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return {}
+    return {name: {"time": timestamp, "line": tty or "", "host": host or ""}
+            for name, timestamp, tty, host in rows if timestamp}
+
+def read_utmp(path):
+    """Recorre un archivo wtmp/btmp y devuelve sus registros como diccionarios."""
+    try:
+        f = open(paths.host_path(path), "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        pending = b""
+        while True:
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                break
+            profiling.count_io(bytes_read=len(chunk))
+            pending += chunk
+            usable = len(pending) - len(pending) % UTMP_RECORD.size
+            for record in UTMP_RECORD.iter_unpack(pending[:usable]):
+                record_type, pid, line, _, user, host, _, _, _, seconds, _, _, _ = record
+                yield {"type": record_type, "pid": pid, "line": _text(line), "user": _text(user),
+                       "host": _text(host), "time": seconds}
+            pending = pending[usable:]
+
+def last_sessions(path=WTMP_FILE):
+    """{usuario: último inicio de sesión} según wtmp, en una sola pasada."""
+    sessions = {}
+    for record in read_utmp(path):
+        if record["type"] != USER_PROCESS or not record["user"]:
+            continue
+        previous = sessions.get(record["user"])
+        if previous is None or record["time"] > previous["time"]:
+            sessions[record["user"]] = {"time": record["time"], "line": record["line"], "host": record["host"]}
+    return sessions
+
+def failed_logins(path=BTMP_FILE):
+    """{usuario: {"count", "last", "hosts"}} de los intentos fallidos registrados en btmp."""
+    failures = {}
+    for record in read_utmp(path):
+        if record["type"] not in (USER_PROCESS, LOGIN_PROCESS) or not record["user"]:
+            continue
+        entry = failures.setdefault(record["user"], {"count": 0, "last": 0, "hosts": set()})
+        entry["count"] += 1
+        entry["last"] = max(entry["last"], record["time"])
+        if record["host"]:
+            entry["hosts"].add(record["host"])
+    for entry in failures.values():
+        entry["hosts"] = sorted(entry["hosts"])
+    return failures
+
+def last_logins():
+    """{usuario: {"time", "line", "host", "source"}} con el inicio de sesión más reciente de cada cuenta.
+
+    Combina lastlog (por UID), lastlog2 y wtmp y se queda con el más reciente.
+    """
+    table = accounts.load()
+    names_by_uid = {}
+    for name, uid in zip(table.passwd["name"], table.passwd["uid"]):
+        names_by_uid.setdefault(uid, name)
+
+    logins = {}
+
+    def add(name, login, source):
+        previous = logins.get(name)
+        if previous is None or login["time"] > previous["time"]:
+            logins[name] = dict(login, source=source)
+
+    for uid, login in read_lastlog(names_by_uid).items():
+        add(names_by_uid[uid], login, "lastlog")
+    for name, login in read_lastlog2().items():
+        add(name, login, "lastlog2")
+    for name, login in last_sessions().items():
+        add(name, login, "wtmp")
+    return logins
@@ -0,0 +1,203 @@
+import os
+import stat
+import time
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from utils import paths
+from utils import packages
+from utils import profiling
+from utils import state_store
+
+# Verificación de los archivos instalados frente a /var/lib/dpkg/info/*.md5sums
+# (lo mismo que `debsums`). Los MD5 se calculan en un pool de procesos, por
+# lotes, leyendo cada archivo con un búfer grande. Tras cada verificación se
+# guarda en state_store (inodo, tamaño, mtime, md5) de cada archivo: en la
+# siguiente auditoría solo se vuelven a leer los archivos cuyo stat ha cambiado.
+
+INFO_DIR = "/var/lib/dpkg/info"
+BASELINE_NAME = "package_integrity"
+BASELINE_VERSION = 1
+
+READ_SIZE = 1024 * 1024
+
+# Un lote termina al llegar a BATCH_FILES archivos o BATCH_BYTES bytes
+BATCH_FILES = 256
+BATCH_BYTES = 64 * 1024 * 1024
+
+# Procesos del pool (1 = en el proceso actual); --hash-workers
+workers = os.cpu_count() or 1
+
+# Se desactiva con --full-scan para volver a calcular todos los hashes
+incremental = True
+
+# Rutas de ejemplo que se guardan en el informe
+MAX_REPORTED_FILES = 50
+
+_result = None
+_lock = threading.Lock()
+
+def read_md5sums(path):
+    """[(md5, ruta absoluta)] de un archivo .md5sums (rutas relativas a /)."""
+    entries = []
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return entries
+    profiling.count_io(bytes_read=len(data))
+    for line in data.splitlines():
+        digest, _, name = line.partition(b"  ")
+        if len(digest) == 32 and name:
+            entries.append((digest.decode(), "/" + name.decode(errors="surrogateescape").lstrip("/")))
+    return entries
+
+def md5sums_files():
+    """{paquete: ruta del host de su .md5sums} de los paquetes instalados."""
+    directory = paths.host_path(INFO_DIR)
+    installed = packages.load()
+    files = {}
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return files
+    for name in names:
+        if not name.endswith(".md5sums"):
+            continue
+        # "paquete.md5sums" o "paquete:arquitectura.md5sums" (multiarquitectura)
+        package = name[:-len(".md5sums")]
+        entry = installed.get(package)
+        if entry is not None and entry["installed"]:
+            files[package] = os.path.join(directory, name)
+    return files
+
+def hash_file(path, buffer=None):
+    """MD5 de un archivo leído con un búfer reutilizable de READ_SIZE bytes."""
+    buffer = buffer or bytearray(READ_SIZE)
+    view = memoryview(buffer)
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+def _hash_batch(batch):
+    """Trabajo de un proceso: ([(ruta del host, md5 o None, error)], segundos de CPU) de un lote de archivos."""
+    start = time.process_time()
+    buffer = bytearray(READ_SIZE)
+    results = []
+    for path in batch:
+        try:
+            results.append((path, hash_file(path, buffer), None))
+        except OSError as e:
+            results.append((path, None, str(e)))
+    return results, time.process_time() - start
+
+def _batches(work):
+    """Agrupa [(ruta del host, tamaño)] en lotes de BATCH_FILES archivos o BATCH_BYTES bytes."""
+    batch, size = [], 0
+    for path, file_size in work:
+        batch.append(path)
+        size += file_size
+        if len(batch) >= BATCH_FILES or size >= BATCH_BYTES:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+def hash_files(work):
+    """{ruta del host: (md5 o None, error)} repartiendo los lotes entre workers procesos."""
+    batches = list(_batches(work))
+    if workers > 1 and len(batches) > 1:
+        # "spawn": el proceso principal ya tiene hilos (un fork podría heredar locks tomados)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            results = list(executor.map(_hash_batch, batches))
+        # La CPU de los procesos del pool se atribuye al módulo que pidió la verificación
+        profiling.count_cpu(sum(cpu for _, cpu in results))
+    else:
+        # En el propio hilo la CPU ya se mide con thread_time()
+        results = [_hash_batch(batch) for batch in batches]
+    hashed = {path: (digest, error) for batch, _ in results for path, digest, error in batch}
+    profiling.count_io(bytes_read=sum(size for _, size in work))
+    return hashed
+
+def verify():
+    """Compara los archivos de los paquetes instalados con sus MD5 de dpkg.
+
+    Devuelve un resumen con los archivos modificados y ausentes; los archivos
+    cuyo (inodo, tamaño, mtime) coincide con la línea base no se vuelven a leer.
+    """
+    baseline_name = state_store.scoped_name(BASELINE_NAME)
+    saved = state_store.load(baseline_name, {}) if incremental else {}
+    baseline = saved.get("files", {}) if saved.get("version") == BASELINE_VERSION else {}
+
+    result = {"packages": 0, "files": 0, "hashed": 0, "unchanged": 0, "bytes_hashed": 0,
+              "modified": [], "missing": [], "errors": [], "baseline_created": not baseline}
+    expected = {}
+    known = {}
+    work = []
+    for package, md5sums in sorted(md5sums_files().items()):
+        result["packages"] += 1
+        for digest, path in read_md5sums(md5sums):
+            if path in expected:
+                continue
+            result["files"] += 1
+            expected[path] = (digest, package)
+            host = paths.host_path(path)
+            try:
+                st = os.lstat(host)
+            except FileNotFoundError:
+                result["missing"].append({"path": path, "package": package})
+                continue
+            except OSError as e:
+                result["errors"].append({"path": path, "error": str(e)})
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                # Sustituido por un enlace o un directorio: no puede tener el contenido del paquete
+                result["modified"].append({"path": path, "package": package})
+                continue
+            signature = [st.st_ino, st.st_size, st.st_mtime_ns]
+            previous = baseline.get(path)
+            if previous is not None and previous[:3] == signature:
+                known[path] = previous
+                result["unchanged"] += 1
+            else:
+                work.append((host, st.st_size))
+                known[path] = signature + [None]
+
+    hashed = hash_files(work)
+    for host, (digest, error) in hashed.items():
+        path = paths.guest_path(host)
+        if error is not None:
+            result["errors"].append({"path": path, "error": error})
+            known.pop(path, None)
+            continue
+        known[path][3] = digest
+    result["hashed"] = len(work)
+    result["bytes_hashed"] = sum(size for _, size in work)
+
+    for path, entry in known.items():
+        digest, package = expected[path]
+        if entry[3] != digest:
+            result["modified"].append({"path": path, "package": package})
+
+    state_store.save(baseline_name, {"version": BASELINE_VERSION, "files": known})
+    return result
+
+def scan():
+    """Resultado de la verificación compartido por la auditoría (se hace una vez)."""
+    global _result
+    with _lock:
+        if _result is None:
+            _result = verify()
+        return _result
+
+def reset():
+    global _result
+    with _lock:
+        _result = None
@@ -0,0 +1,86 @@
+import os
+import threading
+from utils import paths
+from utils import system_files
+
+# Inventario de paquetes a partir de la base de datos de dpkg
+# (/var/lib/dpkg/status). El archivo se parsea una vez a un diccionario
+# {paquete: datos} y se guarda mientras no cambie, así que cada consulta de
+# cualquier módulo es un acceso al diccionario en lugar de un `dpkg -l | grep`
+# (que además daba falsos positivos con nombres que contienen al buscado).
+
+STATUS_FILE = "/var/lib/dpkg/status"
+
+# Campos de cada párrafo que se guardan (el resto se ignora al parsear)
+FIELDS = {"Package": "name", "Status": "status", "Version": "version", "Architecture": "architecture",
+          "Source": "source"}
+
+_cache = {}
+_lock = threading.Lock()
+
+def parse_status(text):
+    """{paquete: {"name", "version", "status", "architecture", "source", "installed"}} de un archivo status.
+
+    Un paquete multiarquitectura aparece una vez por arquitectura: cada
+    párrafo se guarda también como "paquete:arquitectura" y en "paquete" queda
+    el que está instalado.
+    """
+    index = {}
+    for paragraph in text.split("\n\n"):
+        entry = {}
+        for line in paragraph.splitlines():
+            # Las líneas de continuación (descripciones, conffiles) empiezan por espacio
+            if not line or line[0] in " \t":
+                continue
+            key, _, value = line.partition(":")
+            field = FIELDS.get(key)
+            if field:
+                entry[field] = value.strip()
+        name = entry.get("name")
+        if not name:
+            continue
+        entry.setdefault("version", "")
+        entry.setdefault("architecture", "")
+        entry.setdefault("status", "")
+        # "Source: bash (5.2.15-2)": solo el nombre; sin campo Source el origen es el propio paquete
+        entry["source"] = entry.get("source", name).split(" ", 1)[0]
+        # "install ok installed": el último término es el estado real del paquete
+        entry["installed"] = entry["status"].endswith(" installed")
+        index[f"{name}:{entry['architecture']}"] = entry
+        if name not in index or (entry["installed"] and not index[name]["installed"]):
+            index[name] = entry
+    return index
+
+def _signature(path):
+    try:
+        st = os.stat(paths.host_path(path))
+    except FileNotFoundError:
+        return (paths.root, path, None)
+    return (paths.root, path, st.st_ino, st.st_size, st.st_mtime_ns)
+
+def load(path=STATUS_FILE):
+    """Índice de paquetes del sistema auditado; se vuelve a leer solo si cambia el archivo status."""
+    signature = _signature(path)
+    with _lock:
+        index = _cache.get(signature)
+        if index is None:
+            index = parse_status(system_files.read_text(path))
+            _cache.clear()
+            _cache[signature] = index
+        return index
+
+def package(name):
+    """Datos de un paquete ("nombre" o "nombre:arquitectura"), o None si dpkg no lo conoce."""
+    return load().get(name)
+
+def is_installed(name):
+    entry = package(name)
+    return entry is not None and entry["installed"]
+
+def installed_packages():
+    """{paquete: datos} de los paquetes instalados (sin las entradas "nombre:arquitectura")."""
+    return {name: entry for name, entry in load().items() if entry["installed"] and ":" not in name}
+
+def reset():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,30 @@
+import os
+
+# Raíz del sistema auditado. Por defecto "/" (el propio host); puede apuntar a
+# una imagen montada o a un árbol de prueba para que las comprobaciones sobre
+# archivos lean de ahí.
+root = "/"
+
+# Resultado de las comprobaciones que necesitan el sistema en ejecución
+# (procesos, /proc, /sys, kernel cargado) cuando se audita una imagen
+RUNTIME_ONLY = "N/A (requires the running system)"
+
+def is_live():
+    """True si se audita el propio host en ejecución (sin --root)."""
+    return root == "/"
+
+def set_root(path):
+    global root
+    root = os.path.abspath(path)
+
+def host_path(path):
+    """Traduce una ruta del sistema auditado (/etc/passwd) a la ruta real en este host."""
+    if root == "/":
+        return path
+    return os.path.join(root, path.lstrip("/"))
+
+def guest_path(path):
+    """Operación inversa: ruta real en el host -> ruta dentro del sistema auditado."""
+    if root == "/" or not path.startswith(root):
+        return path
+    return "/" + path[len(root):].lstrip("/")
@@ -0,0 +1,461 @@
+import os
+import re
+import glob
+import threading
+from utils import paths
+from utils import system_files
+
+# Motor de reglas declarativo para archivos de configuración. Cada archivo
+# (login.defs, sshd_config y sudoers con todas sus inclusiones) se parsea una
+# sola vez por auditoría a un árbol de directivas, y las reglas se compilan a
+# funciones que solo consultan ese árbol. Añadir una comprobación es añadir una
+# línea a DEFAULT_RULES: no lanza procesos ni vuelve a leer archivos.
+#
+# Una regla es un diccionario:
+#   {"id": ..., "source": "login.defs" | "sshd_config" | "sudoers",
+#    "key": directiva (o consulta "@..." de sudoers), "op": operador,
+#    "value": valor esperado, "description": texto para el informe}
+
+LOGIN_DEFS = "/etc/login.defs"
+SSHD_CONFIG = "/etc/ssh/sshd_config"
+SUDOERS = "/etc/sudoers"
+
+# Límite de anidamiento de inclusiones (el mismo que usa sudo)
+MAX_INCLUDE_DEPTH = 128
+
+# Valores por defecto de sshd (OpenSSH) cuando la directiva no aparece
+SSHD_DEFAULTS = {
+    "permitrootlogin": "prohibit-password",
+    "permitemptypasswords": "no",
+    "passwordauthentication": "yes",
+    "pubkeyauthentication": "yes",
+    "hostbasedauthentication": "no",
+    "ignorerhosts": "yes",
+    "maxauthtries": "6",
+    "x11forwarding": "no",
+    "allowtcpforwarding": "yes",
+    "permituserenvironment": "no",
+}
+
+# Valores por defecto de las opciones de sudo que se comprueban
+SUDOERS_DEFAULTS = {
+    "authenticate": True,
+    "env_reset": True,
+    "use_pty": False,
+    "requiretty": False,
+    "visiblepw": False,
+    "logfile": None,
+}
+
+DEFAULT_RULES = [
+    {"id": "login_defs.pass_max_days", "source": "login.defs", "key": "PASS_MAX_DAYS", "op": "le", "value": 365,
+     "description": "Las contraseñas caducan como máximo en un año"},
+    {"id": "login_defs.pass_min_days", "source": "login.defs", "key": "PASS_MIN_DAYS", "op": "ge", "value": 1,
+     "description": "Debe pasar al menos un día entre cambios de contraseña"},
+    {"id": "login_defs.pass_warn_age", "source": "login.defs", "key": "PASS_WARN_AGE", "op": "ge", "value": 7,
+     "description": "Se avisa con al menos 7 días de antelación de la caducidad"},
+    {"id": "login_defs.encrypt_method", "source": "login.defs", "key": "ENCRYPT_METHOD", "op": "in",
+     "value": ["SHA512", "YESCRYPT"], "description": "Las contraseñas nuevas usan SHA-512 o yescrypt"},
+    {"id": "login_defs.umask", "source": "login.defs", "key": "UMASK", "op": "in", "value": ["027", "077"],
+     "description": "La umask por defecto no da permisos a otros usuarios"},
+    {"id": "sshd.permit_root_login", "source": "sshd_config", "key": "PermitRootLogin", "op": "in",
+     "value": ["no", "prohibit-password", "without-password"],
+     "description": "root no puede iniciar sesión por SSH con contraseña"},
+    {"id": "sshd.permit_empty_passwords", "source": "sshd_config", "key": "PermitEmptyPasswords", "op": "eq",
+     "value": "no", "description": "SSH no acepta contraseñas vacías"},
+    {"id": "sshd.max_auth_tries", "source": "sshd_config", "key": "MaxAuthTries", "op": "le", "value": 4,
+     "description": "Como máximo 4 intentos de autenticación por conexión"},
+    {"id": "sshd.hostbased_authentication", "source": "sshd_config", "key": "HostbasedAuthentication",
+     "op": "eq", "value": "no", "description": "Sin autenticación basada en el equipo de origen"},
+    {"id": "sshd.ignore_rhosts", "source": "sshd_config", "key": "IgnoreRhosts", "op": "eq", "value": "yes",
+     "description": "Se ignoran los archivos .rhosts y .shosts"},
+    {"id": "sshd.x11_forwarding", "source": "sshd_config", "key": "X11Forwarding", "op": "eq", "value": "no",
+     "description": "Reenvío de X11 desactivado"},
+    {"id": "sshd.permit_user_environment", "source": "sshd_config", "key": "PermitUserEnvironment", "op": "eq",
+     "value": "no", "description": "Los usuarios no pueden cambiar el entorno de sshd"},
+    {"id": "sudoers.authenticate", "source": "sudoers", "key": "authenticate", "op": "eq", "value": True,
+     "description": "sudo pide contraseña (sin Defaults !authenticate)"},
+    {"id": "sudoers.env_reset", "source": "sudoers", "key": "env_reset", "op": "eq", "value": True,
+     "description": "sudo limpia las variables de entorno"},
+    {"id": "sudoers.use_pty", "source": "sudoers", "key": "use_pty", "op": "eq", "value": True,
+     "description": "Los comandos de sudo se ejecutan en un pseudoterminal"},
+    {"id": "sudoers.logfile", "source": "sudoers", "key": "logfile", "op": "set",
+     "description": "sudo registra los comandos en un archivo propio"},
+    {"id": "sudoers.nopasswd", "source": "sudoers", "key": "@nopasswd", "op": "empty",
+     "description": "Ninguna regla de sudoers usa NOPASSWD"},
+    {"id": "sudoers.all_commands", "source": "sudoers", "key": "@all_commands", "op": "subset",
+     "value": ["root", "%sudo", "%admin", "%wheel"],
+     "description": "Solo root y los grupos de administración pueden ejecutar cualquier comando"},
+]
+
+_cache = {}
+_lock = threading.Lock()
+
+class Directive:
+    """Nodo del árbol: una directiva con el archivo y la línea de donde sale."""
+
+    __slots__ = ("kind", "key", "value", "args", "file", "line", "context")
+
+    def __init__(self, kind, key, value=None, args=None, file=None, line=0, context=None):
+        self.kind = kind
+        self.key = key
+        self.value = value
+        self.args = args or {}
+        self.file = file
+        self.line = line
+        self.context = context
+
+    def to_dict(self):
+        return {"kind": self.kind, "key": self.key, "value": self.value, "args": self.args,
+                "file": self.file, "line": self.line, "context": self.context}
+
+class ConfigTree:
+    """Un archivo de configuración parseado, con sus inclusiones ya resueltas."""
+
+    def __init__(self, source):
+        self.source = source
+        self.nodes = []
+        self.files = []
+        self.errors = []
+
+    @property
+    def exists(self):
+        return any(os.path.isfile(paths.host_path(path)) for path in self.files)
+
+    def find(self, kind=None, key=None):
+        return [node for node in self.nodes if (kind is None or node.kind == kind) and (key is None or node.key == key)]
+
+    def _read(self, path, depth):
+        """Líneas de un archivo incluido; registra el archivo para la caché y evita ciclos."""
+        if depth > MAX_INCLUDE_DEPTH:
+            self.errors.append(f"{path}: demasiados niveles de inclusión")
+            return None
+        if path in self.files:
+            self.errors.append(f"{path}: inclusión repetida o circular")
+            return None
+        self.files.append(path)
+        return system_files.read_text(path).splitlines()
+
+    def _directory(self, directory):
+        """Entradas de un directorio incluido; el directorio también cuenta para la caché."""
+        self.files.append(directory)
+        return sorted(system_files.list_dir(directory))
+
+# --- login.defs ---
+
+def parse_login_defs(path=LOGIN_DEFS):
+    """login.defs: "CLAVE valor"; si una clave se repite vale la última."""
+    tree = ConfigTree("login.defs")
+    for number, line in enumerate(tree._read(path, 0) or [], 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        parts = stripped.split(None, 1)
+        value = parts[1].strip().strip('"') if len(parts) == 2 else ""
+        tree.nodes.append(Directive("setting", parts[0], value, file=path, line=number))
+    return tree
+
+def _login_defs_value(tree, key):
+    nodes = tree.find("setting", key)
+    return nodes[-1].value if nodes else None
+
+# --- sshd_config ---
+
+def _parse_sshd_file(tree, path, depth, context):
+    for number, line in enumerate(tree._read(path, depth) or [], 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        # "Clave valor" o "Clave=valor"; las claves no distinguen mayúsculas
+        match = re.match(r"(\S+?)\s*(?:=\s*|\s+)(.*)$", stripped)
+        if not match:
+            tree.errors.append(f"{path}:{number}: directiva sin valor")
+            continue
+        key, value = match[1].lower(), match[2].strip().strip('"')
+        if key == "match":
+            context = None if value.lower() == "all" else value
+            tree.nodes.append(Directive("match", key, value, file=path, line=number))
+        elif key == "include":
+            tree.nodes.append(Directive("include", key, value, file=path, line=number, context=context))
+            for pattern in value.split():
+                # Las rutas relativas son relativas a /etc/ssh
+                pattern = pattern if pattern.startswith("/") else f"/etc/ssh/{pattern}"
+                for included in sorted(glob.glob(paths.host_path(pattern))):
+                    _parse_sshd_file(tree, paths.guest_path(included), depth + 1, context)
+        else:
+            tree.nodes.append(Directive("setting", key, value, file=path, line=number, context=context))
+
+def parse_sshd_config(path=SSHD_CONFIG):
+    """sshd_config con sus Include; las directivas dentro de un Match guardan la condición en context."""
+    tree = ConfigTree("sshd_config")
+    _parse_sshd_file(tree, path, 0, None)
+    return tree
+
+def _sshd_value(tree, key):
+    # sshd se queda con el primer valor que encuentra fuera de los bloques Match
+    key = key.lower()
+    for node in tree.find("setting", key):
+        if node.context is None:
+            return node.value
+    return SSHD_DEFAULTS.get(key)
+
+# --- sudoers ---
+
+INCLUDE = re.compile(r"[#@](include|includedir)\s+(.+)$")
+DEFAULTS = re.compile(r"Defaults(?:([:@>!])(\S+))?\s+(.*)$")
+ALIAS = re.compile(r"(User|Runas|Host|Cmnd|Cmd)_Alias\s+(.*)$")
+TAG = re.compile(r"([A-Z_]+):\s*")
+
+def _split(text, separator):
+    """Divide por separator respetando comillas y caracteres escapados."""
+    parts, current, quoted, escaped = [], [], False, False
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == "\\":
+            current.append(char)
+            escaped = True
+        elif char == '"':
+            current.append(char)
+            quoted = not quoted
+        elif char == separator and not quoted:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+def _logical_lines(lines):
+    """Une las líneas terminadas en barra invertida; devuelve (número de la primera línea, texto)."""
+    pending, start = "", 0
+    for number, line in enumerate(lines, 1):
+        if not pending:
+            start = number
+        if line.endswith("\\"):
+            pending += line[:-1] + " "
+            continue
+        yield start, pending + line
+        pending = ""
+    if pending:
+        yield start, pending
+
+def _parse_defaults(tree, path, number, match):
+    binding = f"{match[1]}{match[2]}" if match[1] else None
+    for setting in _split(match[3], ","):
+        operator_match = re.match(r"(\w+)\s*(\+=|-=|=)\s*(.*)$", setting)
+        if operator_match:
+            key, operator, value = operator_match[1], operator_match[2], operator_match[3].strip().strip('"')
+        else:
+            negated = setting.startswith("!")
+            key, operator, value = setting.lstrip("!").strip(), None, not negated
+        tree.nodes.append(Directive("defaults", key, value, {"binding": binding, "operator": operator},
+                                    file=path, line=number))
+
+def _tag_name(tag):
+    """NOPASSWD y PASSWD (o NOEXEC y EXEC...) son la misma etiqueta con valores opuestos."""
+    return tag[2:] if tag.startswith("NO") else tag
+
+def _parse_user_spec(tree, path, number, text):
+    users_text, rest = (re.split(r"\s+", text, 1) + [""])[:2]
+    if "=" not in rest:
+        tree.errors.append(f"{path}:{number}: línea no reconocida")
+        return
+    # Los usuarios pueden ir separados por comas con espacios ("bob, alice ALL=...")
+    while users_text.endswith(",") and rest:
+        extra, rest = (re.split(r"\s+", rest.strip(), 1) + [""])[:2]
+        users_text += extra
+    hosts, _, commands_text = rest.partition("=")
+    commands_text = commands_text.strip()
+    runas = None
+    runas_match = re.match(r"\(([^)]*)\)\s*", commands_text)
+    if runas_match:
+        runas = runas_match[1].strip()
+        commands_text = commands_text[runas_match.end():]
+    commands, tags = [], []
+    for command in _split(commands_text, ","):
+        # Las etiquetas (NOPASSWD:, SETENV:...) se aplican a los comandos que las siguen
+        tag_match = TAG.match(command)
+        while tag_match:
+            tags = [tag for tag in tags if _tag_name(tag) != _tag_name(tag_match[1])] + [tag_match[1]]
+            command = command[tag_match.end():]
+            tag_match = TAG.match(command)
+        commands.append({"command": command.strip(), "tags": list(tags)})
+    tree.nodes.append(Directive("user_spec", users_text.strip(), commands,
+                                {"users": _split(users_text, ","), "hosts": _split(hosts, ","), "runas": runas},
+                                file=path, line=number))
+
+def _parse_sudoers_file(tree, path, depth):
+    lines = tree._read(path, depth)
+    if lines is None:
+        return
+    for number, line in _logical_lines(lines):
+        stripped = line.strip()
+        include = INCLUDE.match(stripped)
+        if include:
+            target = include[2].strip().strip('"')
+            # Las rutas relativas se resuelven desde el directorio del archivo que incluye
+            target = target if target.startswith("/") else os.path.join(os.path.dirname(path), target)
+            tree.nodes.append(Directive(include[1], target, file=path, line=number))
+            if include[1] == "include":
+                _parse_sudoers_file(tree, target, depth + 1)
+            else:
+                # sudo ignora los archivos terminados en ~ o que contienen un punto
+                for name in tree._directory(target):
+                    if not name.endswith("~") and "." not in name:
+                        _parse_sudoers_file(tree, f"{target.rstrip('/')}/{name}", depth + 1)
+            continue
+        # "#1000 ALL=..." es una regla para el UID 1000, no un comentario
+        if not stripped or (stripped.startswith("#") and not re.match(r"#\d+\s", stripped)):
+            continue
+        defaults = DEFAULTS.match(stripped)
+        alias = ALIAS.match(stripped)
+        if defaults:
+            _parse_defaults(tree, path, number, defaults)
+        elif alias:
+            for definition in _split(alias[2], ":"):
+                name, _, members = definition.partition("=")
+                tree.nodes.append(Directive("alias", name.strip(), _split(members, ","), {"type": alias[1]},
+                                            file=path, line=number))
+        else:
+            _parse_user_spec(tree, path, number, stripped)
+
+def parse_sudoers(path=SUDOERS):
+    """sudoers con sus @include/@includedir (y las formas antiguas #include/#includedir)."""
+    tree = ConfigTree("sudoers")
+    _parse_sudoers_file(tree, path, 0)
+    return tree
+
+def _sudoers_value(tree, key):
+    if key == "@nopasswd":
+        return [f"{node.key}: {command['command']}" for node in tree.find("user_spec")
+                for command in node.value if "NOPASSWD" in command["tags"]]
+    if key == "@all_commands":
+        return sorted({user for node in tree.find("user_spec")
+                       if any(command["command"] == "ALL" for command in node.value) for user in node.args["users"]})
+    if key == "@includes":
+        return [node.key for node in tree.nodes if node.kind in ("include", "includedir")]
+    # Opción global: se aplican en orden los Defaults sin usuario, equipo ni comando
+    value = SUDOERS_DEFAULTS.get(key)
+    for node in tree.find("defaults", key):
+        if node.args["binding"] is not None:
+            continue
+        operator = node.args["operator"]
+        if operator == "+=" and isinstance(value, str):
+            value = f"{value} {node.value}"
+        elif operator == "-=":
+            value = " ".join(item for item in str(value or "").split() if item not in node.value.split())
+        else:
+            value = node.value
+    return value
+
+PARSERS = {
+    "login.defs": (parse_login_defs, _login_defs_value),
+    "sshd_config": (parse_sshd_config, _sshd_value),
+    "sudoers": (parse_sudoers, _sudoers_value),
+}
+
+# --- Caché de árboles ---
+
+def _signature(files):
+    signature = [paths.root]
+    for path in files:
+        try:
+            st = os.stat(paths.host_path(path))
+            signature.append((path, st.st_ino, st.st_size, st.st_mtime_ns))
+        except FileNotFoundError:
+            signature.append((path, None))
+    return tuple(signature)
+
+def load(source):
+    """Árbol de un archivo de configuración; se vuelve a parsear solo si cambia alguno de sus archivos."""
+    with _lock:
+        cached = _cache.get(source)
+        if cached is not None and cached[0] == _signature(cached[1].files):
+            return cached[1]
+        tree = PARSERS[source][0]()
+        _cache[source] = (_signature(tree.files), tree)
+        return tree
+
+def value(source, key):
+    """Valor efectivo de una directiva (con los valores por defecto del programa)."""
+    return PARSERS[source][1](load(source), key)
+
+def reset():
+    with _lock:
+        _cache.clear()
+
+# --- Reglas ---
+
+def _number(value):
+    try:
+        return int(str(value))
+    except ValueError:
+        return None
+
+def _lower(value):
+    return str(value).lower()
+
+OPERATORS = {
+    "eq": lambda actual, expected: actual is not None and _lower(actual) == _lower(expected),
+    "ne": lambda actual, expected: actual is None or _lower(actual) != _lower(expected),
+    "ge": lambda actual, expected: _number(actual) is not None and _number(actual) >= expected,
+    "le": lambda actual, expected: _number(actual) is not None and _number(actual) <= expected,
+    "in": lambda actual, expected: actual is not None and _lower(actual) in {_lower(item) for item in expected},
+    "not_in": lambda actual, expected: actual is None or _lower(actual) not in {_lower(item) for item in expected},
+    "set": lambda actual, expected: actual not in (None, False, ""),
+    "unset": lambda actual, expected: actual in (None, False, ""),
+    "empty": lambda actual, expected: not actual,
+    "subset": lambda actual, expected: set(actual or []) <= set(expected),
+}
+
+class Rule:
+    """Regla compilada: la función de comprobación ya está resuelta."""
+
+    __slots__ = ("id", "source", "key", "op", "expected", "description", "_getter", "_check")
+
+    def __init__(self, definition):
+        for field in ("id", "source", "key", "op"):
+            if field not in definition:
+                raise ValueError(f"Regla sin '{field}': {definition}")
+        if definition["source"] not in PARSERS:
+            raise ValueError(f"Origen desconocido en la regla {definition['id']}: {definition['source']}")
+        if definition["op"] not in OPERATORS:
+            raise ValueError(f"Operador desconocido en la regla {definition['id']}: {definition['op']}")
+        self.id = definition["id"]
+        self.source = definition["source"]
+        self.key = definition["key"]
+        self.op = definition["op"]
+        self.expected = definition.get("value")
+        self.description = definition.get("description", "")
+        self._getter = PARSERS[self.source][1]
+        self._check = OPERATORS[self.op]
+
+    def evaluate(self, tree):
+        actual = self._getter(tree, self.key)
+        return {
+            "status": "PASS" if self._check(actual, self.expected) else "FAIL",
+            "value": actual,
+            "expected": f"{self.op} {self.expected}" if self.expected is not None else self.op,
+            "description": self.description,
+        }
+
+def compile_rules(definitions):
+    """Valida y compila una lista de reglas; un error en cualquier regla se detecta antes de auditar."""
+    return [Rule(definition) for definition in definitions]
+
+def evaluate(rules):
+    """{id: resultado} de las reglas compiladas; cada archivo se parsea una vez para todas sus reglas."""
+    trees = {source: load(source) for source in {rule.source for rule in rules}}
+    results = {}
+    for rule in rules:
+        tree = trees[rule.source]
+        if not tree.exists:
+            results[rule.id] = {"status": "N/A", "value": None, "expected": rule.op,
+                                "description": f"{rule.description} ({rule.source} no encontrado)"}
+            continue
+        results[rule.id] = rule.evaluate(tree)
+    return results
+
+COMPILED_DEFAULT_RULES = compile_rules(DEFAULT_RULES)
@@ -0,0 +1,145 @@
+import cProfile
+import functools
+import inspect
+import resource
+import threading
+import time
+
+# Instrumentación por comprobación y por módulo para la sección _timings del informe.
+# Mide tiempo real, tiempo de CPU, subprocesos lanzados y bytes leídos (salida
+# de comandos y archivos). Los contadores son del hilo que ejecuta el módulo;
+# el trabajo que este reparte en un pool de hilos se le suma envolviendo la
+# tarea con bind(), y la CPU de los pools de procesos con count_cpu(). El pico de memoria (ru_maxrss) es del proceso entero y no
+# se puede repartir entre módulos que se ejecutan a la vez: se informa una vez.
+
+_local = threading.local()
+_timings = {"modules": {}, "checks": {}}
+_lock = threading.Lock()
+
+def _counters():
+    counters = getattr(_local, "counters", None)
+    if counters is None:
+        counters = _local.counters = {"subprocesses": 0, "bytes_read": 0, "worker_cpu_time": 0.0}
+    return counters
+
+def count_io(subprocesses=0, bytes_read=0):
+    """Lo llaman command_runner y system_files para atribuir E/S al hilo actual (o al que le encargó el trabajo)."""
+    counters = _counters()
+    with _lock:
+        counters["subprocesses"] += subprocesses
+        counters["bytes_read"] += bytes_read
+
+def count_cpu(seconds):
+    """Suma el tiempo de CPU de un proceso hijo de un pool (recorrido paralelo, hashes) al hilo actual."""
+    counters = _counters()
+    with _lock:
+        counters["worker_cpu_time"] += seconds
+
+def bind(func):
+    """Envuelve una tarea de un pool de hilos para que su E/S y su CPU cuenten en el hilo que la lanza."""
+    counters = _counters()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        previous = getattr(_local, "counters", None)
+        _local.counters = counters
+        start = time.thread_time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with _lock:
+                counters["worker_cpu_time"] += time.thread_time() - start
+            _local.counters = previous
+    return wrapper
+
+def current_counters():
+    """Copia de los contadores del hilo actual (los benchmarks la usan para medir la E/S de una pasada)."""
+    counters = _counters()
+    with _lock:
+        return dict(counters)
+
+def _sample():
+    counters = _counters()
+    with _lock:
+        return (time.perf_counter(), time.thread_time() + counters["worker_cpu_time"],
+                counters["subprocesses"], counters["bytes_read"])
+
+def _delta(before, after):
+    return {
+        "wall_time": after[0] - before[0],
+        "cpu_time": after[1] - before[1],
+        "subprocesses": after[2] - before[2],
+        "bytes_read": after[3] - before[3],
+    }
+
+def _add(table, key, metrics):
+    with _lock:
+        entry = table.setdefault(key, {"calls": 0, "wall_time": 0.0, "cpu_time": 0.0, "subprocesses": 0,
+                                       "bytes_read": 0})
+        entry["calls"] += 1
+        for name, value in metrics.items():
+            entry[name] += value
+
+def timed(module_name):
+    """Decorador que acumula las métricas de cada llamada a una comprobación."""
+    def decorator(func):
+        checks = _timings["checks"].setdefault(module_name, {})
+
+        if inspect.iscoroutinefunction(func):
+            # Las corrutinas se solapan entre sí: CPU y E/S incluyen las de sus vecinas
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                before = _sample()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _add(checks, func.__name__, _delta(before, _sample()))
+            async_wrapper.instrumented = True
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            before = _sample()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _add(checks, func.__name__, _delta(before, _sample()))
+        wrapper.instrumented = True
+        return wrapper
+    return decorator
+
+def instrument_module(module):
+    """Aplica @timed a todas las funciones públicas del módulo salvo run()."""
+    name = module.__name__.rsplit(".", 1)[-1]
+    for attr, value in list(vars(module).items()):
+        if (inspect.isfunction(value) and value.__module__ == module.__name__ and not attr.startswith("_")
+                and attr != "run" and not getattr(value, "instrumented", False)):
+            setattr(module, attr, timed(name)(value))
+
+def measure_module(name, func, profile_path=None):
+    """Ejecuta run() de un módulo registrando sus métricas y, opcionalmente, un perfil cProfile."""
+    profiler = cProfile.Profile() if profile_path else None
+    before = _sample()
+    if profiler:
+        profiler.enable()
+    try:
+        return func()
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        _add(_timings["modules"], name, _delta(before, _sample()))
+
+def _rounded(entry):
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in entry.items()}
+
+def get_timings():
+    """Devuelve la sección _timings del informe."""
+    with _lock:
+        return {
+            "modules": {name: _rounded(entry) for name, entry in _timings["modules"].items()},
+            "checks": {module: {check: _rounded(entry) for check, entry in checks.items()}
+                       for module, checks in _timings["checks"].items() if checks},
+            # ru_maxrss: pico de memoria del proceso en toda la auditoría (KiB en Linux)
+            "process": {"peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss},
+        }
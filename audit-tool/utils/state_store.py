@@ -0,0 +1,34 @@
+import os
+import json
+import hashlib
+import threading
+from utils import paths
+
+# Estado persistente entre auditorías (índices, líneas base, offsets...).
+STATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "state")
+
+def state_path(name):
+    return os.path.join(STATE_DIR, f"{name}.json")
+
+def scoped_name(name):
+    """Nombre de estado propio de la raíz auditada (cada imagen tiene su índice)."""
+    if paths.root == "/":
+        return name
+    return f"{name}_{hashlib.sha1(paths.root.encode()).hexdigest()[:12]}"
+
+def load(name, default=None):
+    """Carga un estado guardado; devuelve default si no existe o está corrupto."""
+    try:
+        with open(state_path(name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def save(name, data):
+    """Guarda un estado de forma atómica (escritura a temporal + rename)."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = state_path(name)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
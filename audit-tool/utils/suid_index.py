@@ -0,0 +1,202 @@
+import os
+import stat
+import hashlib
+import threading
+from utils import fs_scanner
+from utils import paths
+from utils import state_store
+
+# Búsqueda incremental de binarios SUID/SGID, archivos y directorios con
+# escritura global y archivos sin propietario, con un índice persistente.
+#
+# El índice guarda, por directorio, (mtime, ctime, subdirectorios) y, por cada
+# inodo que cumple algún predicado, (inodo, mtime, ctime, modo, uid, gid,
+# categorías). Crear, borrar o renombrar una entrada cambia el mtime de su
+# directorio, así que los directorios sin cambios no se vuelven a listar: solo
+# se recorren sus subdirectorios conocidos y se revisan los inodos ya
+# indexados. Los directorios se examinan siempre (lstat al recorrerlos). Un
+# chmod o chown sobre un archivo existente no altera su directorio; para
+# detectarlo (p. ej. chmod u+s sobre un binario) usar --full-scan.
+
+INDEX_NAME = "suid_index"
+INDEX_VERSION = 2
+
+# Predicados de fs_scanner que se guardan en el índice
+INDEXED_CATEGORIES = ("suid_sgid", "world_writable_files", "world_writable_dirs", "unowned")
+
+# Se desactiva con --full-scan para forzar un recorrido completo
+incremental = True
+
+_result = None
+_lock = threading.Lock()
+
+def _entry(st, found):
+    return {"inode": st.st_ino, "mtime": st.st_mtime_ns, "ctime": st.st_ctime_ns, "mode": st.st_mode,
+            "uid": st.st_uid, "gid": st.st_gid, "categories": found}
+
+def _indexed_categories(path, st, ids):
+    return [category for category in fs_scanner.categories(os.path.basename(path), st, *ids)
+            if category in INDEXED_CATEGORIES]
+
+def _ids_signature(ids):
+    """Resumen de los UIDs y GIDs conocidos: si cambian, "sin propietario" cambia para archivos no indexados."""
+    known_uids, known_gids = ids
+    return hashlib.sha256(repr((sorted(known_uids), sorted(known_gids))).encode()).hexdigest()
+
+def _files_by_dir(files):
+    by_dir = {}
+    for path in files:
+        by_dir.setdefault(os.path.dirname(path), []).append(path)
+    return by_dir
+
+def _full_index(ids):
+    """Construye el índice a partir del recorrido completo compartido de fs_scanner."""
+    scan = fs_scanner.scan()
+    files = {}
+    for category in INDEXED_CATEGORIES:
+        for info in scan[category]:
+            path = paths.host_path(info["path"])
+            if path in files:
+                continue
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            found = _indexed_categories(path, st, ids)
+            if found:
+                files[path] = _entry(st, found)
+    return {"version": INDEX_VERSION, "ids": _ids_signature(ids), "dirs": scan["dirs"], "files": files}, len(scan["dirs"])
+
+def _index_path(path, st, ids, files):
+    found = _indexed_categories(path, st, ids)
+    if found:
+        files[path] = _entry(st, found)
+
+def _rescan_directory(directory, ids, files):
+    """Lista un directorio modificado, indexa sus archivos y devuelve sus subdirectorios."""
+    subdirs = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                # El directorio se indexa al visitarlo (o aquí si no se entra en él)
+                subdirs.append(entry.name)
+            else:
+                _index_path(entry.path, st, ids, files)
+    return subdirs
+
+def _incremental_index(previous, root, ids):
+    """Recorre el árbol listando solo los directorios cuyo mtime o ctime cambió."""
+    prune = fs_scanner.pruned_mountpoints()
+    old_dirs = previous["dirs"]
+    old_files_by_dir = _files_by_dir(previous["files"])
+    dirs, files = {}, {}
+    rescanned = 0
+
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            st = os.lstat(directory)
+        except OSError:
+            continue  # Directorio borrado: sus entradas aparecerán como eliminadas
+        if not stat.S_ISDIR(st.st_mode):
+            continue
+        # Igual que el recorrido completo, la raíz no se clasifica (solo su contenido)
+        if directory != root:
+            _index_path(directory, st, ids, files)
+
+        known = old_dirs.get(directory)
+        if known is not None and known[0] == st.st_mtime_ns and known[1] == st.st_ctime_ns:
+            subdirs = known[2]
+            # Mismas entradas: basta con volver a examinar los archivos ya indexados
+            for path in old_files_by_dir.get(directory, []):
+                try:
+                    file_stat = os.lstat(path)
+                except OSError:
+                    continue
+                if not stat.S_ISDIR(file_stat.st_mode):
+                    _index_path(path, file_stat, ids, files)
+        else:
+            try:
+                subdirs = _rescan_directory(directory, ids, files)
+            except OSError:
+                continue
+            rescanned += 1
+
+        dirs[directory] = [st.st_mtime_ns, st.st_ctime_ns, subdirs]
+        for name in subdirs:
+            path = os.path.join(directory, name)
+            if path not in prune:
+                stack.append(path)
+                continue
+            # Punto de montaje omitido: se clasifica pero no se recorre
+            try:
+                _index_path(path, os.lstat(path), ids, files)
+            except OSError:
+                continue
+
+    return {"version": INDEX_VERSION, "ids": _ids_signature(ids), "dirs": dirs, "files": files}, rescanned
+
+def _describe(path, entry):
+    return {"path": paths.guest_path(path), "inode": entry["inode"], "mode": stat.filemode(entry["mode"])}
+
+def _in_category(files, category):
+    return {path: entry for path, entry in files.items() if category in entry["categories"]}
+
+def diff(previous_files, current_files):
+    """Clasifica los binarios privilegiados en nuevos, eliminados y modificados."""
+    new = [_describe(p, current_files[p]) for p in sorted(current_files.keys() - previous_files.keys())]
+    removed = [_describe(p, previous_files[p]) for p in sorted(previous_files.keys() - current_files.keys())]
+    changed = [_describe(p, current_files[p]) for p in sorted(current_files.keys() & previous_files.keys())
+               if current_files[p] != previous_files[p]]
+    return new, removed, changed
+
+def reset():
+    global _result
+    with _lock:
+        _result = None
+
+def scan():
+    """Resultado de update() compartido por toda la auditoría (el índice se actualiza una vez)."""
+    global _result
+    with _lock:
+        if _result is None:
+            _result = update()
+        return _result
+
+def update():
+    """Actualiza el índice y devuelve los binarios SUID/SGID, los archivos con escritura global
+    y sin propietario, y los cambios en los binarios privilegiados desde la última auditoría."""
+    index_name = state_store.scoped_name(INDEX_NAME)
+    previous = state_store.load(index_name)
+    if previous is not None and previous.get("version") != INDEX_VERSION:
+        previous = None  # Índice de una versión anterior: se vuelve a crear
+    ids = fs_scanner.known_ids()
+    if not incremental or previous is None or previous.get("ids") != _ids_signature(ids):
+        index, rescanned = _full_index(ids)
+        mode = "full"
+    else:
+        index, rescanned = _incremental_index(previous, paths.host_path("/"), ids)
+        mode = "incremental"
+    state_store.save(index_name, index)
+
+    privileged = _in_category(index["files"], "suid_sgid")
+    previous_privileged = _in_category(previous["files"], "suid_sgid") if previous else {}
+    new, removed, changed = diff(previous_privileged, privileged)
+    result = {
+        "mode": mode,
+        "baseline_created": previous is None,
+        "privileged": [_describe(p, e) for p, e in sorted(privileged.items())],
+        "new": new if previous else [],
+        "removed": removed,
+        "changed": changed,
+        "dirs_total": len(index["dirs"]),
+        "dirs_rescanned": rescanned,
+    }
+    for category in ("world_writable_files", "world_writable_dirs", "unowned"):
+        result[category] = [paths.guest_path(p) for p in sorted(_in_category(index["files"], category))]
+    return result
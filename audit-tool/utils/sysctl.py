@@ -0,0 +1,116 @@
+import os
+import threading
+from utils import paths
+from utils import system_files
+
+# Instantánea única de /proc/sys compartida por todos los módulos.
+# Con --root no hay kernel en ejecución: get() devuelve los valores que la
+# imagen configura en sysctl.conf y sysctl.d (los que tendría al arrancar).
+
+PROC_SYS = "/proc/sys"
+
+# Directorios de sysctl.d en orden de prioridad creciente; un archivo con el
+# mismo nombre en un directorio posterior sustituye al anterior (como systemd-sysctl)
+SYSCTL_DIRS = ["/usr/lib/sysctl.d", "/lib/sysctl.d", "/run/sysctl.d", "/etc/sysctl.d"]
+SYSCTL_CONF = "/etc/sysctl.conf"
+
+# Contadores que cambian continuamente y no aportan nada al comparar auditorías
+VOLATILE_KEYS = {
+    "fs.dentry-state", "fs.file-nr", "fs.inode-nr", "fs.inode-state",
+    "kernel.ns_last_pid", "kernel.pty.nr", "kernel.random.entropy_avail",
+    "kernel.random.uuid", "net.netfilter.nf_conntrack_count",
+}
+
+_snapshot = None
+_configured = {}
+_lock = threading.Lock()
+
+def parse_value(raw):
+    """Convierte un valor de sysctl a int, lista de ints o texto."""
+    fields = raw.split()
+    try:
+        numbers = [int(field) for field in fields]
+    except ValueError:
+        return raw
+    if len(numbers) == 1:
+        return numbers[0]
+    return numbers if numbers else raw
+
+def _walk(directory, prefix, values):
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        # sysctl representa los puntos de los nombres de interfaz (eth0.100) como "/"
+        name = prefix + entry.name.replace(".", "/")
+        if entry.is_dir(follow_symlinks=False):
+            _walk(entry.path, name + ".", values)
+            continue
+        try:
+            with open(entry.path) as f:
+                values[name] = parse_value(f.read().strip())
+        except OSError:
+            continue  # Parámetros de solo escritura (p. ej. vm.compact_memory) o sin permiso
+
+def take_snapshot(root=PROC_SYS):
+    """Recorre /proc/sys una sola vez y devuelve {nombre.con.puntos: valor tipado}."""
+    values = {}
+    _walk(root, "", values)
+    return dict(sorted(values.items()))
+
+def snapshot():
+    """Devuelve la instantánea de la auditoría actual, tomándola la primera vez."""
+    global _snapshot
+    with _lock:
+        if _snapshot is None:
+            _snapshot = take_snapshot()
+        return _snapshot
+
+def read_configured():
+    """{nombre: valor} de sysctl.d y sysctl.conf del sistema auditado, aplicados en orden."""
+    files = {}
+    for directory in SYSCTL_DIRS:
+        for name in system_files.list_dir(directory):
+            if name.endswith(".conf"):
+                files[name] = f"{directory}/{name}"
+    values = {}
+    for path in [files[name] for name in sorted(files)] + [SYSCTL_CONF]:
+        for line in system_files.read_lines(path):
+            if line.startswith(";"):
+                continue
+            key, separator, value = line.partition("=")
+            if separator:
+                # "-clave = valor": ignorar el error si no existe; "/" equivale a "."
+                values[key.strip().lstrip("-").replace("/", ".")] = parse_value(value.strip())
+    return values
+
+def configured():
+    """Valores configurados en la imagen auditada (se leen una vez por raíz)."""
+    with _lock:
+        if paths.root not in _configured:
+            _configured[paths.root] = read_configured()
+        return _configured[paths.root]
+
+def get(name, default=None):
+    """Valor de un parámetro (p. ej. "kernel.kptr_restrict") o default si no existe.
+
+    En el sistema en ejecución se lee de /proc/sys; con --root, de la configuración de la imagen.
+    """
+    if paths.root != "/":
+        return configured().get(name, default)
+    return snapshot().get(name, default)
+
+def diff(previous, current):
+    """Compara dos instantáneas ignorando los contadores volátiles."""
+    changes = {"added": {}, "removed": {}, "changed": {}}
+    for name in previous.keys() | current.keys():
+        if name in VOLATILE_KEYS:
+            continue
+        if name not in previous:
+            changes["added"][name] = current[name]
+        elif name not in current:
+            changes["removed"][name] = previous[name]
+        elif previous[name] != current[name]:
+            changes["changed"][name] = {"before": previous[name], "after": current[name]}
+    return {kind: dict(sorted(values.items())) for kind, values in changes.items()}
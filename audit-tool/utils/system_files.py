@@ -0,0 +1,161 @@
+import os
+import pwd
+import grp
+from utils import paths
+from utils import profiling
+
+# Lectores nativos de /proc, /sys y /etc: evitan lanzar /bin/sh para leer un archivo.
+# Las rutas de configuración se resuelven respecto a paths.root; /proc y /sys
+# describen el kernel en ejecución y se leen siempre del host.
+
+def _read(path):
+    try:
+        with open(path, errors="replace") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return ""
+    profiling.count_io(bytes_read=len(text))
+    return text
+
+def read_text(path):
+    """Lee un archivo de texto completo del sistema auditado; devuelve "" si no existe."""
+    return _read(paths.host_path(path))
+
+def read_lines(path, skip_comments=True):
+    """Devuelve las líneas no vacías de un archivo, sin comentarios por defecto."""
+    lines = []
+    for line in read_text(path).splitlines():
+        stripped = line.strip()
+        if not stripped or (skip_comments and stripped.startswith("#")):
+            continue
+        lines.append(stripped)
+    return lines
+
+def grep(path, pattern, ignore_case=False, skip_comments=False):
+    """Equivalente a `grep [-i] pattern path` sin lanzar un proceso."""
+    if ignore_case:
+        pattern = pattern.lower()
+        return [line for line in read_lines(path, skip_comments) if pattern in line.lower()]
+    return [line for line in read_lines(path, skip_comments) if pattern in line]
+
+def read_key_values(path, separator=None):
+    """Parsea archivos "CLAVE valor" (login.defs) o "clave = valor" (auditd.conf)."""
+    values = {}
+    for line in read_lines(path):
+        parts = line.split(separator, 1)
+        if len(parts) == 2:
+            values[parts[0].strip()] = parts[1].strip()
+    return values
+
+# --- /proc ---
+
+def read_cpuinfo():
+    """Devuelve una lista con un diccionario por procesador de /proc/cpuinfo."""
+    processors = []
+    current = {}
+    for line in _read("/proc/cpuinfo").splitlines():
+        if not line.strip():
+            if current:
+                processors.append(current)
+                current = {}
+            continue
+        key, _, value = line.partition(":")
+        current[key.strip()] = value.strip()
+    if current:
+        processors.append(current)
+    return processors
+
+def cpu_flags():
+    """Conjunto de flags de CPU (nx, pae, ...) del primer procesador."""
+    for processor in read_cpuinfo():
+        flags = processor.get("flags") or processor.get("Features")
+        if flags is not None:
+            return set(flags.split())
+    return set()
+
+def read_meminfo():
+    """Devuelve /proc/meminfo como {campo: valor en kB}."""
+    meminfo = {}
+    for line in _read("/proc/meminfo").splitlines():
+        key, _, value = line.partition(":")
+        fields = value.split()
+        if fields and fields[0].isdigit():
+            meminfo[key.strip()] = int(fields[0])
+    return meminfo
+
+# --- /sys ---
+
+def read_io_scheduler(device):
+    """Devuelve (planificador activo, planificadores disponibles) de un dispositivo de bloque."""
+    schedulers = _read(f"/sys/block/{device}/queue/scheduler").split()
+    active = next((s.strip("[]") for s in schedulers if s.startswith("[")), None)
+    return active, [s.strip("[]") for s in schedulers]
+
+# --- /etc ---
+
+def read_login_defs():
+    """Devuelve las directivas activas de /etc/login.defs."""
+    return read_key_values("/etc/login.defs")
+
+def read_resolv_nameservers():
+    """Lista de servidores DNS configurados en /etc/resolv.conf."""
+    return [line.split()[1] for line in read_lines("/etc/resolv.conf")
+            if line.startswith("nameserver") and len(line.split()) > 1]
+
+def read_nsswitch():
+    """Devuelve /etc/nsswitch.conf como {base de datos: [fuentes]}."""
+    return {db: sources.split() for db, sources in read_key_values("/etc/nsswitch.conf", ":").items()}
+
+def read_passwd():
+    """Entradas de /etc/passwd como listas de campos."""
+    return [line.split(":") for line in read_lines("/etc/passwd") if line.count(":") >= 6]
+
+def read_group():
+    """Entradas de /etc/group como listas de campos."""
+    return [line.split(":") for line in read_lines("/etc/group") if line.count(":") >= 3]
+
+def group_members(name):
+    """Miembros de un grupo (`getent group name`): NSS del host o /etc/group de la imagen con --root."""
+    if paths.root == "/":
+        try:
+            return list(grp.getgrnam(name).gr_mem)
+        except KeyError:
+            return None
+    for fields in read_group():
+        if fields[0] == name:
+            return [member for member in fields[3].split(",") if member]
+    return None
+
+def user_names():
+    """{uid: nombre}: NSS del host (incluye LDAP) o los archivos de la imagen con --root."""
+    if paths.root == "/":
+        return {user.pw_uid: user.pw_name for user in pwd.getpwall()}
+    return {int(fields[2]): fields[0] for fields in read_passwd() if fields[2].isdigit()}
+
+def group_names():
+    """{gid: nombre}: NSS del host o /etc/group de la imagen con --root."""
+    if paths.root == "/":
+        return {group.gr_gid: group.gr_name for group in grp.getgrall()}
+    return {int(fields[2]): fields[0] for fields in read_group() if fields[2].isdigit()}
+
+# --- Directorios y ejecutables ---
+
+BIN_DIRS = ["/usr/local/sbin", "/usr/local/bin", "/usr/sbin", "/usr/bin", "/sbin", "/bin"]
+
+def list_dir(path):
+    """Nombres de un directorio del sistema auditado ([] si no existe)."""
+    try:
+        return sorted(os.listdir(paths.host_path(path)))
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+def exists(path):
+    return os.path.exists(paths.host_path(path))
+
+def find_executable(name):
+    """Equivalente a `which name` buscando en los directorios de binarios del sistema auditado."""
+    for directory in BIN_DIRS:
+        path = os.path.join(directory, name)
+        if os.access(paths.host_path(path), os.X_OK):
+            return path
+    return None